@@ -0,0 +1,24 @@
+"""intention status login index
+
+Revision ID: 9ff9eaa95c06
+Revises: 160a2b921996
+Create Date: 2026-10-18 21:10:12.415362
+
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = "9ff9eaa95c06"
+down_revision = "160a2b921996"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_intention_status_login", "intention", ["status", "login"], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_intention_status_login", table_name="intention")
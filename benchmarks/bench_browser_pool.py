@@ -0,0 +1,85 @@
+"""Logins with a fresh browser each vs a warm BrowserPool, on a stub driver.
+
+    python benchmarks/bench_browser_pool.py [logins] [browsers] [startup_sec]
+"""
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from p2p.infrastructure.repository.browser_pool import BrowserPool
+
+LOGIN_SEC = 0.05
+
+
+class StubDriver:
+    """Spends the time a remote Chrome takes to start and quit"""
+
+    startup = 1.0
+    current_url = "about:blank"
+
+    def __init__(self) -> None:
+        time.sleep(self.startup)
+        self._requests = []
+
+    @property
+    def requests(self) -> list:
+        return self._requests
+
+    @requests.deleter
+    def requests(self):
+        # like seleniumwire, clears the captured traffic
+        self._requests = []
+
+    def get(self, url):
+        time.sleep(0.005)
+
+    def execute_cdp_cmd(self, cmd, args):
+        pass
+
+    def quit(self):
+        time.sleep(self.startup / 10)
+
+
+def login(driver: StubDriver):
+    driver.get("https://accounts.binance.com/en/login")
+    time.sleep(LOGIN_SEC)
+    driver.requests.append("bapi")
+
+
+def fresh_login():
+    driver = StubDriver()
+    try:
+        login(driver)
+    finally:
+        driver.quit()
+
+
+def run(job, logins: int, browsers: int) -> float:
+    ts = time.monotonic()
+    with ThreadPoolExecutor(max_workers=browsers) as executor:
+        list(executor.map(lambda _: job(), range(logins)))
+    return time.monotonic() - ts
+
+
+def main(logins: int, browsers: int, startup: float):
+    StubDriver.startup = startup
+    elapsed = run(fresh_login, logins, browsers)
+    print(f"{'fresh browser':16} {logins} logins: {elapsed:.3f}s")
+
+    pool: BrowserPool[StubDriver] = BrowserPool(StubDriver, size=browsers)
+
+    def pooled_login():
+        with pool.driver() as driver:
+            login(driver)
+
+    pool.warm()
+    elapsed = run(pooled_login, logins, browsers)
+    print(f"{'warm pool':16} {logins} logins: {elapsed:.3f}s")
+    pool.close()
+
+
+if __name__ == "__main__":
+    logins = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    browsers = int(sys.argv[2]) if len(sys.argv) > 2 else 2
+    startup = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+    main(logins, browsers, startup)
@@ -0,0 +1,56 @@
+"""Grid captchas of many users against a local fake 2captcha.
+
+One job at a time, as the blocking client solved them, vs concurrent jobs.
+
+    python benchmarks/bench_captcha_solver.py [jobs] [solve_sec]
+"""
+import asyncio
+import sys
+import time
+from typing import Tuple
+
+from aiohttp import web
+from p2p.infrastructure import TwoCaptchaSolverRepo
+
+
+async def start_fake_solver(solve_time: float) -> Tuple[web.AppRunner, str]:
+    submitted = {}
+
+    async def submit(request: web.Request) -> web.Response:
+        captcha_id = str(len(submitted) + 1)
+        submitted[captcha_id] = time.monotonic()
+        return web.json_response({"status": 1, "request": captcha_id})
+
+    async def result(request: web.Request) -> web.Response:
+        if time.monotonic() - submitted[request.query["id"]] < solve_time:
+            return web.json_response({"status": 0, "request": "CAPCHA_NOT_READY"})
+        return web.json_response({"status": 1, "request": "click:2/4/6"})
+
+    app = web.Application()
+    app.router.add_post("/in.php", submit)
+    app.router.add_get("/res.php", result)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    return runner, f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+
+
+async def main(jobs: int, solve_time: float):
+    runner, url = await start_fake_solver(solve_time)
+    repo = TwoCaptchaSolverRepo("key", base_url=url, poll_interval=solve_time / 5)
+    ts = time.monotonic()
+    for _ in range(jobs):
+        await repo.solve_grid("img")
+    print(f"{'one at a time':14} {jobs} captchas: {time.monotonic() - ts:.3f}s")
+    ts = time.monotonic()
+    await asyncio.gather(*(repo.solve_grid("img") for _ in range(jobs)))
+    print(f"{'concurrent':14} {jobs} captchas: {time.monotonic() - ts:.3f}s")
+    await repo.close()
+    await runner.cleanup()
+
+
+if __name__ == "__main__":
+    jobs = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+    solve_time = float(sys.argv[2]) if len(sys.argv) > 2 else 0.5
+    asyncio.run(main(jobs, solve_time))
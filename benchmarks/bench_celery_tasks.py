@@ -0,0 +1,74 @@
+"""Per-task overhead of the celery tasks: a loop per task vs the worker loop.
+
+Every task reads the database and fetches an orderbook from a local fake
+Binance. With a loop per task the HTTP session and the database pool are
+opened again each time, on the worker loop they stay warm.
+
+    python benchmarks/bench_celery_tasks.py [tasks]
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+from bench_http_transport import make_repo, start_fake_binance
+from loguru import logger
+from p2p.application import Direction
+from p2p.infrastructure import BinanceP2PRepo
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+
+os.environ.setdefault("CAPTCHA_SOLVER_KEY", "bench")
+import p2p.api.celery_main  # noqa: E402,F401  celery_tasks needs the app first
+from p2p.api.celery_tasks import run  # noqa: E402
+
+
+async def task(repo: BinanceP2PRepo, engine: AsyncEngine):
+    async with engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    await repo.get_orderbook(
+        pay_methods=["TinkoffNew"], asset="USDT", fiat="RUB", direction=Direction.SELL
+    )
+
+
+async def release(repo: BinanceP2PRepo, engine: AsyncEngine):
+    await repo.close()
+    await engine.dispose()
+
+
+def loop_per_task(repo: BinanceP2PRepo, engine: AsyncEngine, tasks: int) -> float:
+    ts = time.monotonic()
+    for _ in range(tasks):
+        loop = asyncio.new_event_loop()
+        loop.run_until_complete(task(repo, engine))
+        # the pools can't outlive their loop
+        loop.run_until_complete(release(repo, engine))
+        loop.close()
+    return time.monotonic() - ts
+
+
+def worker_loop(repo: BinanceP2PRepo, engine: AsyncEngine, tasks: int) -> float:
+    run(task(repo, engine))  # the worker warms up before the first task
+    ts = time.monotonic()
+    for _ in range(tasks):
+        run(task(repo, engine))
+    elapsed = time.monotonic() - ts
+    run(release(repo, engine))
+    return elapsed
+
+
+def main(tasks: int):
+    logger.remove()
+    base_url = start_fake_binance(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        dsn = f"sqlite+aiosqlite:///{tmp}/bench.db"
+        for mode in (loop_per_task, worker_loop):
+            repo = make_repo(BinanceP2PRepo, base_url)
+            engine = create_async_engine(dsn)
+            elapsed = mode(repo, engine, tasks)
+            print(f"{mode.__name__:14} {elapsed / tasks * 1000:7.2f} ms/task")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200)
@@ -0,0 +1,118 @@
+"""Concurrent get_orderbook against a local fake Binance: aiohttp vs requests.
+
+    python benchmarks/bench_http_transport.py [concurrency] [latency_sec]
+"""
+import asyncio
+import sys
+import threading
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock
+
+import requests
+from aiohttp import web
+from p2p.application import Direction
+from p2p.infrastructure import BinanceP2PRepo, BinP2PAdapter
+
+ORDERBOOK = Path(__file__).parent.parent / "tests" / "orderbook.json"
+
+
+class NoLock:
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class RequestsBinanceP2PRepo(BinanceP2PRepo):
+    """The blocking transport used before the switch to aiohttp"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._requests = requests.Session()
+        self._requests.headers.update(self.glob_headers)
+
+    async def _send(self, method, url, headers, data=None, cookies=None):
+        if method == "GET":
+            resp = self._requests.get(url, params=data, headers=headers)
+        else:
+            resp = self._requests.post(url, json=data, headers=headers)
+        return resp.status_code, resp.headers, resp.text
+
+
+def start_fake_binance(latency: float) -> str:
+    body = ORDERBOOK.read_text()
+    started = threading.Event()
+    address = {}
+
+    async def search(request: web.Request) -> web.Response:
+        await asyncio.sleep(latency)
+        return web.Response(text=body, content_type="application/json")
+
+    async def serve():
+        app = web.Application()
+        app.router.add_post("/bapi/c2c/v2/friendly/c2c/adv/search", search)
+        runner = web.AppRunner(app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        address["port"] = site._server.sockets[0].getsockname()[1]
+        started.set()
+        await asyncio.Event().wait()
+
+    threading.Thread(target=lambda: asyncio.run(serve()), daemon=True).start()
+    started.wait()
+    return f"http://127.0.0.1:{address['port']}/bapi/c2c/v2"
+
+
+def make_repo(cls, base_url: str) -> BinanceP2PRepo:
+    locker = MagicMock()
+    locker.get_lock = AsyncMock(return_value=NoLock())
+    repo = cls(
+        BinP2PAdapter(),
+        auth_provider=MagicMock(),
+        auth_repo=AsyncMock(),
+        user_repo=AsyncMock(),
+        locker_repo=locker,
+        user_question_repo=AsyncMock(),
+        rate_limiter=AsyncMock(),
+        pay_method_repo=AsyncMock(),
+        metrics_repo=MagicMock(),
+        session_repo=AsyncMock(),
+        circuit_breaker=AsyncMock(**{"check.return_value": False}),
+    )
+    repo.BASE_URL = base_url
+    return repo
+
+
+async def run(repo: BinanceP2PRepo, concurrency: int) -> float:
+    ts = time.monotonic()
+    await asyncio.gather(
+        *(
+            repo.get_orderbook(
+                pay_methods=["TinkoffNew"],
+                asset="USDT",
+                fiat="RUB",
+                direction=Direction.SELL,
+            )
+            for _ in range(concurrency)
+        )
+    )
+    return time.monotonic() - ts
+
+
+async def main(concurrency: int, latency: float):
+    base_url = start_fake_binance(latency)
+    for cls in (RequestsBinanceP2PRepo, BinanceP2PRepo):
+        repo = make_repo(cls, base_url)
+        await run(repo, 1)  # warm up connections
+        elapsed = await run(repo, concurrency)
+        await repo.close()
+        print(f"{cls.__name__:24} {concurrency} calls: {elapsed:.3f}s")
+
+
+if __name__ == "__main__":
+    concurrency = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    latency = float(sys.argv[2]) if len(sys.argv) > 2 else 0.05
+    asyncio.run(main(concurrency, latency))
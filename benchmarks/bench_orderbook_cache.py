@@ -0,0 +1,49 @@
+"""Hot orderbook lookups: Redis only vs the in-process L1 in front of it.
+
+Needs a Redis server, the books are written under the usual keys.
+
+    python benchmarks/bench_orderbook_cache.py [redis_dsn] [lookups]
+"""
+import asyncio
+import json
+import sys
+import time
+from pathlib import Path
+
+from p2p.application import Direction, Exchange, OrderBookKey, Pair
+from p2p.infrastructure import BinP2PAdapter, RedisOrderBookCacheRepo
+
+ORDERBOOK = Path(__file__).parent.parent / "tests" / "orderbook.json"
+
+
+async def lookup(repo: RedisOrderBookCacheRepo, key: OrderBookKey, n: int) -> float:
+    await repo.read(Exchange.BINANCE, key)  # fills the L1
+    ts = time.perf_counter()
+    for _ in range(n):
+        await repo.read(Exchange.BINANCE, key)
+    return (time.perf_counter() - ts) / n
+
+
+async def main(redis_dsn: str, lookups: int):
+    adapter = BinP2PAdapter()
+    data = json.loads(ORDERBOOK.read_text())["data"]
+    orders = [adapter.decode_order_book_entry(ad) for ad in data]
+    key = OrderBookKey(
+        pair=Pair(asset="USDT", fiat="RUB"),
+        pay_methods=("TinkoffNew",),
+        direction=Direction.SELL,
+    )
+    writer = RedisOrderBookCacheRepo(redis_dsn, soft_ttl=600, hard_ttl=600)
+    await writer.put(Exchange.BINANCE, key, orders)
+    for name, l1_size in (("redis", 0), ("l1 + redis", 256)):
+        repo = RedisOrderBookCacheRepo(
+            redis_dsn, soft_ttl=600, hard_ttl=600, l1_size=l1_size
+        )
+        elapsed = await lookup(repo, key, lookups)
+        print(f"{name:12} {len(orders)} orders: {elapsed * 1e6:9.1f} us/lookup")
+
+
+if __name__ == "__main__":
+    dsn = sys.argv[1] if len(sys.argv) > 1 else "redis://localhost:6379/0"
+    n = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    asyncio.run(main(dsn, n))
@@ -0,0 +1,60 @@
+"""Cached orderbook encoding: the former double-encoded JSON vs the columnar one
+
+    python benchmarks/bench_orderbook_codec.py [rounds]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+from p2p.application import Direction, Order, OrderBookKey, Pair
+from p2p.infrastructure import BinP2PAdapter
+from p2p.infrastructure.repository.orderbook_codec import (decode_orderbook,
+                                                           encode_orderbook)
+
+ORDERBOOK = Path(__file__).parent.parent / "tests" / "orderbook.json"
+KEY = OrderBookKey(
+    pair=Pair(asset="USDT", fiat="RUB"),
+    pay_methods=("TinkoffNew",),
+    direction=Direction.SELL,
+)
+
+
+def json_put(fetched_at, orders):
+    prepared = [o.json() for o in orders]
+    return json.dumps({"fetched_at": fetched_at, "orders": prepared}).encode()
+
+
+def json_read(value, key):
+    raw = json.loads(value)
+    return raw["fetched_at"], [Order.parse_raw(r) for r in raw["orders"]]
+
+
+def timeit(func, *args, rounds: int) -> float:
+    ts = time.perf_counter()
+    for _ in range(rounds):
+        func(*args)
+    return (time.perf_counter() - ts) / rounds
+
+
+def main(rounds: int):
+    adapter = BinP2PAdapter()
+    data = json.loads(ORDERBOOK.read_text())["data"]
+    orders = [adapter.decode_order_book_entry(ad) for ad in data]
+    fetched_at = time.time()
+    print(f"{len(orders)} orders, {rounds} rounds")
+    for name, put, read in (
+        ("json", json_put, json_read),
+        ("columnar", encode_orderbook, decode_orderbook),
+    ):
+        value = put(fetched_at, orders)
+        put_time = timeit(put, fetched_at, orders, rounds=rounds)
+        read_time = timeit(read, value, KEY, rounds=rounds)
+        print(
+            f"{name:9} {len(value):6} bytes"
+            f"  put {put_time * 1e6:8.1f} us  read {read_time * 1e6:8.1f} us"
+        )
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -0,0 +1,60 @@
+"""Building the orders of a cached book: validated, trusted and compact
+
+The book of tests/orderbook.json is repeated up to `size` orders. The
+validated run starts from already decoded dicts, the others from the
+encoded book.
+
+    python benchmarks/bench_orderbook_rehydrate.py [size] [rounds]
+"""
+import json
+import sys
+import time
+from pathlib import Path
+
+from p2p.application import Direction, Order, OrderBookKey, Pair
+from p2p.infrastructure import BinP2PAdapter
+from p2p.infrastructure.repository.orderbook_codec import (decode_orderbook,
+                                                           encode_orderbook)
+
+ORDERBOOK = Path(__file__).parent.parent / "tests" / "orderbook.json"
+KEY = OrderBookKey(
+    pair=Pair(asset="USDT", fiat="RUB"),
+    pay_methods=("TinkoffNew",),
+    direction=Direction.SELL,
+)
+
+
+def validated(raw: list):
+    return [Order(**o) for o in raw]
+
+
+def trusted(value: bytes):
+    return decode_orderbook(value, KEY)[1]
+
+
+def compact(value: bytes):
+    orders = decode_orderbook(value, KEY, compact=True)[1]
+    # the picked ones are converted at the response boundary
+    return [o.to_order() for o in orders[:4]]
+
+
+def main(size: int, rounds: int):
+    adapter = BinP2PAdapter()
+    data = json.loads(ORDERBOOK.read_text())["data"]
+    orders = [adapter.decode_order_book_entry(ad) for ad in data]
+    orders = (orders * (size // len(orders) + 1))[:size]
+    value = encode_orderbook(time.time(), orders)
+    raw = [o.dict() for o in trusted(value)]
+    print(f"{size} orders, {rounds} rounds")
+    for func, arg in ((validated, raw), (trusted, value), (compact, value)):
+        ts = time.perf_counter()
+        for _ in range(rounds):
+            func(arg)
+        elapsed = (time.perf_counter() - ts) / rounds
+        print(f"{func.__name__:10} {elapsed * 1e6:8.1f} us/book")
+
+
+if __name__ == "__main__":
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 60
+    rounds = int(sys.argv[2]) if len(sys.argv) > 2 else 1000
+    main(size, rounds)
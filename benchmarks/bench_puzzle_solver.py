@@ -0,0 +1,102 @@
+"""Per-solve time of the jigsaw PuzzleSolver: disk round trips vs in-memory.
+
+No captured captcha is shipped, the puzzle is synthesised at the size of
+Binance's slider images.
+
+    python benchmarks/bench_puzzle_solver.py [solves]
+"""
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import cv2
+import numpy as np
+from p2p.infrastructure.repository.puzzle import (PIXELS_EXTENSION,
+                                                  PuzzleSolver)
+
+GAP_X = 180
+
+
+def make_puzzle(width: int = 310, height: int = 155, size: int = 45):
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    background = cv2.resize(noise, (width, height), interpolation=cv2.INTER_CUBIC)
+    piece = np.zeros((height, 60, 3), dtype=np.uint8)
+    cut = background[50 : 50 + size, GAP_X : GAP_X + size]
+    piece[50 : 50 + size, 5 : 5 + size] = cut
+    cv2.rectangle(background, (GAP_X, 50), (GAP_X + size, 50 + size), (255,) * 3, 2)
+    return piece, background
+
+
+class DiskPuzzleSolver:
+    """The solver before the in-memory pipeline: loops and /tmp files"""
+
+    def __init__(self, piece_path, background_path, tmp_path):
+        self.piece_path = piece_path
+        self.background_path = background_path
+        self.tmp_path = tmp_path
+
+    def get_position(self):
+        img = self.sobel(cv2.imread(self.piece_path, cv2.IMREAD_COLOR))
+        white_rows, white_columns = [], []
+        r, c = img.shape
+        for row in range(r):
+            for x in img[row, :]:
+                if x != 0:
+                    white_rows.append(row)
+        for column in range(c):
+            for x in img[:, column]:
+                if x != 0:
+                    white_columns.append(column)
+        x, w = white_columns[0], white_columns[-1]
+        y, h = white_rows[0], white_rows[-1]
+        template = self.grayscale(self.extend(img[y:h, x:w], both=True))
+        background = self.sobel(cv2.imread(self.background_path, cv2.IMREAD_COLOR))
+        background = self.grayscale(self.extend(background[y:h, :], both=False))
+        res = cv2.matchTemplate(background, template, cv2.TM_CCOEFF_NORMED)
+        return cv2.minMaxLoc(res)[3][0] + PIXELS_EXTENSION - x
+
+    @staticmethod
+    def extend(img, both: bool):
+        if both:
+            border = np.zeros((img.shape[0], PIXELS_EXTENSION), dtype=int)
+            img = np.hstack((border, img, border))
+        border = np.zeros((PIXELS_EXTENSION, img.shape[1]), dtype=int)
+        return np.vstack((border, img, border))
+
+    @staticmethod
+    def sobel(img):
+        gray = cv2.cvtColor(cv2.GaussianBlur(img, (3, 3), 0), cv2.COLOR_BGR2GRAY)
+        grad_x = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 1, 0, ksize=3))
+        grad_y = cv2.convertScaleAbs(cv2.Sobel(gray, cv2.CV_16S, 0, 1, ksize=3))
+        return cv2.addWeighted(grad_x, 0.5, grad_y, 0.5, 0)
+
+    def grayscale(self, img):
+        cv2.imwrite(self.tmp_path, img.astype(np.uint8))
+        return cv2.imread(self.tmp_path, 0)
+
+
+def timeit(solve, solves: int) -> float:
+    ts = time.monotonic()
+    for _ in range(solves):
+        solve()
+    return (time.monotonic() - ts) / solves
+
+
+def main(solves: int):
+    piece, background = make_puzzle()
+    with tempfile.TemporaryDirectory() as tmp:
+        piece_path, background_path = f"{tmp}/diff.png", f"{tmp}/wide.png"
+        cv2.imwrite(piece_path, piece)
+        cv2.imwrite(background_path, background)
+        disk = DiskPuzzleSolver(piece_path, background_path, str(Path(tmp, "s.png")))
+        elapsed = timeit(disk.get_position, solves)
+        print(f"{'disk + loops':12} {elapsed * 1000:.2f}ms, {disk.get_position()}")
+    memory = PuzzleSolver(piece, background)
+    elapsed = timeit(memory.get_position, solves)
+    print(f"{'in memory':12} {elapsed * 1000:.2f}ms, {memory.get_position()}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 50)
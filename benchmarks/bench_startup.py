@@ -0,0 +1,72 @@
+"""Cold start of the entry points: import time and RSS, `-X importtime` style.
+
+Every entry point is imported in a fresh interpreter. The "+auth" rows also
+import the authenticator, which is what every process paid before it became
+lazy.
+
+    python benchmarks/bench_startup.py [runs] [top]
+"""
+import os
+import re
+import subprocess
+import sys
+from statistics import median
+from typing import Dict, List, Tuple
+
+ENTRY_POINTS = ["p2p.api_main", "p2p.bot_main", "p2p.api.celery_main"]
+AUTH_MODULE = "p2p.infrastructure.repository.bin_auth"
+
+PROBE = (
+    "import resource, sys\n"
+    "for name in sys.argv[1:]:\n"
+    "    __import__(name)\n"
+    "print('maxrss', resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+)
+IMPORTTIME = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+
+def probe(modules: List[str]) -> Tuple[Dict[str, Tuple[int, int]], int]:
+    """Returns {module: (self_us, cumulative_us)} and the max RSS in KiB"""
+    env = dict(os.environ)
+    env.setdefault("CAPTCHA_SOLVER_KEY", "bench")
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, *modules],
+        capture_output=True,
+        text=True,
+        env=env,
+        check=True,
+    )
+    times = {}
+    for line in proc.stderr.splitlines():
+        match = IMPORTTIME.match(line)
+        if match:
+            self_us, cumulative, _, name = match.groups()
+            times[name] = (int(self_us), int(cumulative))
+    maxrss = int(proc.stdout.split("maxrss")[-1])
+    return times, maxrss
+
+
+def total(times: Dict[str, Tuple[int, int]], modules: List[str]) -> int:
+    return sum(times[name][1] for name in modules if name in times)
+
+
+def main(runs: int, top: int):
+    print(f"{'entry point':32} {'import ms':>10} {'RSS MiB':>8}")
+    for entry in ENTRY_POINTS:
+        lazy = None
+        for modules in ([entry], [entry, AUTH_MODULE]):
+            samples = [probe(modules) for _ in range(runs)]
+            lazy = lazy or samples[0][0]
+            import_ms = median(total(t, modules) for t, _ in samples) / 1000
+            rss = median(rss for _, rss in samples) / 1024
+            label = entry if len(modules) == 1 else f"{entry} +auth"
+            print(f"{label:32} {import_ms:10.1f} {rss:8.1f}")
+        slowest = sorted(lazy.items(), key=lambda i: -i[1][0])[:top]
+        for name, (self_us, _) in slowest:
+            print(f"    {name:40} {self_us / 1000:8.1f} ms self")
+
+
+if __name__ == "__main__":
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+    main(runs, top)
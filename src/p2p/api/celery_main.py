@@ -14,5 +14,15 @@ app.conf.beat_schedule = {
         "task": "p2p.api.celery_tasks.new_order",
         "schedule": wiring.celery_settings.new_offer_poll_interval,
     },
+    "renew-sessions": {
+        "task": "p2p.api.celery_tasks.renew_sessions",
+        "schedule": wiring.celery_settings.session_renew_interval,
+        # only picks the users, a late tick is superseded by the next one
+        "options": {"expires": wiring.celery_settings.session_renew_interval},
+    },
+}
+# logins take minutes, they must not hold up the convoy workers
+app.conf.task_routes = {
+    "p2p.api.celery_tasks.authenticate": {"queue": wiring.celery_settings.auth_queue},
 }
 container = wiring()
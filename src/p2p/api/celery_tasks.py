@@ -1,24 +1,31 @@
 import asyncio
-from typing import Dict
+from typing import Awaitable, Dict, List, Optional, TypeVar
 
+from celery.exceptions import MaxRetriesExceededError
+from celery.signals import worker_process_init, worker_process_shutdown
 from dependency_injector.wiring import Provide, inject
 from loguru import logger
-from p2p.application import IncrementRepo
-from p2p.application.foundation import Exchange
 from p2p.wiring import Container as wiring
 from pydantic.main import BaseModel
+from sqlalchemy.ext.asyncio import AsyncEngine
 
-from ..application.foundation import UserInteractionEnum
-from ..application.repository.intention_repo import IntentionRepo
-from ..application.repository.orderbook_cache_repo import OrderBookCacheRepo
+from ..application.foundation import Exchange, UserInteractionEnum
+from ..application.repository.metrics_repo import MetricsRepo
 from ..application.repository.p2p_repo import P2POrderRepo
 from ..application.repository.queue_repo import QueueRepo
+from ..application.repository.session_repo import SessionRepo
 from ..application.use_case.check_new_offers import CheckNewOffersUseCase
-from ..application.use_case.collect_info import CollectInfoUseCase
 from ..application.use_case.convoy_order import ConvoyOrderUseCase
 from ..application.use_case.place_order import PlaceOrderUseCase
+from ..application.use_case.renew_sessions import RenewSessionsUseCase
 from .celery_main import app as celery_app
 
+T = TypeVar("T")
+
+# redis, sqlalchemy and aiohttp pools are bound to the loop they were opened
+# on, so a worker process runs every task on the same one
+_loop: Optional[asyncio.AbstractEventLoop] = None
+
 
 class AdsInfo(BaseModel):
     user_id: str
@@ -26,91 +33,196 @@ class AdsInfo(BaseModel):
     settings: Dict
 
 
-def get_loop():
-    asyncio.get_event_loop()
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+    if _loop is None or _loop.is_closed():
+        _loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(_loop)
+    return _loop
+
+
+def run(aw: Awaitable[T]) -> T:
+    return get_loop().run_until_complete(aw)
+
+
+@inject
+async def open_pools(db_engine: AsyncEngine = Provide[wiring.db_engine]):
+    async with db_engine.connect():
+        pass
+
+
+@inject
+async def close_pools(
+    db_engine: AsyncEngine = Provide[wiring.db_engine],
+    p2p_repo: P2POrderRepo = Provide[wiring.p2p_repo],
+    metrics_repo: MetricsRepo = Provide[wiring.metrics_repo],
+):
+    await metrics_repo.flush()
+    await p2p_repo.close()
+    await db_engine.dispose()
+
+
+@worker_process_init.connect
+def init_worker(**kwargs):
+    try:
+        run(open_pools())
+    except Exception as ex:
+        # the first task opens them then
+        logger.warning(f"worker warm up failed: {ex}")
+
+
+@worker_process_shutdown.connect
+def shutdown_worker(**kwargs):
+    if _loop is None or _loop.is_closed():
+        return
+    try:
+        run(close_pools())
+    except Exception as ex:
+        logger.warning(f"worker shutdown failed: {ex}")
+    finally:
+        _loop.close()
+
+
+@inject
+async def request_auth(
+    user_ids: List[str],
+    session_repo: SessionRepo = Provide[wiring.session_repo],
+):
+    """Leave the logins to the auth workers, one queued task per user"""
+    expires = wiring.celery_settings.auth_task_expires
+    for user_id in user_ids:
+        # held until the task has run or has expired unrun
+        if await session_repo.claim_login(Exchange.BINANCE, user_id, expires):
+            authenticate.apply_async(args=(user_id,), expires=expires)
 
 
 @inject
 async def place_order(
     ads_info: AdsInfo,
-    intent_repo: IntentionRepo = Provide[wiring.intent_repo],
-    p2p_repo: P2POrderRepo = Provide[wiring.p2p_repo],
-    ob_cache: OrderBookCacheRepo = Provide[wiring.orderbook_cache_repo],
+    place_order_uc: PlaceOrderUseCase = Provide[wiring.place_order_uc],
     question_repo: QueueRepo = Provide[wiring.question_queue_repo],
-):
-    collect_info_uc = CollectInfoUseCase(
-        p2p_repo=p2p_repo, ob_cache=ob_cache, exchange=Exchange.BINANCE
-    )
-    place_order_uc = PlaceOrderUseCase(
-        intent_repo=intent_repo, collect_info_uc=collect_info_uc, p2p_repo=p2p_repo
-    )
+    metrics_repo: MetricsRepo = Provide[wiring.metrics_repo],
+) -> bool:
     try:
-        await place_order_uc.execute(ads_info.user_id)
+        placed = await place_order_uc.execute(ads_info.user_id)
     except Exception as ex:
         logger.error(ex)
         await question_repo.put_notification(
             ads_info.user_id, UserInteractionEnum.GENERIC_ERROR
         )
         raise
+    finally:
+        await metrics_repo.flush()
+    if placed:
+        await question_repo.put_notification(
+            ads_info.user_id, notification=UserInteractionEnum.ADS_PUBLISHED
+        )
+    return placed
+
+
+@inject
+async def fail_order(
+    ads_info: AdsInfo,
+    place_order_uc: PlaceOrderUseCase = Provide[wiring.place_order_uc],
+    question_repo: QueueRepo = Provide[wiring.question_queue_repo],
+):
+    await place_order_uc.fail(ads_info.user_id)
     await question_repo.put_notification(
-        ads_info.user_id, notification=UserInteractionEnum.ADS_PUBLISHED
+        ads_info.user_id, UserInteractionEnum.GENERIC_ERROR
     )
 
 
 @inject
 async def convoy_orders(
-    intent_repo: IntentionRepo = Provide[wiring.intent_repo],
-    p2p_repo: P2POrderRepo = Provide[wiring.p2p_repo],
-    ob_cache: OrderBookCacheRepo = Provide[wiring.orderbook_cache_repo],
+    convoy_orders_uc: ConvoyOrderUseCase = Provide[wiring.convoy_order_uc],
+    metrics_repo: MetricsRepo = Provide[wiring.metrics_repo],
 ):
-    collect_info_uc = CollectInfoUseCase(
-        p2p_repo=p2p_repo, ob_cache=ob_cache, exchange=Exchange.BINANCE
-    )
-    convoy_orders_uc = ConvoyOrderUseCase(
-        intent_repo=intent_repo, collect_info_uc=collect_info_uc, p2p_repo=p2p_repo
-    )
     try:
-        await convoy_orders_uc.execute()
+        await request_auth(await convoy_orders_uc.execute())
     except Exception as ex:
         logger.error(ex)
         raise
+    finally:
+        await metrics_repo.flush()
 
 
 @inject
 async def check_new_orders(
-    p2p_repo: P2POrderRepo = Provide[wiring.p2p_repo],
-    notification_repo: QueueRepo = Provide[wiring.question_queue_repo],
-    increment_repo: IncrementRepo = Provide[wiring.orderbook_cache_repo],
-    intent_repo: IntentionRepo = Provide[wiring.intent_repo],
+    uc: CheckNewOffersUseCase = Provide[wiring.check_new_offers_uc],
+    metrics_repo: MetricsRepo = Provide[wiring.metrics_repo],
 ):
-    uc = CheckNewOffersUseCase(
-        p2p_repo=p2p_repo,
-        notification_repo=notification_repo,
-        inc_repo=increment_repo,
-        intent_repo=intent_repo,
-    )
     try:
-        await uc.execute()
+        await request_auth(await uc.execute())
     except Exception as ex:
         logger.error(ex)
         raise
+    finally:
+        await metrics_repo.flush()
 
 
-@celery_app.task()
+@inject
+async def renew_user_sessions(
+    uc: RenewSessionsUseCase = Provide[wiring.renew_sessions_uc],
+    metrics_repo: MetricsRepo = Provide[wiring.metrics_repo],
+):
+    try:
+        await request_auth(await uc.execute())
+    except Exception as ex:
+        logger.error(ex)
+        raise
+    finally:
+        await metrics_repo.flush()
+
+
+@inject
+async def authenticate_user(
+    user_id: str,
+    uc: RenewSessionsUseCase = Provide[wiring.renew_sessions_uc],
+    session_repo: SessionRepo = Provide[wiring.session_repo],
+    metrics_repo: MetricsRepo = Provide[wiring.metrics_repo],
+):
+    try:
+        await uc.renew(user_id)
+    except Exception as ex:
+        logger.error(ex)
+        raise
+    finally:
+        await session_repo.release_login(Exchange.BINANCE, user_id)
+        await metrics_repo.flush()
+
+
+@celery_app.task(bind=True, max_retries=wiring.celery_settings.publish_auth_retries)
 def publish_ads(
+    self,
     ads_info: dict,
 ):
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(place_order(ads_info=AdsInfo(**ads_info)))
+    info = AdsInfo(**ads_info)
+    if run(place_order(ads_info=info)):
+        return
+    # placed again once the auth worker has logged the user in
+    run(request_auth([info.user_id]))
+    try:
+        raise self.retry(countdown=wiring.celery_settings.publish_auth_retry_delay)
+    except MaxRetriesExceededError:
+        run(fail_order(ads_info=info))
+        raise
 
 
 @celery_app.task()
 def convoy_ads():
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(convoy_orders())
+    run(convoy_orders())
 
 
 @celery_app.task()
 def new_order():
-    loop = asyncio.get_event_loop()
-    loop.run_until_complete(check_new_orders())
+    run(check_new_orders())
+
+
+@celery_app.task()
+def renew_sessions():
+    run(renew_user_sessions())
+
+
+@celery_app.task()
+def authenticate(user_id: str):
+    run(authenticate_user(user_id))
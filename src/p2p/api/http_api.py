@@ -1,4 +1,4 @@
-from typing import List
+from typing import Dict, List
 
 from dependency_injector.wiring import Provide, inject
 from fastapi import APIRouter, Depends, status
@@ -7,6 +7,7 @@ from p2p.wiring import Container as wiring
 
 from ..application.domain.common import Advertisement, PeerOffer
 from ..application.repository.intention_repo import IntentionRepo
+from ..application.repository.metrics_repo import MetricsRepo
 from ..application.repository.p2p_repo import P2POrderRepo
 
 router = APIRouter()
@@ -54,3 +55,12 @@ async def get_my_offers(
     user_id: str, p2p_repo: P2POrderRepo = Depends(Provide[wiring.p2p_repo])
 ):
     return await p2p_repo.get_my_offer(user_id)
+
+
+@router.get("/metrics", response_model=Dict[str, float])
+@inject
+async def get_metrics(
+    metrics_repo: MetricsRepo = Depends(Provide[wiring.metrics_repo]),
+):
+    await metrics_repo.flush()
+    return await metrics_repo.read()
@@ -1,26 +1,37 @@
 from .adapter.p2p_adapter import P2PAdapter
 from .domain.bot import AdsData, UserData, UserProfile, UserSettings
-from .domain.common import Advertisement, Maker, Order, Pair, PeerOffer
+from .domain.common import (Advertisement, CompactOrder, Maker, Order,
+                            OrderBookKey, OrderBookSnapshot, Pair, PeerOffer)
 from .domain.user import User, UserNotification, UserQuestion
 from .foundation import (AdsFlow, Balance, Currency, DBId, Direction, Exchange,
                          OrderStatus, PaymentMethod, UserAction,
                          UserInteractionEnum)
 from .repository.auth_repo import AuthRepo
+from .repository.captcha_cache_repo import CachedSolution, CaptchaCacheRepo
+from .repository.captcha_solver_repo import CaptchaSolverRepo, GridSolution
+from .repository.circuit_breaker_repo import CircuitBreakerRepo
+from .repository.convoy_schedule_repo import ConvoyScheduleRepo
 from .repository.inc_repo import IncrementRepo
 from .repository.intention_repo import IntentionRepo
 from .repository.locker_repo import LockerRepo
 from .repository.market_repo import MarketDataRepo
 from .repository.merch_info_repo import MerchMediatorRepo
+from .repository.metrics_repo import MetricsRepo
 from .repository.orderbook_cache_repo import OrderBookCacheRepo
 from .repository.p2p_repo import P2POrderRepo
+from .repository.pay_method_repo import PayMethodRepo
 from .repository.private_data_repo import PrivateDataRepo
 from .repository.queue_repo import QueueRepo
+from .repository.rate_limiter_repo import RateLimiterRepo
+from .repository.session_repo import SessionRepo
 from .repository.user_repo import UserRepo
 from .repository.userdata_repo import UserDataRepo
 from .use_case.check_new_offers import CheckNewOffersUseCase
 from .use_case.collect_info import CollectInfoUseCase
+from .use_case.convoy_order import ConvoyOrderUseCase
 from .use_case.get_balance import GetBalanceUseCase
 from .use_case.place_order import PlaceOrderUseCase
+from .use_case.renew_sessions import RenewSessionsUseCase
 
 __all__ = [
     "P2POrderRepo",
@@ -28,6 +39,7 @@ __all__ = [
     "PaymentMethod",
     "Maker",
     "Order",
+    "CompactOrder",
     "P2PAdapter",
     "Advertisement",
     "OrderStatus",
@@ -62,4 +74,18 @@ __all__ = [
     "UserDataRepo",
     "UserProfile",
     "AdsData",
+    "RateLimiterRepo",
+    "CircuitBreakerRepo",
+    "MetricsRepo",
+    "PayMethodRepo",
+    "SessionRepo",
+    "CaptchaSolverRepo",
+    "GridSolution",
+    "CaptchaCacheRepo",
+    "CachedSolution",
+    "ConvoyScheduleRepo",
+    "OrderBookKey",
+    "OrderBookSnapshot",
+    "ConvoyOrderUseCase",
+    "RenewSessionsUseCase",
 ]
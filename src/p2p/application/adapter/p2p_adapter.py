@@ -1,9 +1,9 @@
 import abc
 from decimal import Decimal
-from typing import Tuple
+from typing import Dict, Tuple
 
 from ..domain.common import Advertisement, Order, PeerOffer
-from ..foundation import Currency, PaymentMethod
+from ..foundation import Currency, Direction, PaymentMethod
 
 
 class P2PAdapter(metaclass=abc.ABCMeta):
@@ -32,11 +32,15 @@ class P2PAdapter(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def serialize_ads_update(self, ads: Advertisement) -> dict:
+    def serialize_ads_update(
+        self, ads: Advertisement, pay_methods: Dict[PaymentMethod, dict]
+    ) -> dict:
         pass
 
     @abc.abstractmethod
-    def serialize_ads_create(self, ads: Advertisement) -> dict:
+    def serialize_ads_create(
+        self, ads: Advertisement, pay_methods: Dict[PaymentMethod, dict]
+    ) -> dict:
         pass
 
     @abc.abstractmethod
@@ -44,5 +48,10 @@ class P2PAdapter(metaclass=abc.ABCMeta):
         pass
 
     @abc.abstractmethod
-    def serialise_payment_method(self, method: PaymentMethod) -> dict:
+    def serialise_payment_method(
+        self,
+        method: PaymentMethod,
+        direction: Direction,
+        pay_methods: Dict[PaymentMethod, dict],
+    ) -> dict:
         pass
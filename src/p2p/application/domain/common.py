@@ -1,8 +1,8 @@
-from datetime import datetime, timedelta
+from datetime import datetime
 from decimal import Decimal
 from typing import Any, Dict, List, Optional, Tuple
 
-from pydantic import BaseModel
+from pydantic import BaseModel, validator
 from pydantic.fields import Field
 
 from ..foundation import Currency, Direction, PaymentMethod
@@ -59,6 +59,68 @@ class Order(TradeConditions):
         return f"{self.direction}, {self.min_amount}-{self.max_amount}@{self.price} by {self.maker.visible_name}"
 
 
+class CompactOrder:
+    """Slotted order read back from the cache, for the pricing hot path
+
+    Has what extract_info_from_orders and calculate_price read, the
+    pydantic Order is built by `to_order` for the few ones picked.
+    """
+
+    __slots__ = (
+        "payment_methods",
+        "direction",
+        "asset",
+        "fiat",
+        "price",
+        "min_amount",
+        "max_amount",
+        "digits",
+        "maker",
+    )
+
+    def __init__(
+        self,
+        payment_methods: List[PaymentMethod],
+        direction: Direction,
+        asset: Currency,
+        fiat: Currency,
+        price: Decimal,
+        min_amount: Decimal,
+        max_amount: Decimal,
+        digits: int,
+        maker: Maker,
+    ) -> None:
+        self.payment_methods = payment_methods
+        self.direction = direction
+        self.asset = asset
+        self.fiat = fiat
+        self.price = price
+        self.min_amount = min_amount
+        self.max_amount = max_amount
+        self.digits = digits
+        self.maker = maker
+
+    def __str__(self) -> str:
+        return (
+            f"{self.direction}, {self.min_amount}-{self.max_amount}@{self.price}"
+            f" by {self.maker.visible_name}"
+        )
+
+    def to_order(self) -> Order:
+        """The values were validated before being cached, they're trusted"""
+        return Order.construct(
+            payment_methods=list(self.payment_methods),
+            direction=self.direction,
+            asset=self.asset,
+            fiat=self.fiat,
+            price=self.price,
+            min_amount=self.min_amount,
+            max_amount=self.max_amount,
+            digits=self.digits,
+            maker=self.maker,
+        )
+
+
 class Advertisement(TradeConditions):
     price_type: int = 1
     auto_reply: Optional[str] = ""
@@ -93,16 +155,43 @@ class Pair(BaseModel):
         return False
 
 
+class OrderBookKey(BaseModel):
+    """One side of the book as it's requested from the exchange"""
+
+    pair: Pair
+    pay_methods: Tuple[PaymentMethod, ...]
+    direction: Direction
+
+    class Config:
+        frozen = True
+
+    @validator("pay_methods")
+    def sort_pay_methods(cls, v):
+        return tuple(sorted(set(v)))
+
+    def __str__(self):
+        return f"{self.pair}:{'+'.join(self.pay_methods)}:{self.direction.value}"
+
+    @property
+    def key_class(self) -> str:
+        """Pair and side, a bounded label for metrics
+
+        The pairs are the ones the ads trade, the pay method combinations
+        aren't bounded.
+        """
+        return f"{self.pair}:{self.direction.value}"
+
+
+class OrderBookSnapshot(BaseModel):
+    orders: List[Order]  # or CompactOrder, built by the cache repo
+    age: float  # seconds since it was fetched
+    stale: bool = False  # past the soft ttl, a refresh is due
+
+
 class CollectInfoResponse(BaseModel):
     best_ask: Order
     best_bid: Order
     sell_competitor: Order
     buy_competitor: Order
+    orderbook_age: float = 0  # of the older side
 
-
-class ConvoyAdaptiveInterval(BaseModel):
-    history: List[datetime]
-    current: timedelta = timedelta(seconds=10)
-
-
-INTERVAL_TRACKER: Dict[str, ConvoyAdaptiveInterval] = {}
@@ -1,4 +1,5 @@
 import abc
+from datetime import datetime
 
 
 class AuthRepo(metaclass=abc.ABCMeta):
@@ -9,3 +10,8 @@ class AuthRepo(metaclass=abc.ABCMeta):
     @abc.abstractmethod
     async def read(self, uuid: str) -> dict:
         pass
+
+    @abc.abstractmethod
+    async def updated_at(self, uuid: str) -> datetime:
+        """UTC time the auth data was saved at"""
+        pass
@@ -0,0 +1,29 @@
+import abc
+
+from pydantic import BaseModel
+
+
+class CachedSolution(BaseModel):
+    solution: str
+    elapsed: float  # seconds the solver took
+    successes: int = 0
+
+
+class CaptchaCacheRepo(metaclass=abc.ABCMeta):
+    """Past captcha solutions by a perceptual hash of the challenge"""
+
+    class NotFound(Exception):
+        pass
+
+    @abc.abstractmethod
+    async def get(self, kind: str, key: str) -> CachedSolution:
+        pass
+
+    @abc.abstractmethod
+    async def put(self, kind: str, key: str, solution: str, elapsed: float):
+        pass
+
+    @abc.abstractmethod
+    async def record(self, kind: str, key: str, success: bool):
+        """Account the outcome, a rejected solution is forgotten"""
+        pass
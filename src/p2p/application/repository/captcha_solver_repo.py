@@ -0,0 +1,29 @@
+import abc
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+
+class GridSolution(BaseModel):
+    captcha_id: str
+    cells: List[int]  # 1-based, row by row
+
+
+class CaptchaSolverRepo(metaclass=abc.ABCMeta):
+    class SolveFailed(Exception):
+        pass
+
+    @abc.abstractmethod
+    async def solve_grid(
+        self,
+        image: str,
+        rows: int = 3,
+        cols: int = 3,
+        timeout: Optional[float] = None,
+    ) -> GridSolution:
+        """Cells to click on a base64 encoded grid captcha"""
+        pass
+
+    @abc.abstractmethod
+    async def report(self, captcha_id: str, correct: bool):
+        pass
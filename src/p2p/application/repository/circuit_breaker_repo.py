@@ -0,0 +1,27 @@
+import abc
+from typing import Optional
+
+from ..foundation import Exchange
+
+
+class CircuitBreakerRepo(metaclass=abc.ABCMeta):
+    class Open(Exception):
+        def __init__(self, name: str, retry_after: float) -> None:
+            super().__init__(f"{name} is open for {retry_after:.1f}s")
+            self.retry_after = retry_after
+
+    @abc.abstractmethod
+    async def check(self, exchange: Exchange, name: str) -> bool:
+        """Raise Open while `name` backs off, return True for a probe call"""
+        pass
+
+    @abc.abstractmethod
+    async def record_success(self, exchange: Exchange, name: str):
+        pass
+
+    @abc.abstractmethod
+    async def record_failure(
+        self, exchange: Exchange, name: str, retry_after: Optional[float] = None
+    ) -> float:
+        """Open `name` and return the back off delay"""
+        pass
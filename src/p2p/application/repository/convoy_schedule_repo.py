@@ -0,0 +1,27 @@
+import abc
+from typing import Iterable, List
+
+from ..foundation import Exchange
+
+
+class ConvoyScheduleRepo(metaclass=abc.ABCMeta):
+    """When every user's ads are convoyed next, shared by all the workers"""
+
+    @abc.abstractmethod
+    async def pop_due(self, exchange: Exchange, user_ids: Iterable[str]) -> List[str]:
+        """Claim the due users among `user_ids`
+
+        Users seen for the first time are scheduled, the ones not listed
+        anymore are forgotten. A claimed user is due again after a while
+        unless `record` reschedules it.
+        """
+        pass
+
+    @abc.abstractmethod
+    async def record(self, exchange: Exchange, user_id: str, changed: bool) -> float:
+        """Schedule the next convoy, returns the interval in seconds
+
+        The interval backs off while the price holds and is reset once
+        it changes.
+        """
+        pass
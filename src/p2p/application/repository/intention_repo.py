@@ -15,6 +15,17 @@ class IntentionRepo(metaclass=abc.ABCMeta):
     ) -> List[Tuple[int, dict, dict]]:
         pass
 
+    @abc.abstractmethod
+    async def read_by_user(
+        self, status: AdsFlow
+    ) -> Dict[str, List[Tuple[int, dict, dict]]]:
+        """Intents with the status, keyed by the settings' user_id
+
+        That's the presentation id P2POrderRepo takes, not the exchange
+        login the intents are saved under.
+        """
+        pass
+
     @abc.abstractmethod
     async def set_status(self, intention_id: int, value: AdsFlow):
         pass
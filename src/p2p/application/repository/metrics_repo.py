@@ -0,0 +1,21 @@
+import abc
+from typing import Dict
+
+
+class MetricsRepo(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    def incr(self, name: str, value: float = 1):
+        pass
+
+    @abc.abstractmethod
+    def set(self, name: str, value: float):
+        pass
+
+    @abc.abstractmethod
+    async def flush(self):
+        """Publish values accumulated by this process"""
+        pass
+
+    @abc.abstractmethod
+    async def read(self) -> Dict[str, float]:
+        pass
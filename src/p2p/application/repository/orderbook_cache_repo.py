@@ -1,18 +1,33 @@
 import abc
 from typing import List
 
-from ..domain.common import Order, Pair
+from ..domain.common import Order, OrderBookKey, OrderBookSnapshot
 from ..foundation import Exchange
 
 
 class OrderBookCacheRepo(metaclass=abc.ABCMeta):
+    """Every side of the book is cached and expires on its own
+
+    A side past the soft ttl is still read, marked stale, so it's served
+    while it's refreshed. Past the hard ttl it's gone.
+    """
+
     class NotFound(Exception):
         pass
 
     @abc.abstractmethod
-    async def put(self, exchange: Exchange, pair: Pair, orders: List[Order]):
+    async def put(self, exchange: Exchange, key: OrderBookKey, orders: List[Order]):
+        pass
+
+    @abc.abstractmethod
+    async def read(self, exchange: Exchange, key: OrderBookKey) -> OrderBookSnapshot:
+        pass
+
+    @abc.abstractmethod
+    async def claim_fetch(self, exchange: Exchange, key: OrderBookKey) -> bool:
+        """Mark the side as being fetched, False if someone else does it"""
         pass
 
     @abc.abstractmethod
-    async def read(self, exchange: Exchange, pair: Pair) -> List[dict]:
+    async def release_fetch(self, exchange: Exchange, key: OrderBookKey):
         pass
@@ -1,4 +1,5 @@
 import abc
+from datetime import timedelta
 from enum import IntEnum
 from typing import List, Optional
 
@@ -11,6 +12,9 @@ class P2POrderRepo(metaclass=abc.ABCMeta):
     class AuthFailed(Exception):
         pass
 
+    class Unavailable(Exception):
+        pass
+
     class URL(IntEnum):
         ORDERBOOK = 1
         CREATE = 2
@@ -23,6 +27,9 @@ class P2POrderRepo(metaclass=abc.ABCMeta):
     def __init__(self, adapter: P2PAdapter) -> None:
         self._adapter = adapter
 
+    async def close(self):
+        """Release the connections, they are reopened on the next call"""
+
     @abc.abstractmethod
     async def update_order(self, user_id: str, ads: Advertisement):
         pass
@@ -58,6 +65,16 @@ class P2POrderRepo(metaclass=abc.ABCMeta):
     # ) -> List[Order]:
     #     pass
 
+    @abc.abstractmethod
+    async def session_age(self, user_id: str) -> Optional[timedelta]:
+        """Age of the stored session, None if the user has never logged in"""
+        pass
+
+    @abc.abstractmethod
+    async def renew_session(self, user_id: str):
+        """Log in anew, may take minutes"""
+        pass
+
     @abc.abstractmethod
     async def get_payment_methods(self, user_id: str) -> List[str]:
         pass
@@ -0,0 +1,23 @@
+import abc
+from typing import Dict
+
+from ..foundation import Exchange, PaymentMethod
+
+
+class PayMethodRepo(metaclass=abc.ABCMeta):
+    class NotFound(Exception):
+        pass
+
+    @abc.abstractmethod
+    async def get(self, exchange: Exchange, user_id: str) -> Dict[PaymentMethod, dict]:
+        pass
+
+    @abc.abstractmethod
+    async def put(
+        self, exchange: Exchange, user_id: str, methods: Dict[PaymentMethod, dict]
+    ):
+        pass
+
+    @abc.abstractmethod
+    async def invalidate(self, exchange: Exchange, user_id: str):
+        pass
@@ -0,0 +1,10 @@
+import abc
+
+from ..foundation import Exchange
+
+
+class RateLimiterRepo(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def acquire(self, exchange: Exchange, name: str, weight: int = 1):
+        """Wait until the `name` budget allows a request of `weight`"""
+        pass
@@ -0,0 +1,46 @@
+import abc
+from typing import List, Optional
+
+from ..foundation import Exchange
+
+
+class SessionRepo(metaclass=abc.ABCMeta):
+    @abc.abstractmethod
+    async def record_lifetime(
+        self, exchange: Exchange, seconds: float, lower_bound: bool = False
+    ):
+        """Account the age a session was rejected at
+
+        With `lower_bound` the session was still valid at that age, the
+        expected lifetime may only grow from it.
+        """
+        pass
+
+    @abc.abstractmethod
+    async def expected_lifetime(self, exchange: Exchange) -> Optional[float]:
+        pass
+
+    @abc.abstractmethod
+    async def mark_expired(self, exchange: Exchange, user_id: str):
+        pass
+
+    @abc.abstractmethod
+    async def is_expired(self, exchange: Exchange, user_id: str) -> bool:
+        pass
+
+    @abc.abstractmethod
+    async def expired(self, exchange: Exchange) -> List[str]:
+        pass
+
+    @abc.abstractmethod
+    async def clear_expired(self, exchange: Exchange, user_id: str):
+        pass
+
+    @abc.abstractmethod
+    async def claim_login(self, exchange: Exchange, user_id: str, ttl: int) -> bool:
+        """False while a login of the user is requested, for `ttl` at most"""
+        pass
+
+    @abc.abstractmethod
+    async def release_login(self, exchange: Exchange, user_id: str):
+        pass
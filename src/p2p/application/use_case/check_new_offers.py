@@ -1,4 +1,4 @@
-import itertools as it
+from typing import List
 
 from loguru import logger
 
@@ -22,23 +22,34 @@ class CheckNewOffersUseCase:
         self._notification_repo = notification_repo
         self._inc_repo = inc_repo
 
-    async def execute(self):
+    async def execute(self) -> List[str]:
+        """Returns the users that have to log in"""
         try:
-            ads = await self._intent_repo.read_with_status(status=AdsFlow.PLACED)
+            users = await self._intent_repo.read_by_user(status=AdsFlow.PLACED)
         except Exception as ex:
             logger.error(ex)
             raise
-        for user_id, _ in it.groupby(ads, key=lambda a: a[2]["user_id"]):
-            exchange = Exchange.BINANCE
-            offers = await self._p2p_repo.get_my_offer(user_id)
-            val = "".join([str(o.order_nb) for o in offers])
-            is_new = await self._inc_repo.update(exchange, name=user_id, value=val)
-            if not is_new:
-                return
-            for offer in offers:
-                arb = f"Order: {offer.asset} {offer.fiat} {offer.amount:.2f}@{offer.price:.2f}"
-                await self._notification_repo.put_notification(
-                    user_id,
-                    notification=UserInteractionEnum.NEW_OFFER,
-                    arbitrary=arb,
-                )
+        auth_required = []
+        try:
+            for user_id in users:
+                exchange = Exchange.BINANCE
+                try:
+                    offers = await self._p2p_repo.get_my_offer(user_id)
+                except P2POrderRepo.AuthFailed as ex:
+                    logger.warning(f"offers check of {user_id} skipped: {ex}")
+                    auth_required.append(user_id)
+                    continue
+                val = "".join([str(o.order_nb) for o in offers])
+                is_new = await self._inc_repo.update(exchange, name=user_id, value=val)
+                if not is_new:
+                    continue
+                for offer in offers:
+                    arb = f"Order: {offer.asset} {offer.fiat} {offer.amount:.2f}@{offer.price:.2f}"
+                    await self._notification_repo.put_notification(
+                        user_id,
+                        notification=UserInteractionEnum.NEW_OFFER,
+                        arbitrary=arb,
+                    )
+        except P2POrderRepo.Unavailable as ex:
+            logger.warning(f"offers check deferred: {ex}")
+        return auth_required
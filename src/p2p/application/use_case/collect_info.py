@@ -1,16 +1,24 @@
-from typing import List
+import asyncio
+from typing import Dict, List, Optional, Tuple, Union
 
 from loguru import logger
 from p2p.settings import AdsSettings
 
-from ..domain.common import Advertisement, CollectInfoResponse, Order, Pair
+from ..domain.common import (Advertisement, CollectInfoResponse,
+                             CompactOrder, Order, OrderBookKey, Pair)
 from ..foundation import Direction, Exchange, PaymentMethod
+from ..repository.metrics_repo import MetricsRepo
 from ..repository.orderbook_cache_repo import OrderBookCacheRepo
 from ..repository.p2p_repo import P2POrderRepo
-from ..utils import extract_info_from_orders
+from ..utils import SingleFlight, extract_info_from_orders
 
 
 class CollectInfoUseCase:
+    # how long to wait for a book another worker is fetching
+    fetch_wait: float = 5.0
+    fetch_poll: float = 0.1
+    _single_flight = SingleFlight()
+
     class NoCompetitiors(Exception):
         pass
 
@@ -18,37 +26,30 @@ class CollectInfoUseCase:
         self,
         p2p_repo: P2POrderRepo,
         ob_cache: OrderBookCacheRepo,
+        metrics_repo: MetricsRepo,
         exchange: Exchange,
     ) -> None:
         self._p2p_repo = p2p_repo
         self._ob_cache = ob_cache
+        self._metrics_repo = metrics_repo
         self._exchange = exchange
         self._logger = logger
+        self._refreshes: Dict[OrderBookKey, asyncio.Future] = {}
 
     async def execute(
         self, ad: Advertisement, method: PaymentMethod, settings: AdsSettings
     ) -> CollectInfoResponse:
         pair = Pair(asset=ad.asset, fiat=ad.fiat)
-        try:
-            orderbook_raw: List[dict] = await self._ob_cache.read(self._exchange, pair)
-            orderbook = [Order(**o) for o in orderbook_raw]
-
-        except self._ob_cache.NotFound:
-            orderbook = await self._p2p_repo.get_orderbook(
-                pay_methods=[method],
-                asset=pair.asset,
-                fiat=pair.fiat,
-                direction=Direction.SELL,
-            )
-            orderbook.extend(
-                await self._p2p_repo.get_orderbook(
-                    pay_methods=[method],
-                    asset=pair.asset,
-                    fiat=pair.fiat,
-                    direction=Direction.BUY,
+        sides = await asyncio.gather(
+            *(
+                self._read_side(
+                    OrderBookKey(pair=pair, pay_methods=(method,), direction=direction),
+                    settings.max_orderbook_age,
                 )
+                for direction in (Direction.SELL, Direction.BUY)
             )
-            await self._ob_cache.put(self._exchange, pair, orderbook)
+        )
+        orderbook = [o for side, _ in sides for o in side]
 
         orders = {Direction.BUY: [], Direction.SELL: []}
         for o in orderbook:
@@ -70,8 +71,94 @@ class CollectInfoUseCase:
             logger.warning(f"{len(orderbook)}")
             raise self.NoCompetitiors("Buy or Sell competitor wasn't found")
         return CollectInfoResponse(
-            best_ask=best_ask,
-            best_bid=best_bid,
-            buy_competitor=buy_competitor,
-            sell_competitor=sell_competitor,
+            best_ask=self._as_order(best_ask),
+            best_bid=self._as_order(best_bid),
+            buy_competitor=self._as_order(buy_competitor),
+            sell_competitor=self._as_order(sell_competitor),
+            orderbook_age=max(age for _, age in sides),
+        )
+
+    @staticmethod
+    def _as_order(order: Union[Order, CompactOrder]) -> Order:
+        if isinstance(order, CompactOrder):
+            return order.to_order()
+        return order
+
+    async def wait_refreshes(self):
+        """Let the background refreshes finish, e.g. at the end of a task"""
+        await asyncio.gather(*self._refreshes.values())
+
+    async def _read_side(
+        self, key: OrderBookKey, max_age: Optional[float]
+    ) -> Tuple[List[Order], float]:
+        try:
+            snapshot = await self._ob_cache.read(self._exchange, key)
+        except self._ob_cache.NotFound:
+            self._metrics_repo.incr(f"orderbook_cache_misses:{key.key_class}")
+        else:
+            if max_age is None or snapshot.age <= max_age:
+                self._metrics_repo.incr(f"orderbook_cache_hits:{key.key_class}")
+                if snapshot.stale:
+                    self._metrics_repo.incr(f"orderbook_cache_stale:{key.key_class}")
+                    self._revalidate(key)
+                return snapshot.orders, snapshot.age
+            self._metrics_repo.incr(f"orderbook_cache_too_old:{key.key_class}")
+        orders = await self._single_flight.do(
+            (self._exchange, key), lambda: self._load_side(key, max_age)
+        )
+        return orders, 0.0
+
+    def _revalidate(self, key: OrderBookKey):
+        if key in self._refreshes:
+            return
+        refresh = asyncio.ensure_future(self._refresh(key))
+        self._refreshes[key] = refresh
+        refresh.add_done_callback(lambda _: self._refreshes.pop(key, None))
+
+    async def _refresh(self, key: OrderBookKey):
+        if not await self._ob_cache.claim_fetch(self._exchange, key):
+            return  # another worker refreshes it
+        try:
+            await self._fetch(key)
+        except Exception as ex:
+            logger.warning(f"{key} refresh failed: {ex}")
+        finally:
+            await self._ob_cache.release_fetch(self._exchange, key)
+
+    async def _load_side(
+        self, key: OrderBookKey, max_age: Optional[float]
+    ) -> List[Order]:
+        claimed = await self._ob_cache.claim_fetch(self._exchange, key)
+        if not claimed:
+            try:
+                return await self._wait_for_cache(key, max_age)
+            except self._ob_cache.NotFound:
+                logger.warning(f"{key} wasn't fetched by another worker in time")
+        try:
+            return await self._fetch(key)
+        finally:
+            if claimed:
+                await self._ob_cache.release_fetch(self._exchange, key)
+
+    async def _fetch(self, key: OrderBookKey) -> List[Order]:
+        orders = await self._p2p_repo.get_orderbook(
+            pay_methods=list(key.pay_methods),
+            asset=key.pair.asset,
+            fiat=key.pair.fiat,
+            direction=key.direction,
         )
+        await self._ob_cache.put(self._exchange, key, orders)
+        return orders
+
+    async def _wait_for_cache(
+        self, key: OrderBookKey, max_age: Optional[float]
+    ) -> List[Order]:
+        for _ in range(int(self.fetch_wait / self.fetch_poll)):
+            await asyncio.sleep(self.fetch_poll)
+            try:
+                snapshot = await self._ob_cache.read(self._exchange, key)
+            except self._ob_cache.NotFound:
+                continue
+            if max_age is None or snapshot.age <= max_age:
+                return snapshot.orders
+        raise self._ob_cache.NotFound(f"{key} wasn't cached")
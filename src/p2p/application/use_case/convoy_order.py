@@ -1,19 +1,18 @@
-import itertools as it
-from datetime import datetime, timedelta
+import asyncio
+import time
+from typing import Iterable, List
 
 from loguru import logger
 from p2p.settings import AdsSettings
 
-from ..domain.common import ConvoyAdaptiveInterval, INTERVAL_TRACKER
-from ..foundation import AdsFlow, Direction
+from ..foundation import AdsFlow, Direction, Exchange
+from ..repository.convoy_schedule_repo import ConvoyScheduleRepo
 from ..repository.intention_repo import IntentionRepo
+from ..repository.metrics_repo import MetricsRepo
 from ..repository.p2p_repo import P2POrderRepo
 from ..use_case.collect_info import CollectInfoUseCase
 from ..utils import calculate_price
 
-MAX_POLL_INTERVAL = 60
-POLL_TRACK_LEN = 10
-
 
 class ConvoyOrderUseCase:
     def __init__(
@@ -21,84 +20,99 @@ class ConvoyOrderUseCase:
         intent_repo: IntentionRepo,
         collect_info_uc: CollectInfoUseCase,
         p2p_repo: P2POrderRepo,
+        schedule_repo: ConvoyScheduleRepo,
+        metrics_repo: MetricsRepo,
+        exchange: Exchange,
+        concurrency: int = 10,
     ) -> None:
         self._intent_repo = intent_repo
         self._collect_info_uc = collect_info_uc
         self._p2p_repo = p2p_repo
+        self._schedule_repo = schedule_repo
+        self._metrics_repo = metrics_repo
+        self._exchange = exchange
+        self._concurrency = concurrency
 
-    async def execute(self):
+    async def execute(self) -> List[str]:
+        """Returns the users that have to log in"""
+        started = time.monotonic()
         try:
-            ads = await self._intent_repo.read_with_status(status=AdsFlow.PLACED)
+            users = await self._intent_repo.read_by_user(status=AdsFlow.PLACED)
+            due = await self._schedule_repo.pop_due(self._exchange, users)
         except Exception as ex:
             logger.error(ex)
             raise
-        try:
-            now = datetime.utcnow()
-            for user_id, user_ads in it.groupby(ads, key=lambda a: a[2]["user_id"]):
-                if user_id not in INTERVAL_TRACKER:
-                    INTERVAL_TRACKER[user_id] = ConvoyAdaptiveInterval(history=[now])
-                if (
-                    INTERVAL_TRACKER[user_id].history[-1]
-                    + INTERVAL_TRACKER[user_id].current
-                    >= now
-                ):
-                    continue
-                existing_orders = await self._p2p_repo.get_my_orders(user_id=user_id)
-                for intent_id, user_ad, settings_d in user_ads:
-                    direction = Direction(user_ad["direction"].upper())
-                    similars = [
-                        eo
-                        for eo in existing_orders
-                        if (
-                            eo.asset.upper() == user_ad["asset"].upper()
-                            and eo.fiat.upper() == user_ad["fiat"].upper()
-                            and eo.direction == direction
-                            and eo.payment_methods[0].upper()
-                            == user_ad["payment_methods"].upper()
-                            and eo.initial_amount == int(user_ad["initial_amount"])
-                        )
-                    ]
-                    if len(similars) == 0:
-                        await self._intent_repo.set_status(intent_id, AdsFlow.COMPLETED)
-                        continue
-                    elif len(similars) > 1:
-                        logger.warning(f"more than 1 similar ads found. Skip")
-                        continue
+        auth_required: List[str] = []
+        # the users don't depend on each other, a failing one only skips itself
+        semaphore = asyncio.Semaphore(self._concurrency)
 
-                    existing_ad = similars[0]
-                    settings = AdsSettings(**settings_d)
-                    info_resp = await self._collect_info_uc.execute(
-                        ad=existing_ad,
-                        method=user_ad["payment_methods"],
-                        settings=settings,
-                    )
-                    order_price = calculate_price(
-                        direction=direction,
-                        comp_spread=settings.min_comp_spread,
-                        spread=settings.min_spread,
-                        digits=info_resp.sell_competitor.digits,
-                        info_resp=info_resp,
-                    )
-                    if order_price != existing_ad.price:
-                        INTERVAL_TRACKER[user_id] = ConvoyAdaptiveInterval(
-                            history=[now]
-                        )
-                        logger.debug(
-                            f"adjusting ad for {user_id} from {existing_ad.price} to {order_price}"
-                        )
-                        existing_ad.price = order_price
-                        await self._p2p_repo.update_order(user_id, existing_ad)
-                    else:
-                        INTERVAL_TRACKER[user_id].history.append(now)
-                        if len(INTERVAL_TRACKER[user_id].history) >= POLL_TRACK_LEN:
-                            INTERVAL_TRACKER[user_id] = ConvoyAdaptiveInterval(
-                                history=[now],
-                                current=min(
-                                    2 * INTERVAL_TRACKER[user_id].current,
-                                    timedelta(seconds=MAX_POLL_INTERVAL),
-                                ),
-                            )
+        async def convoy(user_id: str):
+            async with semaphore:
+                try:
+                    await self._convoy_user(user_id, users[user_id])
+                except P2POrderRepo.AuthFailed as ex:
+                    logger.warning(f"convoy of {user_id} skipped: {ex}")
+                    auth_required.append(user_id)
+                except P2POrderRepo.Unavailable as ex:
+                    logger.warning(f"convoy of {user_id} deferred: {ex}")
+                except Exception as ex:
+                    logger.error(f"convoy of {user_id} failed: {ex}")
+                    self._metrics_repo.incr("convoy_errors")
 
-        except Exception as ex:
-            logger.error(ex)
-            raise
+        await asyncio.gather(*(convoy(user_id) for user_id in due))
+        await self._collect_info_uc.wait_refreshes()
+        self._metrics_repo.set("convoy_users", len(users))
+        self._metrics_repo.set("convoy_due", len(due))
+        self._metrics_repo.set("convoy_tick_seconds", time.monotonic() - started)
+        return auth_required
+
+    async def _convoy_user(self, user_id: str, user_ads: Iterable):
+        # None while no ad was compared, the user stays leased then
+        changed = None
+        existing_orders = await self._p2p_repo.get_my_orders(user_id=user_id)
+        for intent_id, user_ad, settings_d in user_ads:
+            direction = Direction(user_ad["direction"].upper())
+            similars = [
+                eo
+                for eo in existing_orders
+                if (
+                    eo.asset.upper() == user_ad["asset"].upper()
+                    and eo.fiat.upper() == user_ad["fiat"].upper()
+                    and eo.direction == direction
+                    and eo.payment_methods[0].upper()
+                    == user_ad["payment_methods"].upper()
+                    and eo.initial_amount == int(user_ad["initial_amount"])
+                )
+            ]
+            if len(similars) == 0:
+                await self._intent_repo.set_status(intent_id, AdsFlow.COMPLETED)
+                continue
+            elif len(similars) > 1:
+                logger.warning(f"more than 1 similar ads found. Skip")
+                continue
+
+            existing_ad = similars[0]
+            settings = AdsSettings(**settings_d)
+            info_resp = await self._collect_info_uc.execute(
+                ad=existing_ad,
+                method=user_ad["payment_methods"],
+                settings=settings,
+            )
+            order_price = calculate_price(
+                direction=direction,
+                comp_spread=settings.min_comp_spread,
+                spread=settings.min_spread,
+                digits=info_resp.sell_competitor.digits,
+                info_resp=info_resp,
+            )
+            if order_price != existing_ad.price:
+                changed = True
+                logger.debug(
+                    f"adjusting ad for {user_id} from {existing_ad.price} to {order_price}"
+                )
+                existing_ad.price = order_price
+                await self._p2p_repo.update_order(user_id, existing_ad)
+            else:
+                changed = bool(changed)
+        if changed is not None:
+            await self._schedule_repo.record(self._exchange, user_id, changed)
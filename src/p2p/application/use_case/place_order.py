@@ -20,7 +20,12 @@ class PlaceOrderUseCase:
         self._collect_info_uc = collect_info_uc
         self._p2p_repo = p2p_repo
 
-    async def execute(self, user_id: str):
+    async def execute(self, user_id: str) -> bool:
+        """Place the newest intent, False if the user has to log in first
+
+        The intent is left new then, to be placed once the session has
+        been renewed.
+        """
         try:
             ads = await self._intent_repo.read_with_status(
                 uuid=user_id, status=AdsFlow.NEW
@@ -73,9 +78,23 @@ class PlaceOrderUseCase:
             ads.digits = competitor.digits
             ads.price = order_price
             logger.info(f"placing new order {ads}")
-            await self._p2p_repo.place_order(settings_d["user_id"], ads)
+            try:
+                await self._p2p_repo.place_order(settings_d["user_id"], ads)
+            except P2POrderRepo.AuthFailed as ex:
+                # logging in takes minutes, it's left to the auth workers
+                logger.info(f"{intent_id} of {user_id} waits for a login: {ex}")
+                return False
             await self._intent_repo.set_status(intent_id, AdsFlow.PLACED)
         except Exception as ex:
             await self._intent_repo.set_status(intent_id, AdsFlow.FAILED)
             logger.error(ex)
             raise
+        return True
+
+    async def fail(self, user_id: str):
+        """Give up the newest intent, e.g. when the user never logged in"""
+        ads = await self._intent_repo.read_with_status(
+            uuid=user_id, status=AdsFlow.NEW
+        )
+        if ads:
+            await self._intent_repo.set_status(ads[-1][0], AdsFlow.FAILED)
@@ -0,0 +1,77 @@
+from datetime import timedelta
+from typing import List
+
+from loguru import logger
+
+from ..foundation import AdsFlow, Exchange
+from ..repository.intention_repo import IntentionRepo
+from ..repository.p2p_repo import P2POrderRepo
+from ..repository.session_repo import SessionRepo
+
+
+class RenewSessionsUseCase:
+    """Picks the users to log in before their sessions expire.
+
+    The lifetime is learned from the ages sessions got rejected at and
+    from the ages renewed sessions were still valid at, a session is due
+    once it has lived `renew_ratio` of it. Sessions
+    already rejected go first. The logins themselves are run one user
+    at a time by `renew`, e.g. from the auth workers.
+    """
+
+    def __init__(
+        self,
+        p2p_repo: P2POrderRepo,
+        intent_repo: IntentionRepo,
+        session_repo: SessionRepo,
+        exchange: Exchange,
+        default_lifetime: timedelta,
+        renew_ratio: float = 0.8,
+    ) -> None:
+        self._p2p_repo = p2p_repo
+        self._intent_repo = intent_repo
+        self._session_repo = session_repo
+        self._exchange = exchange
+        self._default_lifetime = default_lifetime
+        self._renew_ratio = renew_ratio
+
+    async def execute(self) -> List[str]:
+        """The users whose session is due, the rejected ones first"""
+        users = await self._intent_repo.read_by_user(status=AdsFlow.PLACED)
+        expired = await self._session_repo.expired(self._exchange)
+        active = sorted(set(users) - set(expired))
+        threshold = await self._threshold()
+        due = list(expired)
+        for user_id in active:
+            try:
+                if await self._aged(user_id, threshold):
+                    due.append(user_id)
+            except Exception as ex:
+                logger.error(f"session age of {user_id} unknown: {ex}")
+        return due
+
+    async def renew(self, user_id: str):
+        """Log the user in, unless the session was renewed meanwhile"""
+        if await self._session_repo.is_expired(self._exchange, user_id):
+            logger.info(f"renewing expired session of {user_id}")
+        else:
+            age = await self._p2p_repo.session_age(user_id)
+            if age is not None and age < await self._threshold():
+                return
+            logger.info(f"renewing session of {user_id}")
+            if age is not None:
+                # it's still valid, sessions live at least that long
+                await self._session_repo.record_lifetime(
+                    self._exchange, age.total_seconds(), lower_bound=True
+                )
+        await self._p2p_repo.renew_session(user_id)
+
+    async def _threshold(self) -> timedelta:
+        lifetime = await self._session_repo.expected_lifetime(self._exchange)
+        if lifetime is None:
+            return self._default_lifetime * self._renew_ratio
+        return timedelta(seconds=lifetime) * self._renew_ratio
+
+    async def _aged(self, user_id: str, threshold: timedelta) -> bool:
+        age = await self._p2p_repo.session_age(user_id)
+        return age is None or age >= threshold
@@ -1,16 +1,21 @@
+import asyncio
 from decimal import Decimal
-from typing import List, Tuple
+from typing import (Awaitable, Callable, Dict, Hashable, List, Tuple, TypeVar,
+                    Union)
 
-from .domain.common import Advertisement, CollectInfoResponse, Order
+from .domain.common import (Advertisement, CollectInfoResponse, CompactOrder,
+                            Order)
 from .foundation import Direction
 
+T = TypeVar("T")
+
 
 def extract_info_from_orders(
-    orders: List[Order],
+    orders: List[Union[Order, CompactOrder]],
     ad: Advertisement,
     threshold: int,
     merchant: str,
-) -> Tuple[Order, Order]:
+) -> Tuple[Union[Order, CompactOrder], Union[Order, CompactOrder]]:
     """Get best price and competitor"""
     foreign_orders = [o for o in orders if o.maker.visible_name != merchant]
     best_price = foreign_orders[0]
@@ -52,3 +57,19 @@ def get_comment(comments: str, method: str) -> str:
                 break
     finally:
         return result
+
+
+class SingleFlight:
+    """Concurrent calls with the same key share a single execution"""
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[T]]) -> T:
+        call = self._calls.get(key)
+        if call is None:
+            call = asyncio.ensure_future(func())
+            self._calls[key] = call
+            call.add_done_callback(lambda _: self._calls.pop(key, None))
+        # a cancelled caller must not cancel the call for the others
+        return await asyncio.shield(call)
@@ -2,15 +2,22 @@ from .adapter.bin_p2p_adapter import BinP2PAdapter
 from .repository.alch_auth_repo import AlchemyAuthRepo
 from .repository.alch_intent_repo import AlchemyIntentionRepo
 from .repository.alch_user_repo import AlchemyUserRepo
-from .repository.bin_auth import BinanceAuthenticator
 from .repository.bin_market_data_repo import BinanceMarketDataRepo
 from .repository.bin_merch_mediator_repo import BinanceMerchMediatorRepo
 from .repository.bin_p2p_repo import BinanceP2PRepo
 from .repository.bin_private_data_repo import BinancePrivateDataRepo
 from .repository.file_auth_repo import FileAuthRepo
+from .repository.redis_captcha_cache_repo import RedisCaptchaCacheRepo
+from .repository.redis_circuit_breaker_repo import RedisCircuitBreakerRepo
+from .repository.redis_convoy_schedule_repo import RedisConvoyScheduleRepo
+from .repository.redis_metrics_repo import RedisMetricsRepo
 from .repository.redis_orderbook_cache_repo import RedisOrderBookCacheRepo
+from .repository.redis_pay_method_repo import RedisPayMethodRepo
 from .repository.redis_queue_repo import RedisQueueRepo
+from .repository.redis_rate_limiter_repo import RedisRateLimiterRepo
+from .repository.redis_session_repo import RedisSessionRepo
 from .repository.redis_userdata_repo import RedisUserDataRepo
+from .repository.two_captcha_repo import TwoCaptchaSolverRepo
 
 __all__ = [
     "BinanceP2PRepo",
@@ -26,4 +33,22 @@ __all__ = [
     "AlchemyIntentionRepo",
     "RedisOrderBookCacheRepo",
     "RedisUserDataRepo",
+    "RedisRateLimiterRepo",
+    "RedisCircuitBreakerRepo",
+    "RedisMetricsRepo",
+    "RedisPayMethodRepo",
+    "RedisSessionRepo",
+    "TwoCaptchaSolverRepo",
+    "RedisConvoyScheduleRepo",
+    "RedisCaptchaCacheRepo",
 ]
+
+
+def __getattr__(name: str):
+    # selenium, undetected-chromedriver and OpenCV take most of the start up,
+    # only the processes logging users in import them
+    if name == "BinanceAuthenticator":
+        from .repository.bin_auth import BinanceAuthenticator
+
+        return BinanceAuthenticator
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
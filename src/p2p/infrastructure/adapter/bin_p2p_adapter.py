@@ -1,5 +1,5 @@
 from decimal import Decimal
-from typing import Tuple
+from typing import Dict, Tuple
 
 from loguru import logger
 from p2p.application import (Advertisement, Currency, Maker, Order,
@@ -9,6 +9,7 @@ from p2p.application.foundation import Direction
 
 class BinP2PAdapter(P2PAdapter):
     order_status_map = {OrderStatus.COMPLETED: 4}
+    # available to every user on top of their own registry
     method_2_props = {
         "RUBfiatbalance": {
             "payType": "RUBfiatbalance",
@@ -107,7 +108,9 @@ class BinP2PAdapter(P2PAdapter):
             raise
         return order
 
-    def serialize_ads_update(self, ads: Advertisement) -> dict:
+    def serialize_ads_update(
+        self, ads: Advertisement, pay_methods: Dict[PaymentMethod, dict]
+    ) -> dict:
         stub = {
             "asset": ads.asset.upper(),
             "fiatUnit": ads.fiat.upper(),
@@ -125,7 +128,7 @@ class BinP2PAdapter(P2PAdapter):
             "maxSingleTransAmount": str(ads.max_amount),
             "remarks": "",
             "tradeMethods": [
-                self.serialise_payment_method(m, ads.direction)
+                self.serialise_payment_method(m, ads.direction, pay_methods)
                 for m in ads.payment_methods
             ],
             "tradeType": ads.direction.value,
@@ -138,11 +141,12 @@ class BinP2PAdapter(P2PAdapter):
         keys = self.method_2_props["RUBfiatbalance"].keys()
         new_entry = {k: method[k] for k in keys if k != "payId"}
         new_entry["payId"] = method["id"]
-        self.method_2_props[PaymentMethod(method["identifier"])] = new_entry
         return new_entry
 
-    def serialize_ads_create(self, ads: Advertisement) -> dict:
-        stub = self.serialize_ads_update(ads)
+    def serialize_ads_create(
+        self, ads: Advertisement, pay_methods: Dict[PaymentMethod, dict]
+    ) -> dict:
+        stub = self.serialize_ads_update(ads, pay_methods)
         del stub["advNo"]
         stub.update(
             {
@@ -155,9 +159,17 @@ class BinP2PAdapter(P2PAdapter):
         return stub
 
     def serialise_payment_method(
-        self, method: PaymentMethod, direction: Direction
+        self,
+        method: PaymentMethod,
+        direction: Direction,
+        pay_methods: Dict[PaymentMethod, dict],
     ) -> dict:
-        method = [m for m in self.method_2_props if m.lower() == method.lower()][0]
+        registry = {**self.method_2_props, **pay_methods}
+        matches = [m for m in registry if m.lower() == method.lower()]
+        if len(matches) == 0:
+            logger.debug(registry.keys())
+            raise KeyError(f"unknown payment method {method}")
+        method = matches[0]
         if direction == Direction.BUY:
             stub = {
                 "payId": None,
@@ -166,22 +178,18 @@ class BinP2PAdapter(P2PAdapter):
                 "payBank": None,
                 "paySubBank": None,
             }
-            stub.update(self.method_2_props[method])
+            stub.update(registry[method])
         else:
-            try:
-                stub = {
-                    "identifier": method,
-                    "payId": self.method_2_props[method],
-                    "payType": None,
-                    "payAccount": None,
-                    "payBank": None,
-                    "paySubBank": None,
-                    "tradeMethodName": method,
-                }
-            except KeyError:
-                logger.debug(self.method_2_props.keys())
-                raise
-        stub.update(self.method_2_props[method])
+            stub = {
+                "identifier": method,
+                "payId": registry[method],
+                "payType": None,
+                "payAccount": None,
+                "payBank": None,
+                "paySubBank": None,
+                "tradeMethodName": method,
+            }
+        stub.update(registry[method])
         return stub
 
     def serialize_ads_delete(self, ads: Advertisement) -> dict:
@@ -16,7 +16,9 @@ class AlchemyAuthRepo(AsyncRepo, AuthRepo):
             result = result.fetchone()
             if result is None:
                 result = await conn.execute(
-                    AuthDataModel.insert().values(login=uuid, data=auth_data)
+                    AuthDataModel.insert().values(
+                        login=uuid, data=auth_data, updated_at=datetime.utcnow()
+                    )
                 )
             else:
                 result = await conn.execute(
@@ -35,3 +37,15 @@ class AlchemyAuthRepo(AsyncRepo, AuthRepo):
             if result is None:
                 raise self.NotFound(f"user {uuid} not found")
             return result
+
+    async def updated_at(self, uuid: str) -> datetime:
+        async with self._engine.begin() as conn:
+            result = await conn.execute(
+                select(AuthDataModel.c.updated_at).where(
+                    AuthDataModel.c.login == uuid
+                )
+            )
+            result = result.scalar()
+            if result is None:
+                raise self.NotFound(f"user {uuid} not found")
+            return result
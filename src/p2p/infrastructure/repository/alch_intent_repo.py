@@ -37,6 +37,26 @@ class AlchemyIntentionRepo(AsyncRepo, IntentionRepo):
                 for result in results
             ]
 
+    async def read_by_user(
+        self, status: AdsFlow
+    ) -> Dict[str, List[Tuple[int, dict, dict]]]:
+        async with self._engine.begin() as conn:
+            # served by ix_intention_status_login, a user's intents come in a row
+            result = await conn.execute(
+                select(IntentionModel.c.intention_id, IntentionModel.c.data)
+                .where(IntentionModel.c.status == status)
+                .order_by(IntentionModel.c.login, IntentionModel.c.intention_id)
+            )
+            rows = [row._mapping for row in result.fetchall()]
+        users: Dict[str, List[Tuple[int, dict, dict]]] = {}
+        for row in rows:
+            settings = row["data"]["settings"]
+            # saved under the exchange login, the repos take the presentation id
+            users.setdefault(settings["user_id"], []).append(
+                (row["intention_id"], row["data"]["ads"], settings)
+            )
+        return users
+
     async def set_status(self, intention_id: int, value: AdsFlow):
         async with self._engine.begin() as conn:
             await conn.execute(
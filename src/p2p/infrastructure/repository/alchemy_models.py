@@ -1,7 +1,7 @@
 from datetime import datetime
 
 from p2p.application import AdsFlow
-from sqlalchemy import Column, Enum, Integer, MetaData, String, Table
+from sqlalchemy import Column, Enum, Index, Integer, MetaData, String, Table
 from sqlalchemy.sql.schema import ForeignKey
 from sqlalchemy.sql.sqltypes import JSON
 from sqlalchemy.types import DateTime
@@ -46,4 +46,6 @@ IntentionModel = Table(
     Column("data", JSON, nullable=False),
     Column("status", Enum(AdsFlow), default=AdsFlow.NEW),
     Column("updated_at", DateTime, default=datetime.now),
+    # the workers scan the placed intents of every user each tick
+    Index("ix_intention_status_login", "status", "login"),
 )
@@ -1,15 +1,17 @@
 import asyncio
 import os
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from io import BytesIO
-from typing import Awaitable, Callable, Dict, List, Tuple
+from typing import Any, Callable, Coroutine, Dict, List, Optional, Tuple, TypeVar
 
-import cv2
 import numpy as np
 import seleniumwire.undetected_chromedriver as uc
 from HLISA.hlisa_action_chains import HLISA_ActionChains
 from loguru import logger
-from p2p.application import QueueRepo, UserInteractionEnum
+from p2p.application import (CaptchaCacheRepo, CaptchaSolverRepo, MetricsRepo,
+                             QueueRepo, UserInteractionEnum)
 from PIL import Image, ImageChops
 from pydantic.main import BaseModel
 from pydantic.types import PositiveInt
@@ -23,129 +25,27 @@ from selenium.webdriver.remote.webelement import WebElement
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.support.ui import WebDriverWait
 from seleniumwire import webdriver
-from twocaptcha import TwoCaptcha
 
-PIXELS_EXTENSION = 10
+from .browser_pool import BrowserPool
+from .puzzle import PuzzleSolver, b64_to_bgr, dhash, grid_key, pil_to_bgr
 
-
-class PuzzleSolver:
-    def __init__(self, piece_path, background_path):
-        self.piece_path = piece_path
-        self.background_path = background_path
-
-    def get_position(self):
-        template, x_inf, y_sup, y_inf = self.__piece_preprocessing()
-        background = self.__background_preprocessing(y_sup, y_inf)
-
-        res = cv2.matchTemplate(background, template, cv2.TM_CCOEFF_NORMED)
-        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
-        top_left = max_loc
-
-        origin = x_inf
-        end = top_left[0] + PIXELS_EXTENSION
-
-        return end - origin
-
-    def __background_preprocessing(self, y_sup, y_inf):
-        background = self.__sobel_operator(self.background_path)
-        background = background[y_sup:y_inf, :]
-        background = self.__extend_background_boundary(background)
-        background = self.__img_to_grayscale(background)
-
-        return background
-
-    def __piece_preprocessing(self):
-        img = self.__sobel_operator(self.piece_path)
-        x, w, y, h = self.__crop_piece(img)
-        template = img[y:h, x:w]
-
-        template = self.__extend_template_boundary(template)
-        template = self.__img_to_grayscale(template)
-
-        return template, x, y, h
-
-    def __crop_piece(self, img):
-        white_rows = []
-        white_columns = []
-        r, c = img.shape
-
-        for row in range(r):
-            for x in img[row, :]:
-                if x != 0:
-                    white_rows.append(row)
-
-        for column in range(c):
-            for x in img[:, column]:
-                if x != 0:
-                    white_columns.append(column)
-
-        x = white_columns[0]
-        w = white_columns[-1]
-        y = white_rows[0]
-        h = white_rows[-1]
-
-        return x, w, y, h
-
-    def __extend_template_boundary(self, template):
-        extra_border = np.zeros((template.shape[0], PIXELS_EXTENSION), dtype=int)
-        template = np.hstack((extra_border, template, extra_border))
-
-        extra_border = np.zeros((PIXELS_EXTENSION, template.shape[1]), dtype=int)
-        template = np.vstack((extra_border, template, extra_border))
-
-        return template
-
-    def __extend_background_boundary(self, background):
-        extra_border = np.zeros((PIXELS_EXTENSION, background.shape[1]), dtype=int)
-        return np.vstack((extra_border, background, extra_border))
-
-    def __sobel_operator(self, img_path):
-        scale = 1
-        delta = 0
-        ddepth = cv2.CV_16S
-
-        img = cv2.imread(img_path, cv2.IMREAD_COLOR)
-        img = cv2.GaussianBlur(img, (3, 3), 0)
-        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
-        grad_x = cv2.Sobel(
-            gray,
-            ddepth,
-            1,
-            0,
-            ksize=3,
-            scale=scale,
-            delta=delta,
-            borderType=cv2.BORDER_DEFAULT,
-        )
-        grad_y = cv2.Sobel(
-            gray,
-            ddepth,
-            0,
-            1,
-            ksize=3,
-            scale=scale,
-            delta=delta,
-            borderType=cv2.BORDER_DEFAULT,
-        )
-        abs_grad_x = cv2.convertScaleAbs(grad_x)
-        abs_grad_y = cv2.convertScaleAbs(grad_y)
-        grad = cv2.addWeighted(abs_grad_x, 0.5, abs_grad_y, 0.5, 0)
-
-        return grad
-
-    def __img_to_grayscale(self, img):
-        tmp_path = "/tmp/sobel.png"
-        cv2.imwrite(tmp_path, img)
-        return cv2.imread(tmp_path, 0)
+T = TypeVar("T")
 
 
 class JigSawSolver:
-    _solver = None
     _action = None
     margin = 3
     # inspired by https://ask-hellobi-com.translate.goog/blog/cuiqingcai/9796?_x_tr_sl=auto&_x_tr_tl=en&_x_tr_hl=ru&_x_tr_pto=wapp
-    def __init__(self, driver) -> None:
+    def __init__(
+        self,
+        driver,
+        find_offset: Optional[Callable[[np.ndarray, np.ndarray], int]] = None,
+    ) -> None:
         self._driver = driver
+        # piece, background -> offset of the gap
+        self._find_offset = find_offset or (
+            lambda piece, background: PuzzleSolver(piece, background).get_position()
+        )
 
     def solve(self):
         def image_to_slider(
@@ -160,20 +60,17 @@ class JigSawSolver:
             slider_max = ttl_width - slider.size["width"]
             return round(image_x * slider_max / img_max)
 
-        self._solver = PuzzleSolver(
-            piece_path="/tmp/diff.png", background_path="/tmp/wide.png"
-        )
         self._action = ActionChains(self._driver, duration=50)
 
         slider, slider_box = self.get_slider_controls()
         image = self.get_image()
         sub_image = self.get_sub_image(image)
 
-        self.make_images(slider=slider, image=image, sub_image=sub_image)
+        wide, diff = self.make_images(slider=slider, image=image, sub_image=sub_image)
         sub_img_sz = sub_image.size
         logger.debug(f"{slider_box.size}, {image.size}, {sub_image.size}")
 
-        offset = self._solver.get_position()
+        offset = self._find_offset(pil_to_bgr(diff), pil_to_bgr(wide))
         logger.debug(f"{offset}, {2*sub_img_sz['width']}")
 
         offset = image_to_slider(
@@ -225,7 +122,6 @@ class JigSawSolver:
 
         screenshot = image.screenshot_as_png
         pil_img_wide = Image.open(BytesIO(screenshot))
-        pil_img_wide.save("/tmp/wide.png")
 
         self._action.click_and_hold(slider)
         track = self.get_track(2 * sub_img_sz["width"])
@@ -238,16 +134,13 @@ class JigSawSolver:
         pil_img_left = pil_img_left.crop(
             (0, 0, sub_img_sz["width"], pil_img_wide.height)
         )
-        pil_img_left.save("/tmp/left.png")
         pil_img = pil_img_wide.copy()
         pil_img.paste(pil_img_left)
-        pil_img.save("/tmp/res.png")
 
         diff = ImageChops.subtract(pil_img_wide.convert("RGB"), pil_img.convert("RGB"))
         diff = diff.crop(
             (self.margin, 0, sub_img_sz["width"] - self.margin, diff.height)
         )
-        diff.save("/tmp/diff.png")
         return pil_img_wide, diff
 
     def get_track(self, distance, current=0) -> list:
@@ -276,49 +169,130 @@ class JigSawSolver:
 class ActionDescr(BaseModel):
     name: str
     priority: PositiveInt
-    action: Callable[[webdriver.Remote, str, str], Awaitable]
+    action: Callable[[webdriver.Remote, str, str], Optional[bool]]
+    # submits the credentials or the security codes
+    submits: bool = False
 
 
 class BinanceAuthenticator:
+    """Logs in with a browser.
+
+    WebDriver, OpenCV and the captcha client all block, so a login runs
+    in a thread of a pool bounded by `max_browsers`. Questions to the
+    user are sent back to the caller's event loop. Browsers are kept
+    warm in a BrowserPool of the same size, the first login starts them
+    on a thread of its own.
+    """
+
     # geetest captcha https://2captcha.com/lang/python
     # https://www.deathbycaptcha.com/faq
     LOGIN_URL = "https://accounts.binance.com/en/login"
+    # domains holding session cookies, cleared between logins
+    COOKIE_URLS = ("https://accounts.binance.com", "https://www.binance.com")
+    # only the API calls are captured, the session's headers are taken
+    # from the first authenticated one after the credentials were submitted
+    CAPTURE_SCOPES = [r".*binance\.com/bapi/.*"]
+    API_URL = "https://www.binance.com/bapi"
+    AUTH_HEADER = "csrftoken"
+    # the site sends md5("") until someone is logged in
+    ANONYMOUS_TOKEN = "d41d8cd98f00b204e9800998ecf8427e"
+    GRID_PROMPT = "//*[text()='Please select all images with']"
     PG_LOAD_TIMEOUT = 0.5
 
     def __init__(
         self,
         driver_url: str,
-        captcha_solver_key: str,
+        captcha_solver: CaptchaSolverRepo,
+        captcha_cache: CaptchaCacheRepo,
         user_queue_repo: QueueRepo,
+        metrics_repo: MetricsRepo,
+        max_browsers: int = 2,
+        browser_max_uses: int = 10,
+        proxy_port: int = 0,
     ):
         self._driver_url = driver_url
-        self._captcha_solver_key = captcha_solver_key
+        self._captcha_solver = captcha_solver
+        self._captcha_cache = captcha_cache
+        self._metrics = metrics_repo
         self._user_question_repo = user_queue_repo
         self._remote_driver = True
+        # seleniumwire's proxy the remote browser connects back to, 0 gives
+        # every browser of the pool a port of its own
+        self._proxy_port = proxy_port
         self._search_actions: Dict[tuple, ActionDescr] = self._build_search_map()
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_browsers, thread_name_prefix="browser"
+        )
+        self._pool: BrowserPool[webdriver.Remote] = BrowserPool(
+            self._new_driver,
+            size=max_browsers,
+            max_uses=browser_max_uses,
+            reset_urls=self.COOKIE_URLS,
+        )
+        # warming up must not take a login's thread
+        self._warm_executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="browser-warm"
+        )
+        self._warming: Optional[asyncio.Future] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
         if os.path.exists(self._driver_url):
             self._remote_driver = False
 
-    async def _sec_code_option(self, driver, login, password):
+    def _await(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Run `coro` on the caller's loop from a browser thread"""
+        if self._loop is None:
+            raise ValueError("_loop is None")
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result()
+
+    def _cached(self, kind: str, key: str, solve: Callable[[], str]) -> str:
+        """Past solution of the `kind` captcha hashed to `key`, else `solve` it"""
+        try:
+            cached = self._await(self._captcha_cache.get(kind, key))
+            self._metrics.incr(f"captcha_cache_hits:{kind}")
+            self._metrics.incr(f"captcha_seconds_saved:{kind}", cached.elapsed)
+            logger.debug(f"{kind} captcha {key} solved from cache")
+            return cached.solution
+        except CaptchaCacheRepo.NotFound:
+            self._metrics.incr(f"captcha_cache_misses:{kind}")
+        ts = time.monotonic()
+        solution = solve()
+        elapsed = time.monotonic() - ts
+        self._await(self._captcha_cache.put(kind, key, solution, elapsed))
+        return solution
+
+    def _record_outcome(self, driver, kind: str, key: str, challenge: tuple):
+        # a further round of the same captcha counts as a failure too
+        try:
+            WebDriverWait(driver, 3).until(
+                EC.invisibility_of_element_located(challenge)
+            )
+            success = True
+        except SelTimeOutExc:
+            success = False
+        self._metrics.incr(f"captcha_{'passed' if success else 'failed'}:{kind}")
+        self._await(self._captcha_cache.record(kind, key, success))
+
+    def _sec_code_option(self, driver, login, password):
         inputs = driver.find_elements(By.TAG_NAME, "input")
         if len(inputs) > 1:
-            await self._sec_code_enter(driver, login)
+            self._sec_code_enter(driver, login)
         else:
-            await self._single_auth_code(driver, login)
+            self._single_auth_code(driver, login)
 
-    async def _failed_action(self, driver, login, password):
+    def _failed_action(self, driver, login, password):
         return False
 
-    async def _completed_action(self, driver, login, password):
+    def _completed_action(self, driver, login, password):
         return True
 
     def _build_search_map(self) -> Dict[tuple, ActionDescr]:
         result = {
-            (By.XPATH, "//*[text()='Please select all images with']"): ActionDescr(
+            (By.XPATH, self.GRID_PROMPT): ActionDescr(
                 name="grid captcha",
                 priority=2,
                 action=self._solve_grid_captcha,
             ),
+            # disabled, the jigsaw solutions aren't cached until it's back
             # (By.XPATH, "//*[text()='Security Verification']"): ActionDescr(
             #     name="geetest-like captcha",
             #     priority=2,
@@ -328,6 +302,7 @@ class BinanceAuthenticator:
                 name="security codes",
                 priority=3,
                 action=self._sec_code_option,
+                submits=True,
             ),
             (By.XPATH, "//*[text()='Deposit']"): ActionDescr(
                 name="deposit page", priority=4, action=self._completed_action
@@ -340,14 +315,18 @@ class BinanceAuthenticator:
                 name="login", priority=1, action=self._login_enter
             ),
             (By.NAME, "password"): ActionDescr(
-                name="password", priority=1, action=self._pass_enter
+                name="password", priority=1, action=self._pass_enter, submits=True
             ),
         }
 
         return result
 
-    async def _try_next_action(
-        self, driver: webdriver.Remote, login: str, password: str
+    def _try_next_action(
+        self,
+        driver: webdriver.Remote,
+        login: str,
+        password: str,
+        submitting: Optional[threading.Event] = None,
     ):
         _found_map: Dict[int, List[ActionDescr]] = {}
         for k, v in self._search_actions.items():
@@ -367,9 +346,11 @@ class BinanceAuthenticator:
         if len(v) > 1:
             logger.warning(f"two item with the same prio found {k},{v}")
         logger.debug(f"trying {v[0].name}")
-        return await v[0].action(driver, login, password)
+        if v[0].submits and submitting is not None:
+            submitting.set()
+        return v[0].action(driver, login, password)
 
-    async def _solve_grid_captcha(self, driver, login, password):
+    def _solve_grid_captcha(self, driver, login, password):
         sz = 9
         for _ in range(3):
             try:
@@ -382,7 +363,6 @@ class BinanceAuthenticator:
                 pass
         e = driver.find_element(By.CLASS_NAME, "bcap-modal")
         screen = e.screenshot_as_base64
-        e.screenshot("/tmp/screen.png")
         grid = driver.find_elements(By.CLASS_NAME, "bcap-image-cell-container")
         for s in range(len(grid) // sz):
             s_grid = grid[s * sz : s * sz + sz]
@@ -396,42 +376,47 @@ class BinanceAuthenticator:
         if submit is None:
             raise ValueError("submit button is not detected")
 
-        solver = TwoCaptcha(self._captcha_solver_key)
         try:
-            logger.debug("starting solver")
-            result: dict = solver.grid(
-                screen,
-                rows=3,
-                cols=3,
-                lang="en",
-            )  # OK|click:3/8/9
-            if "click" not in result["code"]:
-                raise ValueError(f"couldn't resolve {result}")
-            _, cells = result["code"].split(":")
+            # the object to select follows the prompt's text
+            prompt = driver.find_element(By.XPATH, f"{self.GRID_PROMPT}/..").text
+            key = grid_key(
+                prompt, [b64_to_bgr(g.screenshot_as_base64) for g in grid]
+            )
+            cells = self._cached("grid", key, lambda: self._solve_grid(screen))
             logger.debug(cells)
             actions = HLISA_ActionChains(driver)
-            _cells = cells.split("/")
-            if len(_cells) == 0:
-                raise ValueError(f"unclear response from solver {cells}")
-            elif len(_cells) >= 8:
-                logger.debug("reporting bad solving")
-                solver.report(result["captchaId"], correct=False)
-            for cell in _cells:
+            for cell in cells.split("/"):
                 actions.move_to_element(grid[int(cell) - 1]).click().perform()
             actions.click(submit).perform()
             logger.debug(f"{submit} clicked")
+            self._record_outcome(driver, "grid", key, (By.CLASS_NAME, "bcap-modal"))
         except Exception as e:
             logger.error(e)
 
-    async def _single_auth_code(self, driver, login):
+    def _solve_grid(self, screen: str) -> str:
+        logger.debug("starting solver")
+        # solved on the loop, other users' captchas are solved meanwhile
+        solution = self._await(self._captcha_solver.solve_grid(screen, rows=3, cols=3))
+        if len(solution.cells) == 0:
+            raise ValueError(f"unclear response from solver {solution}")
+        elif len(solution.cells) >= 8:
+            logger.debug("reporting bad solving")
+            self._await(self._captcha_solver.report(solution.captcha_id, correct=False))
+            # neither cached nor clicked
+            raise ValueError(f"bad response from solver {solution}")
+        return "/".join(str(c) for c in solution.cells)
+
+    def _single_auth_code(self, driver, login):
         inputs = driver.find_elements(By.TAG_NAME, "input")
         auth_inputs = [x for x in inputs if x.accessible_name == "Authenticator Code"]
         auth_input = None
         if len(auth_inputs) > 0:
             auth_input = auth_inputs[0]
         if auth_input is not None:
-            auth_code = await self._user_question_repo.query(
-                login, question=UserInteractionEnum.ASK_AUTH_CODE
+            auth_code = self._await(
+                self._user_question_repo.query(
+                    login, question=UserInteractionEnum.ASK_AUTH_CODE
+                )
             )
             auth_input.clear()
             auth_input.send_keys(auth_code)
@@ -450,13 +435,24 @@ class BinanceAuthenticator:
                 except:
                     pass
 
-    async def _geetest_captcha(
+    def _geetest_captcha(
         self, driver: webdriver.Remote, login: str, password: str
     ):
-        solver = JigSawSolver(driver)
-        solver.solve()
+        key = ""
 
-    async def _sec_code_enter(self, driver, login):
+        def find_offset(piece: np.ndarray, background: np.ndarray) -> int:
+            nonlocal key
+            key = dhash(background)
+
+            def position() -> str:
+                return str(PuzzleSolver(piece, background).get_position())
+
+            return int(self._cached("jigsaw", key, position))
+
+        JigSawSolver(driver, find_offset=find_offset).solve()
+        self._record_outcome(driver, "jigsaw", key, (By.CLASS_NAME, "verify-slider"))
+
+    def _sec_code_enter(self, driver, login):
         for _ in range(3):
             for code in driver.find_elements(By.XPATH, "//*[text()='Get Code']"):
                 time.sleep(self.PG_LOAD_TIMEOUT)
@@ -477,19 +473,25 @@ class BinanceAuthenticator:
             if len(auth_inputs) > 0:
                 auth_input = auth_inputs[0]
 
-            email_code = await self._user_question_repo.query(
-                login, question=UserInteractionEnum.ASK_EMAIL_CODE
+            email_code = self._await(
+                self._user_question_repo.query(
+                    login, question=UserInteractionEnum.ASK_EMAIL_CODE
+                )
             )
-            phone_code = await self._user_question_repo.query(
-                login, question=UserInteractionEnum.ASK_PHONE_CODE
+            phone_code = self._await(
+                self._user_question_repo.query(
+                    login, question=UserInteractionEnum.ASK_PHONE_CODE
+                )
             )
             email_input.send_keys(Keys.CONTROL + "a")
             phone_input.send_keys(Keys.CONTROL + "a")
             email_input.send_keys(email_code)
             phone_input.send_keys(phone_code)
             if auth_input is not None:
-                auth_code = await self._user_question_repo.query(
-                    login, question=UserInteractionEnum.ASK_AUTH_CODE
+                auth_code = self._await(
+                    self._user_question_repo.query(
+                        login, question=UserInteractionEnum.ASK_AUTH_CODE
+                    )
                 )
                 auth_input.send_keys(Keys.CONTROL + "a")
                 auth_input.send_keys(auth_code)
@@ -510,7 +512,7 @@ class BinanceAuthenticator:
 
         logger.error("Security codes failed after 3 attempts")
 
-    async def _login_enter(self, driver, login, password):
+    def _login_enter(self, driver, login, password):
         login_input = driver.find_element(By.NAME, "username")
         login_input.send_keys(Keys.CONTROL + "a")
         login_input.send_keys(login)
@@ -523,7 +525,7 @@ class BinanceAuthenticator:
         driver.execute_script("arguments[0].click()", btn)
         logger.debug("login clicked")
 
-    async def _pass_enter(self, driver, login, password):
+    def _pass_enter(self, driver, login, password):
         pass_input = driver.find_element(By.NAME, "password")
         pass_input.send_keys(Keys.CONTROL + "a")
         pass_input.send_keys(password)
@@ -536,13 +538,7 @@ class BinanceAuthenticator:
         driver.execute_script("arguments[0].click()", btn)
         logger.debug("pass clicked")
 
-    async def get_auth_headers(self, login: str, password: str) -> dict:
-        logger.debug(
-            f"{self._driver_url}, {self._remote_driver}, {os.getenv('SERVICE')}"
-        )
-        await self._user_question_repo.put_notification(
-            user_id=login, notification=UserInteractionEnum.AUTH_REQUIRED
-        )
+    def _new_driver(self) -> webdriver.Remote:
         if self._remote_driver:
             options = uc.ChromeOptions()
             try:
@@ -550,47 +546,115 @@ class BinanceAuthenticator:
                     self._driver_url,
                     desired_capabilities=DesiredCapabilities.CHROME,
                     options=options,
-                    seleniumwire_options={"addr": os.getenv("SERVICE"), "port": 8087},
+                    seleniumwire_options={
+                        "addr": os.getenv("SERVICE"),
+                        "port": self._proxy_port,
+                    },
                 )
             except Exception as ex:
                 logger.error(ex)
-                await self._user_question_repo.put_notification(
-                    user_id=login, notification=UserInteractionEnum.AUTH_FAILED
-                )
                 raise
         else:
             driver = webdriver.Chrome(self._driver_url)
-        logger.debug(driver)
-        driver.get(self.LOGIN_URL)
-
-        logger.debug("waiting security verification")
-        res = None
-        for _ in range(30):
+        driver.scopes = self.CAPTURE_SCOPES
+        return driver
+
+    def _login(self, login: str, password: str) -> Optional[dict]:
+        captured: Dict[str, str] = {}
+        submitted = threading.Event()
+        authenticated = threading.Event()
+
+        def intercept(request):
+            # called from seleniumwire's proxy thread, the login page calls
+            # the API too before anyone is logged in
+            token = request.headers.get(self.AUTH_HEADER)
+            if (
+                submitted.is_set()
+                and not authenticated.is_set()
+                and self.API_URL in request.url
+                and token
+                and token != self.ANONYMOUS_TOKEN
+            ):
+                captured.update(dict(request.headers))
+                authenticated.set()
+
+        with self._pool.driver() as driver:
+            logger.debug(driver)
+            driver.request_interceptor = intercept
             try:
-                res = await self._try_next_action(driver, login, password)
-                if res is not None:
-                    break
-            except:
-                pass
+                driver.get(self.LOGIN_URL)
+
+                logger.debug("waiting security verification")
+                res = None
+                for _ in range(30):
+                    if authenticated.is_set():
+                        # the site already calls the API on the user's behalf
+                        break
+                    try:
+                        res = self._try_next_action(
+                            driver, login, password, submitted
+                        )
+                        if res is not None:
+                            break
+                    except:
+                        pass
+
+                if authenticated.is_set():
+                    logger.debug(f"all done. {captured}")
+                    return captured
+                if res:
+                    logger.debug("login succeed")
+                    # no call carried the auth header, take the last API call
+                    for req in reversed(driver.requests):
+                        if self.API_URL in req.url and len(req.headers) > 0:
+                            logger.debug(f"all done. {req.headers}")
+                            return dict(req.headers)
+                return None
+            finally:
+                del driver.request_interceptor
+
+    def _warmed(self, warming: asyncio.Future):
+        if not warming.cancelled() and warming.exception() is None:
+            return
+        if not warming.cancelled():
+            logger.warning(f"browser warm up failed: {warming.exception()!r}")
+        # the next login retries it
+        self._warming = None
+
+    def close(self):
+        self._pool.close()
 
-        if res:
-            logger.debug("login succeed")
+    async def get_auth_headers(self, login: str, password: str) -> dict:
+        logger.debug(
+            f"{self._driver_url}, {self._remote_driver}, {os.getenv('SERVICE')}"
+        )
+        await self._user_question_repo.put_notification(
+            user_id=login, notification=UserInteractionEnum.AUTH_REQUIRED
+        )
+        self._loop = asyncio.get_running_loop()
+        if self._warming is None:
+            self._warming = self._loop.run_in_executor(
+                self._warm_executor, self._pool.warm
+            )
+            self._warming.add_done_callback(self._warmed)
+        try:
+            headers = await self._loop.run_in_executor(
+                self._executor, self._login, login, password
+            )
+        except Exception:
+            await self._user_question_repo.put_notification(
+                user_id=login, notification=UserInteractionEnum.AUTH_FAILED
+            )
+            raise
+        if headers is None:
+            logger.debug("login UNsucceed")
             await self._user_question_repo.put_notification(
-                user_id=login, notification=UserInteractionEnum.AUTHENTICATED
+                user_id=login, notification=UserInteractionEnum.AUTH_FAILED
             )
-            # wait until "Deposit" btn appeared
-            # fully loaded
-            for idx in range(len(driver.requests) - 1, 0, -1):
-                req = driver.requests[idx]
-                if "https://www.binance.com/bapi" in req.url and len(req.headers) > 0:
-                    logger.debug(f"all done. {req.headers}")
-                    driver.quit()
-                    return dict(req.headers)
-        logger.debug("login UNsucceed")
+            # wait for other lock to be expired
+            await asyncio.sleep(5)
+            raise ValueError("headers were not found")
         await self._user_question_repo.put_notification(
-            user_id=login, notification=UserInteractionEnum.AUTH_FAILED
+            user_id=login, notification=UserInteractionEnum.AUTHENTICATED
         )
-        driver.quit()
-        # wait for other lock to be expired
-        await asyncio.sleep(5)
-        raise ValueError("headers were not found")
+        return headers
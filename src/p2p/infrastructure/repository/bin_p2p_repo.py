@@ -1,72 +1,200 @@
+import asyncio
 import json
-from datetime import datetime
-from functools import partial
+from datetime import datetime, timedelta
+from email.utils import parsedate_to_datetime
+from http import HTTPStatus
 from math import ceil
-from typing import Any, Dict, List, Optional, Tuple
+from typing import (TYPE_CHECKING, Any, Callable, Dict, List, Mapping,
+                    Optional, Tuple)
 
-import requests
+import aiohttp
 from loguru import logger
-from p2p.application import (Advertisement, AuthRepo, Direction, LockerRepo,
-                             Order, P2PAdapter, P2POrderRepo, Pair,
-                             PaymentMethod, PeerOffer, QueueRepo, User,
+from p2p.application import (Advertisement, AuthRepo, CircuitBreakerRepo,
+                             Direction, LockerRepo, MetricsRepo, Order,
+                             P2PAdapter, P2POrderRepo, Pair, PaymentMethod,
+                             PayMethodRepo, PeerOffer, QueueRepo,
+                             RateLimiterRepo, SessionRepo, User,
                              UserInteractionEnum, UserRepo)
 from p2p.application.foundation import Currency, Exchange
 
-from .bin_auth import BinanceAuthenticator
+from .lru_cache import LRUCache
+
+if TYPE_CHECKING:
+    from .bin_auth import BinanceAuthenticator
 
 
 class BinanceP2PRepo(P2POrderRepo):
+    class Rejected(ValueError):
+        """The request was answered with success false"""
+
+        def __init__(self, code: Optional[str], message: str, data: Any) -> None:
+            super().__init__(f"{message} {data}")
+            self.code = code
+            self.message = message
+
     BASE_URL = "https://p2p.binance.com/bapi/c2c/v2"
+    # method, path, rate limit weight
     URLS = {
-        P2POrderRepo.URL.ORDERBOOK: ("POST", "friendly/c2c/adv/search"),
-        P2POrderRepo.URL.UPDATE: ("POST", "private/c2c/adv/update"),
-        P2POrderRepo.URL.CREATE: ("POST", "private/c2c/adv/publish"),
+        P2POrderRepo.URL.ORDERBOOK: ("POST", "friendly/c2c/adv/search", 1),
+        P2POrderRepo.URL.UPDATE: ("POST", "private/c2c/adv/update", 2),
+        P2POrderRepo.URL.CREATE: ("POST", "private/c2c/adv/publish", 2),
         P2POrderRepo.URL.PAY_LIST: (
             "POST",
             "private/c2c/pay-method/user-paymethods",
+            1,
         ),
-        P2POrderRepo.URL.MY_ORDERS: ("POST", "private/c2c/adv/list-by-page"),
-        P2POrderRepo.URL.MY_OFFERS: ("POST", "private/c2c/order-match/order-list"),
-        P2POrderRepo.URL.DELETE: ("POST", "private/c2c/adv/update-status"),
+        P2POrderRepo.URL.MY_ORDERS: ("POST", "private/c2c/adv/list-by-page", 1),
+        P2POrderRepo.URL.MY_OFFERS: (
+            "POST",
+            "private/c2c/order-match/order-list",
+            1,
+        ),
+        P2POrderRepo.URL.DELETE: ("POST", "private/c2c/adv/update-status", 2),
     }
     glob_headers = {
         "Accept": "*/*",
         "Host": "p2p.binance.com",
-        "Accept-Encoding": "gzip, deflate, br",
+        "Accept-Encoding": "gzip, deflate",
         "content-type": "application/json",
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10.15; rv:101.0) Gecko/20100101 Firefox/101.0",
     }
+    # captured browser headers describe the browser's own request body
+    skip_headers = {"content-length", "transfer-encoding", "connection"}
+    # besides 5xx these open the endpoint's circuit breaker
+    throttle_statuses = {HTTPStatus.TOO_MANY_REQUESTS, 418}
+    # rejections naming these are about unknown or stale pay methods
+    pay_method_rejections = ("payment method", "pay method", "paymethod", "payid")
 
     def __init__(
         self,
         adapter: P2PAdapter,
-        auth_provider: BinanceAuthenticator,
+        auth_provider: Callable[[], "BinanceAuthenticator"],
         auth_repo: AuthRepo,
         user_repo: UserRepo,
         locker_repo: LockerRepo,
         user_question_repo: QueueRepo,
+        rate_limiter: RateLimiterRepo,
+        circuit_breaker: CircuitBreakerRepo,
+        pay_method_repo: PayMethodRepo,
+        metrics_repo: MetricsRepo,
+        session_repo: SessionRepo,
+        timeout: int = 10,
+        limit_per_host: int = 20,
+        page_size: int = 20,
+        auth_cache_size: int = 1024,
+        auth_cache_ttl: int = 300,
     ):
         super().__init__(adapter)
-        self._session = requests.Session()
-        self._session.headers.update(self.glob_headers)
-        self._authenticator = auth_provider
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._limit_per_host = limit_per_host
+        self._page_size = page_size
+        # created on the first login, see p2p.wiring
+        self._auth_provider = auth_provider
         self._locker_repo = locker_repo
+        self._rate_limiter = rate_limiter
+        self._breaker = circuit_breaker
+        self._pay_method_repo = pay_method_repo
+        self._metrics = metrics_repo
+        self._session_repo = session_repo
         self._user_repo = user_repo
         self._auth_repo = auth_repo
         self._notify_repo = user_question_repo
-        self._user2auth_mapping: Dict[str, Tuple[datetime, Dict]] = {}
+        # user_id -> (user, auth headers, fetched at)
+        self._auth_cache: LRUCache[Tuple[User, Dict, datetime]] = LRUCache(
+            maxsize=auth_cache_size, ttl=auth_cache_ttl
+        )
 
     async def get_payment_methods(self, user_id: str) -> List[str]:
-        result = []
+        registry = await self._fetch_payment_methods(user_id)
+        return list(registry.keys())
+
+    async def _fetch_payment_methods(self, user_id: str) -> Dict[PaymentMethod, dict]:
+        registry = {}
         headers = await self._add_auth_headers(user_id)
         headers.update({"Referer": "https://p2p.binance.com/en/postAd"})
         methods = await self._query(
             self.URL.PAY_LIST, user_id, data={}, headers=headers
         )
         for method in methods["data"]:
-            self._adapter.decode_payment_methods(method)
-            result.append(method["identifier"])
-        return result
+            entry = self._adapter.decode_payment_methods(method)
+            registry[PaymentMethod(method["identifier"])] = entry
+        await self._pay_method_repo.put(Exchange.BINANCE, user_id, registry)
+        return registry
+
+    async def _cached_payment_methods(self, user_id: str) -> Dict[PaymentMethod, dict]:
+        try:
+            return await self._pay_method_repo.get(Exchange.BINANCE, user_id)
+        except self._pay_method_repo.NotFound:
+            return await self._fetch_payment_methods(user_id)
+
+    async def _write_ads(
+        self,
+        url_id: P2POrderRepo.URL,
+        user_id: str,
+        ads: Advertisement,
+        serialize: Callable[[Advertisement, Dict[PaymentMethod, dict]], dict],
+        headers: dict,
+    ):
+        registry = await self._cached_payment_methods(user_id)
+        try:
+            data = serialize(ads, registry)
+        except KeyError:
+            # the method was added after the registry had been cached
+            registry = await self._fetch_payment_methods(user_id)
+            data = serialize(ads, registry)
+        try:
+            await self._query(url_id, user_id=user_id, data=data, headers=headers)
+        except self.Rejected as ex:
+            # stale pay ids are rejected, next write will fetch them anew
+            message = ex.message.lower()
+            if any(word in message for word in self.pay_method_rejections):
+                await self._pay_method_repo.invalidate(Exchange.BINANCE, user_id)
+            raise
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # the session is bound to the loop it was created in
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            connector = aiohttp.TCPConnector(limit_per_host=self._limit_per_host)
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=self._timeout,
+                headers=self.glob_headers,
+            )
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _send(
+        self,
+        method: str,
+        url: str,
+        headers: dict,
+        data: Optional[dict] = None,
+        cookies: Optional[dict] = None,
+    ) -> Tuple[int, Mapping[str, str], str]:
+        session = await self._get_session()
+        headers = {
+            k: v for k, v in headers.items() if k.lower() not in self.skip_headers
+        }
+        if method == "GET":
+            kwargs: Dict[str, Any] = {"params": data}
+        else:
+            kwargs = {"data": json.dumps(data, separators=(",", ":"))}
+        async with session.request(
+            method, url, headers=headers, cookies=cookies, **kwargs
+        ) as resp:
+            return resp.status, resp.headers, await resp.text()
 
     async def _query(
         self,
@@ -78,52 +206,121 @@ class BinanceP2PRepo(P2POrderRepo):
     ):
         url = f"{self.BASE_URL}/{self.URLS[url_id][1]}"
         logger.info(url)
+        if user_id is None:
+            # public endpoints are guarded by the rate limiter only
+            return await self._request(url_id, url, None, headers, data, cookies)
         lock = await self._locker_repo.get_lock(
             Exchange.BINANCE, name=user_id, blocking=True
         )
         async with lock:
-            req_headers = {}
-            if headers is not None and isinstance(headers, dict):
-                req_headers.update(headers)
-
-            if self.URLS[url_id][0] == "GET":
-                method = partial(self._session.get, url, params=data, cookies=cookies)
-            else:
-                data = json.dumps(data, separators=(",", ":"))
-                method = partial(self._session.post, url, data=data, cookies=cookies)
-            resp = method(headers=req_headers)
-            logger.debug(resp.status_code)
-            if resp.status_code == requests.status_codes.codes.unauthorized:
-                if user_id is not None:
-                    user = await self._user_repo.get_by_presentation_id(user_id)
-                    auth_lock = await self._locker_repo.get_lock(
-                        Exchange.BINANCE, blocking=True
-                    )
-                    async with auth_lock:
-                        auth_headers = await self._generate_headers(user)
-                    req_headers.update(auth_headers)
-                    resp = method(headers=req_headers)
+            return await self._request(url_id, url, user_id, headers, data, cookies)
 
+    async def _limited_send(
+        self,
+        url_id: P2POrderRepo.URL,
+        url: str,
+        headers: dict,
+        data: Optional[dict] = None,
+        cookies: Optional[dict] = None,
+    ) -> Tuple[int, Mapping[str, str], str]:
+        method, path, weight = self.URLS[url_id]
+        try:
+            probe = await self._breaker.check(Exchange.BINANCE, path)
+        except CircuitBreakerRepo.Open as ex:
+            raise self.Unavailable(str(ex)) from ex
+        await self._rate_limiter.acquire(Exchange.BINANCE, path, weight)
+        try:
+            status, resp_headers, text = await self._send(
+                method, url, headers, data=data, cookies=cookies
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as ex:
+            await self._breaker.record_failure(Exchange.BINANCE, path)
+            raise self.Unavailable(f"{url}: {ex!r}") from ex
+        if (
+            status in self.throttle_statuses
+            or status >= HTTPStatus.INTERNAL_SERVER_ERROR
+        ):
+            delay = await self._breaker.record_failure(
+                Exchange.BINANCE, path, self._retry_after(resp_headers)
+            )
+            raise self.Unavailable(f"{status} {url}, backing off for {delay:.1f}s")
+        if probe:
+            await self._breaker.record_success(Exchange.BINANCE, path)
+        return status, resp_headers, text
+
+    @staticmethod
+    def _retry_after(headers: Mapping[str, str]) -> Optional[float]:
+        value = headers.get("Retry-After")
+        if value is None:
+            return None
+        try:
+            return float(value)
+        except ValueError:
+            pass
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        return max(0.0, (when - datetime.now(when.tzinfo)).total_seconds())
+
+    async def _request(
+        self,
+        url_id: P2POrderRepo.URL,
+        url: str,
+        user_id: Optional[str],
+        headers: Optional[dict],
+        data: Optional[dict],
+        cookies: Optional[dict],
+    ):
+        req_headers = {}
+        if headers is not None and isinstance(headers, dict):
+            req_headers.update(headers)
+
+        for attempt in range(2):
+            fetched_at = self._auth_fetched_at(user_id)
+            status, _, text = await self._limited_send(
+                url_id, url, req_headers, data=data, cookies=cookies
+            )
+            logger.debug(status)
+            if status != HTTPStatus.UNAUTHORIZED or user_id is None:
+                break
+            self._auth_cache.pop(user_id)
+            updated_at = await self._auth_updated_at(user_id)
             if (
-                requests.status_codes.codes.multiple_choices < resp.status_code
-                or resp.status_code < requests.status_codes.codes.ok
+                attempt == 0
+                and fetched_at is not None
+                and updated_at is not None
+                and fetched_at < updated_at
             ):
-                raise ValueError(
-                    f"unexpcted response {resp.status_code} {url}, {req_headers}, {data}, {resp.text}"
+                # the session was renewed elsewhere after these headers were read
+                logger.info(f"{user_id} headers were replaced, retrying")
+                req_headers.update(await self._add_auth_headers(user_id))
+                continue
+            # logging in takes minutes, leave it to the session renewal
+            if updated_at is not None:
+                await self._session_repo.record_lifetime(
+                    Exchange.BINANCE, (datetime.utcnow() - updated_at).total_seconds()
+                )
+            await self._session_repo.mark_expired(Exchange.BINANCE, user_id)
+            raise self.AuthFailed(f"session of {user_id} has expired")
+
+        if HTTPStatus.MULTIPLE_CHOICES < status or status < HTTPStatus.OK:
+            raise ValueError(
+                f"unexpcted response {status} {url}, {req_headers}, {data}, {text}"
+            )
+        res = json.loads(text)
+        if "success" in res and res["success"] != True:
+            if "Ad remaining balance should not be less than 100" in res["message"]:
+                logger.warning(f"{res['message']} {data}")
+                return res
+            if user_id is not None:
+                await self._notify_repo.put_notification(
+                    user_id,
+                    UserInteractionEnum.GENERIC_ERROR,
+                    arbitrary=str(res["message"]),
                 )
-            res = resp.json()
-            if "success" in res and res["success"] != True:
-                if "Ad remaining balance should not be less than 100" in res["message"]:
-                    logger.warning(f"{res['message']} {data}")
-                    return res
-                if user_id is not None:
-                    await self._notify_repo.put_notification(
-                        user_id,
-                        UserInteractionEnum.GENERIC_ERROR,
-                        arbitrary=str(res["message"]),
-                    )
-                raise ValueError(f"{res['message']} {data}")
-            return res
+            raise self.Rejected(res.get("code"), str(res["message"]), data)
+        return res
 
     async def get_orderbook(
         self,
@@ -133,13 +330,12 @@ class BinanceP2PRepo(P2POrderRepo):
         direction: Direction,
         rows: int = 30,
     ) -> List[Order]:
-        max_rows = 10
-        pages = int(ceil(rows / max_rows))
-        result = []
+        pages = int(ceil(rows / self._page_size))
+        queries = []
         for pg in range(pages):
             data = {
                 "page": pg + 1,
-                "rows": max_rows,
+                "rows": self._page_size,
                 "payTypes": [x for x in pay_methods],
                 "countries": [],
                 "publisherType": None,
@@ -147,44 +343,99 @@ class BinanceP2PRepo(P2POrderRepo):
                 "tradeType": direction.value,
                 "fiat": fiat,
             }
-            response = await self._query(P2POrderRepo.URL.ORDERBOOK, data=data)
+            queries.append(self._query(P2POrderRepo.URL.ORDERBOOK, data=data))
+        result = []
+        for response in await asyncio.gather(*queries):
             for ad in response["data"]:
                 order = self._adapter.decode_order_book_entry(ad)
                 result.append(order)
         return result[:rows]
 
     async def _add_auth_headers(self, user_id: str) -> Dict:
-        user = await self._user_repo.get_by_presentation_id(user_id)
         try:
-            auth_headers = await self._auth_repo.read(user.login)
-        except:
-            auth_headers = await self._generate_headers(user)
-        return auth_headers
+            _, auth_headers, _ = self._auth_cache.get(user_id)
+            self._metrics.incr("auth_cache_hits")
+        except KeyError:
+            self._metrics.incr("auth_cache_misses")
+            if await self._session_repo.is_expired(Exchange.BINANCE, user_id):
+                # the stored headers were rejected, wait for the auth worker
+                raise self.AuthFailed(f"session of {user_id} is being renewed")
+            user = await self._user_repo.get_by_presentation_id(user_id)
+            try:
+                auth_headers = await self._auth_repo.read(user.login)
+            except Exception as ex:
+                await self._session_repo.mark_expired(Exchange.BINANCE, user_id)
+                raise self.AuthFailed(f"{user_id} has never logged in") from ex
+            self._auth_cache.put(user_id, (user, auth_headers, datetime.utcnow()))
+        # callers extend the headers per request
+        return dict(auth_headers)
 
     async def _generate_headers(self, user: User) -> Dict:
-        auth_headers = await self._authenticator.get_auth_headers(
+        auth_headers = await self._auth_provider().get_auth_headers(
             user.login, user.password
         )
         await self._auth_repo.save(user.login, auth_headers)
+        self._auth_cache.put(
+            str(user.presentation_id), (user, auth_headers, datetime.utcnow())
+        )
         return auth_headers
 
+    def _auth_fetched_at(self, user_id: Optional[str]) -> Optional[datetime]:
+        """When the cached headers of the user were read from the auth repo"""
+        if user_id is None:
+            return None
+        try:
+            _, _, fetched_at = self._auth_cache.get(user_id)
+        except KeyError:
+            return None
+        return fetched_at
+
+    async def _auth_updated_at(self, user_id: str) -> Optional[datetime]:
+        user = await self._user_repo.get_by_presentation_id(user_id)
+        try:
+            return await self._auth_repo.updated_at(user.login)
+        except Exception as ex:
+            logger.warning(f"no auth data update time of {user_id}: {ex!r}")
+            return None
+
+    async def session_age(self, user_id: str) -> Optional[timedelta]:
+        updated_at = await self._auth_updated_at(user_id)
+        if updated_at is None:
+            return None
+        return datetime.utcnow() - updated_at
+
+    async def renew_session(self, user_id: str):
+        user = await self._user_repo.get_by_presentation_id(user_id)
+        # the authenticator bounds the browsers, here only logins of the
+        # same user are serialised
+        auth_lock = await self._locker_repo.get_lock(
+            Exchange.BINANCE, name=f"{user_id}_login", blocking=True
+        )
+        async with auth_lock:
+            await self._generate_headers(user)
+        await self._session_repo.clear_expired(Exchange.BINANCE, user_id)
+
     async def update_order(self, user_id: str, ads: Advertisement):
-        await self.get_payment_methods(user_id)
-        data = self._adapter.serialize_ads_update(ads)
         headers = await self._add_auth_headers(user_id)
         headers.update(
             {"Referer": f"https://p2p.binance.com/en/advEdit?code={ads.offer_id}"}
         )
-        await self._query(
-            P2POrderRepo.URL.UPDATE, user_id=user_id, data=data, headers=headers
+        await self._write_ads(
+            P2POrderRepo.URL.UPDATE,
+            user_id,
+            ads,
+            self._adapter.serialize_ads_update,
+            headers,
         )
 
     async def place_order(self, user_id: str, ads: Advertisement):
-        await self.get_payment_methods(user_id)
-        data = self._adapter.serialize_ads_create(ads)
         headers = await self._add_auth_headers(user_id)
-        await self._query(
-            P2POrderRepo.URL.CREATE, user_id=user_id, data=data, headers=headers
+        await self._write_ads(
+            P2POrderRepo.URL.CREATE,
+            user_id,
+            ads,
+            self._adapter.serialize_ads_create,
+            headers,
         )
 
     async def delete_order(self, user_id: str, ads_id: str):
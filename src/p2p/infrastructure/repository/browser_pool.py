@@ -0,0 +1,145 @@
+import threading
+from contextlib import contextmanager
+from typing import (Callable, Dict, Generic, Iterator, List, Optional,
+                    Sequence, Tuple, TypeVar)
+
+from loguru import logger
+
+D = TypeVar("D")
+
+
+class BrowserPool(Generic[D]):
+    """Started WebDriver sessions reused between logins.
+
+    At most `size` drivers exist at a time. An idle driver is health
+    checked before it's handed out and reset when it's given back: the
+    cookies and the seleniumwire request log are dropped. A driver is
+    quit after `max_uses` logins or when a login fails with an error.
+    Thread safe, drivers are used from the authenticator's threads.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], D],
+        size: int = 2,
+        max_uses: int = 10,
+        reset_urls: Sequence[str] = (),
+    ) -> None:
+        self._factory = factory
+        self._size = size
+        self._max_uses = max_uses
+        # cookies can be deleted per domain only unless CDP is available
+        self._reset_urls = reset_urls
+        self._cond = threading.Condition()
+        self._idle: List[Tuple[D, int]] = []
+        self._uses: Dict[int, int] = {}
+        self._started = 0
+
+    def __len__(self) -> int:
+        return self._started
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def warm(self):
+        """Start drivers up to the pool size"""
+        while True:
+            with self._cond:
+                if self._started >= self._size:
+                    return
+                self._started += 1
+            driver = self._start()
+            with self._cond:
+                self._idle.append((driver, 0))
+                self._cond.notify()
+
+    def acquire(self, timeout: Optional[float] = None) -> D:
+        while True:
+            with self._cond:
+                if not self._cond.wait_for(
+                    lambda: self._idle or self._started < self._size, timeout
+                ):
+                    raise TimeoutError("no browser available")
+                entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    self._started += 1
+            # browsers start slowly, not under the lock
+            driver, uses = (self._start(), 0) if entry is None else entry
+            if uses == 0 or self._healthy(driver):
+                with self._cond:
+                    self._uses[id(driver)] = uses
+                return driver
+            logger.warning(f"browser {driver} is unhealthy, replacing")
+            self._discard(driver)
+
+    def release(self, driver: D, discard: bool = False):
+        with self._cond:
+            uses = self._uses.pop(id(driver)) + 1
+        if discard or uses >= self._max_uses or not self._reset(driver):
+            self._discard(driver)
+            return
+        with self._cond:
+            self._idle.append((driver, uses))
+            self._cond.notify()
+
+    @contextmanager
+    def driver(self, timeout: Optional[float] = None) -> Iterator[D]:
+        driver = self.acquire(timeout)
+        try:
+            yield driver
+        except BaseException:
+            self.release(driver, discard=True)
+            raise
+        self.release(driver)
+
+    def close(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+        for driver, _ in idle:
+            self._discard(driver)
+
+    def _start(self) -> D:
+        # the slot is taken by the caller
+        try:
+            return self._factory()
+        except Exception:
+            with self._cond:
+                self._started -= 1
+                self._cond.notify()
+            raise
+
+    def _discard(self, driver: D):
+        try:
+            driver.quit()  # type: ignore
+        except Exception as ex:
+            logger.warning(f"browser quit failed: {ex}")
+        with self._cond:
+            self._started -= 1
+            self._cond.notify()
+
+    @staticmethod
+    def _healthy(driver) -> bool:
+        try:
+            driver.current_url
+        except Exception:
+            return False
+        return True
+
+    def _reset(self, driver) -> bool:
+        try:
+            try:
+                driver.execute_cdp_cmd("Network.clearBrowserCookies", {})
+            except Exception:
+                for url in self._reset_urls:
+                    driver.get(url)
+                    driver.delete_all_cookies()
+                driver.delete_all_cookies()
+            if hasattr(driver, "requests"):
+                # seleniumwire's captured traffic
+                del driver.requests
+            driver.get("about:blank")
+        except Exception as ex:
+            logger.warning(f"browser reset failed: {ex}")
+            return False
+        return True
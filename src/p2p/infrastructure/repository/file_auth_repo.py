@@ -1,5 +1,6 @@
 import json
 import os
+from datetime import datetime
 
 from p2p.application import AuthRepo
 
@@ -19,3 +20,6 @@ class FileAuthRepo(AuthRepo):
                 if len(raw) > 0:
                     return json.loads(raw)
         return {}
+
+    async def updated_at(self, uuid: str) -> datetime:
+        return datetime.utcfromtimestamp(os.path.getmtime(self._f_name))
@@ -0,0 +1,102 @@
+"""Compact binary layout of the cached orderbooks
+
+Only what the pricing reads is kept: price, amounts, digits, direction and
+the maker's visible name. The asset, fiat and payment methods come back
+from the book's key, the other fields as their defaults. The orders were
+validated before being encoded, they're built back without validation.
+
+    header   version, fetched_at, count, price/min/max amount scales
+    columns  price, min_amount, max_amount as int64 scaled by 10 ** scale
+             digits, direction as uint8
+             maker name lengths as uint16, then the utf-8 names
+"""
+import struct
+from decimal import Decimal
+from typing import List, Sequence, Tuple, Union
+
+from p2p.application import (CompactOrder, Direction, Maker, Order,
+                             OrderBookKey)
+
+VERSION = 1
+
+HEADER = struct.Struct("<BdI3B")
+DIRECTIONS = list(Direction)
+
+
+class UnknownFormat(ValueError):
+    pass
+
+
+def _scale(values: Sequence[Decimal]) -> int:
+    return max((max(-v.as_tuple().exponent, 0) for v in values), default=0)
+
+
+def _to_scaled(values: Sequence[Decimal], scale: int) -> List[int]:
+    return [int(v.scaleb(scale)) for v in values]
+
+
+def _from_scaled(values: Sequence[int], scale: int) -> List[Decimal]:
+    return [Decimal(v).scaleb(-scale) for v in values]
+
+
+def encode_orderbook(fetched_at: float, orders: List[Order]) -> bytes:
+    n = len(orders)
+    columns = (
+        [o.price for o in orders],
+        [o.min_amount for o in orders],
+        [o.max_amount for o in orders],
+    )
+    scales = [_scale(c) for c in columns]
+    names = [o.maker.visible_name.encode() for o in orders]
+    parts = [HEADER.pack(VERSION, fetched_at, n, *scales)]
+    for column, scale in zip(columns, scales):
+        parts.append(struct.pack(f"<{n}q", *_to_scaled(column, scale)))
+    parts.append(struct.pack(f"<{n}B", *(o.digits for o in orders)))
+    parts.append(
+        struct.pack(f"<{n}B", *(DIRECTIONS.index(o.direction) for o in orders))
+    )
+    parts.append(struct.pack(f"<{n}H", *(len(name) for name in names)))
+    parts.extend(names)
+    return b"".join(parts)
+
+
+def decode_orderbook(
+    data: bytes, key: OrderBookKey, compact: bool = False
+) -> Tuple[float, List[Union[Order, CompactOrder]]]:
+    if not data or data[0] != VERSION:
+        raise UnknownFormat(f"unsupported orderbook encoding {data[:1]!r}")
+    _, fetched_at, n, *scales = HEADER.unpack_from(data)
+    offset = HEADER.size
+    columns = []
+    for scale in scales:
+        columns.append(_from_scaled(struct.unpack_from(f"<{n}q", data, offset), scale))
+        offset += 8 * n
+    prices, min_amounts, max_amounts = columns
+    digits = struct.unpack_from(f"<{n}B", data, offset)
+    directions = struct.unpack_from(f"<{n}B", data, offset + n)
+    lengths = struct.unpack_from(f"<{n}H", data, offset + 2 * n)
+    offset += 4 * n
+    build = CompactOrder if compact else Order.construct
+    orders = []
+    for i in range(n):
+        name = data[offset : offset + lengths[i]].decode()
+        offset += lengths[i]
+        orders.append(
+            build(
+                payment_methods=list(key.pay_methods),
+                direction=DIRECTIONS[directions[i]],
+                asset=key.pair.asset,
+                fiat=key.pair.fiat,
+                price=prices[i],
+                min_amount=min_amounts[i],
+                max_amount=max_amounts[i],
+                digits=digits[i],
+                maker=Maker.construct(
+                    user_no="",
+                    visible_name=name,
+                    success_rate=Decimal(0),
+                    orders_count=0,
+                ),
+            )
+        )
+    return fetched_at, orders
@@ -0,0 +1,105 @@
+import base64
+from typing import List
+
+import cv2
+import numpy as np
+from PIL import Image
+
+PIXELS_EXTENSION = 10
+
+
+class PuzzleSolver:
+    """Finds the gap for a puzzle piece, both are BGR images"""
+
+    def __init__(self, piece: np.ndarray, background: np.ndarray):
+        self.piece = piece
+        self.background = background
+
+    def get_position(self):
+        template, x_inf, y_sup, y_inf = self.__piece_preprocessing()
+        background = self.__background_preprocessing(y_sup, y_inf)
+
+        res = cv2.matchTemplate(background, template, cv2.TM_CCOEFF_NORMED)
+        min_val, max_val, min_loc, max_loc = cv2.minMaxLoc(res)
+        top_left = max_loc
+
+        origin = x_inf
+        end = top_left[0] + PIXELS_EXTENSION
+
+        return end - origin
+
+    def __background_preprocessing(self, y_sup, y_inf):
+        background = self.__sobel_operator(self.background)
+        background = background[y_sup:y_inf, :]
+        return np.pad(background, ((PIXELS_EXTENSION, PIXELS_EXTENSION), (0, 0)))
+
+    def __piece_preprocessing(self):
+        img = self.__sobel_operator(self.piece)
+        x, w, y, h = self.__crop_piece(img)
+        template = img[y:h, x:w]
+        return np.pad(template, PIXELS_EXTENSION), x, y, h
+
+    def __crop_piece(self, img):
+        rows, columns = np.nonzero(img)
+        if len(rows) == 0:
+            raise ValueError("puzzle piece is not found")
+        return columns.min(), columns.max(), rows.min(), rows.max()
+
+    def __sobel_operator(self, img):
+        scale = 1
+        delta = 0
+        ddepth = cv2.CV_16S
+
+        img = cv2.GaussianBlur(img, (3, 3), 0)
+        gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+        grad_x = cv2.Sobel(
+            gray,
+            ddepth,
+            1,
+            0,
+            ksize=3,
+            scale=scale,
+            delta=delta,
+            borderType=cv2.BORDER_DEFAULT,
+        )
+        grad_y = cv2.Sobel(
+            gray,
+            ddepth,
+            0,
+            1,
+            ksize=3,
+            scale=scale,
+            delta=delta,
+            borderType=cv2.BORDER_DEFAULT,
+        )
+        abs_grad_x = cv2.convertScaleAbs(grad_x)
+        abs_grad_y = cv2.convertScaleAbs(grad_y)
+        grad = cv2.addWeighted(abs_grad_x, 0.5, abs_grad_y, 0.5, 0)
+
+        return grad
+
+
+def pil_to_bgr(img: Image.Image) -> np.ndarray:
+    return cv2.cvtColor(np.asarray(img.convert("RGB")), cv2.COLOR_RGB2BGR)
+
+
+def b64_to_bgr(data: str) -> np.ndarray:
+    buf = np.frombuffer(base64.b64decode(data), dtype=np.uint8)
+    return cv2.imdecode(buf, cv2.IMREAD_COLOR)
+
+
+def dhash(img: np.ndarray, size: int = 8) -> str:
+    """Difference hash, stable across re-encoding and slight rescaling"""
+    gray = cv2.cvtColor(img, cv2.COLOR_BGR2GRAY)
+    small = cv2.resize(gray, (size + 1, size), interpolation=cv2.INTER_AREA)
+    return np.packbits(small[:, 1:] > small[:, :-1]).tobytes().hex()
+
+
+def grid_key(prompt: str, cells: List[np.ndarray]) -> str:
+    """The grid captcha's prompt and the hashes of its cells in order
+
+    The modal around them changes between rounds, the cells and the prompt
+    are what the solution depends on.
+    """
+    prompt = " ".join(prompt.lower().split())
+    return ":".join([prompt, *(dhash(cell) for cell in cells)])
@@ -0,0 +1,38 @@
+import redis.asyncio as redis
+from p2p.application import CachedSolution, CaptchaCacheRepo
+
+
+class RedisCaptchaCacheRepo(CaptchaCacheRepo):
+    """Solutions expire `ttl` seconds after they last worked"""
+
+    def __init__(self, redis_dsn: str, ttl: int = 7 * 24 * 3600) -> None:
+        self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
+        self._ttl = ttl
+
+    @staticmethod
+    def _get_key(kind: str, key: str):
+        return f"captcha_{kind}_{key}"
+
+    async def get(self, kind: str, key: str) -> CachedSolution:
+        raw = await self._redis.hgetall(self._get_key(kind, key))
+        if not raw:
+            raise self.NotFound(f"{kind} captcha {key} wasn't found")
+        return CachedSolution(**raw)
+
+    async def put(self, kind: str, key: str, solution: str, elapsed: float):
+        name = self._get_key(kind, key)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(name, mapping={"solution": solution, "elapsed": elapsed})
+            pipe.expire(name, self._ttl)
+            await pipe.execute()
+
+    async def record(self, kind: str, key: str, success: bool):
+        name = self._get_key(kind, key)
+        if not success:
+            await self._redis.delete(name)
+            return
+        if await self._redis.exists(name):
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.hincrby(name, "successes", 1)
+                pipe.expire(name, self._ttl)
+                await pipe.execute()
@@ -0,0 +1,69 @@
+import random
+import time
+from typing import Optional
+
+import redis.asyncio as redis
+from p2p.application import CircuitBreakerRepo, Exchange, MetricsRepo
+
+
+class RedisCircuitBreakerRepo(CircuitBreakerRepo):
+    """Per endpoint breaker shared by all workers.
+
+    Every failure doubles the back off (with jitter, never below the
+    server's Retry-After). Once it runs out a single worker is let
+    through as a probe, its success closes the breaker.
+    """
+
+    probe_timeout: int = 30
+
+    def __init__(
+        self,
+        redis_dsn: str,
+        metrics_repo: MetricsRepo,
+        base_delay: float = 1.0,
+        max_delay: float = 300.0,
+    ) -> None:
+        self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
+        self._metrics = metrics_repo
+        self._base_delay = base_delay
+        self._max_delay = max_delay
+
+    @staticmethod
+    def _get_key(exchange: Exchange, name: str):
+        return f"{exchange.value}_{name}_breaker"
+
+    async def check(self, exchange: Exchange, name: str) -> bool:
+        key = self._get_key(exchange, name)
+        open_until = await self._redis.hget(key, "open_until")
+        if open_until is None:
+            return False
+        retry_after = float(open_until) - time.time()
+        if retry_after > 0:
+            raise self.Open(name, retry_after)
+        if not await self._redis.set(f"{key}_probe", 1, nx=True, ex=self.probe_timeout):
+            raise self.Open(name, 1.0)
+        self._metrics.set(f"breaker_state:{name}", 0.5)
+        return True
+
+    async def record_success(self, exchange: Exchange, name: str):
+        key = self._get_key(exchange, name)
+        await self._redis.delete(key, f"{key}_probe")
+        self._metrics.set(f"breaker_state:{name}", 0)
+
+    async def record_failure(
+        self, exchange: Exchange, name: str, retry_after: Optional[float] = None
+    ) -> float:
+        key = self._get_key(exchange, name)
+        failures = await self._redis.hincrby(key, "failures", 1)
+        delay = min(self._max_delay, self._base_delay * 2 ** (failures - 1))
+        delay = delay / 2 + random.uniform(0, delay / 2)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        async with self._redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, "open_until", time.time() + delay)
+            pipe.expire(key, int(2 * self._max_delay))
+            pipe.delete(f"{key}_probe")
+            await pipe.execute()
+        self._metrics.incr(f"breaker_trips:{name}")
+        self._metrics.set(f"breaker_state:{name}", 1)
+        return delay
@@ -0,0 +1,105 @@
+import time
+from typing import Callable, Iterable, List
+
+import redis.asyncio as redis
+from p2p.application import ConvoyScheduleRepo, Exchange
+
+# schedules the new users, drops the gone ones and leases the due ones,
+# returns the due and the gone users, the latter's state is deleted by the
+# caller: in a cluster a script touches only the keys it's given
+POP_DUE = """
+local now = tonumber(ARGV[1])
+local active = {}
+for i = 4, #ARGV do
+    active[ARGV[i]] = true
+    redis.call('ZADD', KEYS[1], 'NX', now + tonumber(ARGV[3]), ARGV[i])
+end
+local due, gone = {}, {}
+for _, user in ipairs(redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', now)) do
+    if active[user] then
+        redis.call('ZADD', KEYS[1], now + tonumber(ARGV[2]), user)
+        table.insert(due, user)
+    else
+        redis.call('ZREM', KEYS[1], user)
+        table.insert(gone, user)
+    end
+end
+return {due, gone}
+"""
+
+# the interval doubles after `track_len` polls in a row with the same price
+RECORD = """
+local base = tonumber(ARGV[3])
+local interval = tonumber(redis.call('HGET', KEYS[2], 'interval') or base)
+local streak = tonumber(redis.call('HGET', KEYS[2], 'streak') or 0)
+if ARGV[2] == '1' then
+    interval, streak = base, 0
+else
+    streak = streak + 1
+    if streak >= tonumber(ARGV[5]) then
+        interval, streak = math.min(2 * interval, tonumber(ARGV[4])), 0
+    end
+end
+redis.call('HSET', KEYS[2], 'interval', interval, 'streak', streak)
+redis.call('EXPIRE', KEYS[2], ARGV[7])
+redis.call('ZADD', KEYS[1], tonumber(ARGV[1]) + interval, ARGV[6])
+return tostring(interval)
+"""
+
+
+class RedisConvoyScheduleRepo(ConvoyScheduleRepo):
+    """Next due times in a sorted set, the backoff state in a hash per user"""
+
+    def __init__(
+        self,
+        redis_dsn: str,
+        base_interval: float = 10,
+        max_interval: float = 60,
+        track_len: int = 10,
+        lease: float = 30,
+        ttl: int = 24 * 3600,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
+        self._base_interval = base_interval
+        self._max_interval = max_interval
+        self._track_len = track_len
+        # a user claimed by a worker that died is retried after it
+        self._lease = lease
+        self._ttl = ttl
+        self._clock = clock
+        self._pop_due = self._redis.register_script(POP_DUE)
+        self._record = self._redis.register_script(RECORD)
+
+    @staticmethod
+    def _due_key(exchange: Exchange) -> str:
+        # the hash tag keeps the schedule and the states in one cluster slot
+        return f"{{{exchange.value}_convoy}}:due"
+
+    @staticmethod
+    def _state_key(exchange: Exchange, user_id: str) -> str:
+        return f"{{{exchange.value}_convoy}}:state:{user_id}"
+
+    async def pop_due(self, exchange: Exchange, user_ids: Iterable[str]) -> List[str]:
+        due, gone = await self._pop_due(
+            keys=[self._due_key(exchange)],
+            args=[self._clock(), self._lease, self._base_interval, *user_ids],
+        )
+        if gone:
+            await self._redis.delete(*(self._state_key(exchange, u) for u in gone))
+        return due
+
+    async def record(self, exchange: Exchange, user_id: str, changed: bool) -> float:
+        interval = await self._record(
+            keys=[self._due_key(exchange), self._state_key(exchange, user_id)],
+            args=[
+                self._clock(),
+                int(changed),
+                self._base_interval,
+                self._max_interval,
+                self._track_len,
+                user_id,
+                self._ttl,
+            ],
+        )
+        return float(interval)
@@ -0,0 +1,38 @@
+from collections import defaultdict
+from typing import DefaultDict, Dict
+
+import redis.asyncio as redis
+from p2p.application import MetricsRepo
+
+
+class RedisMetricsRepo(MetricsRepo):
+    """Counters and gauges are buffered in process and published on flush"""
+
+    key = "p2p_metrics"
+
+    def __init__(self, redis_dsn: str) -> None:
+        self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
+        self._counters: DefaultDict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+
+    def incr(self, name: str, value: float = 1):
+        self._counters[name] += value
+
+    def set(self, name: str, value: float):
+        self._gauges[name] = value
+
+    async def flush(self):
+        if not self._counters and not self._gauges:
+            return
+        counters, self._counters = self._counters, defaultdict(float)
+        gauges, self._gauges = self._gauges, {}
+        async with self._redis.pipeline(transaction=False) as pipe:
+            for name, value in counters.items():
+                pipe.hincrbyfloat(self.key, name, value)
+            if gauges:
+                pipe.hset(self.key, mapping=gauges)
+            await pipe.execute()
+
+    async def read(self) -> Dict[str, float]:
+        raw = await self._redis.hgetall(self.key)
+        return {k: float(v) for k, v in raw.items()}
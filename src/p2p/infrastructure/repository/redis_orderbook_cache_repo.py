@@ -1,39 +1,132 @@
+import asyncio
 import json
-from typing import AsyncContextManager, List, Optional
+import time
+from typing import AsyncContextManager, Callable, List, Optional, Tuple
 
 import redis.asyncio as redis
+from loguru import logger
 from p2p.application import (Exchange, IncrementRepo, LockerRepo, Order,
-                             OrderBookCacheRepo, Pair)
+                             OrderBookCacheRepo, OrderBookKey,
+                             OrderBookSnapshot)
+from redis.asyncio.client import PubSub
+from redis.exceptions import RedisError
+
+from .lru_cache import LRUCache
+from .orderbook_codec import UnknownFormat, decode_orderbook, encode_orderbook
 
 LOCKS = {}
 
 
 class RedisOrderBookCacheRepo(OrderBookCacheRepo, IncrementRepo, LockerRepo):
+    """Books in Redis, the fresh ones also kept built in process
+
+    Writers announce new snapshots on `updates_channel`, readers drain it
+    without blocking before trusting their in-process copy. The orders
+    handed out are shared between readers and must not be modified, with
+    `compact_orders` the ones read back from Redis are CompactOrder.
+    """
+
     poll_interval: int = 1
+    fetch_timeout: int = 5
+    updates_channel: str = "orderbook_updates"
 
-    def __init__(self, redis_dsn: str, ttl: int = 10) -> None:
+    def __init__(
+        self,
+        redis_dsn: str,
+        soft_ttl: int = 10,
+        hard_ttl: int = 60,
+        l1_size: int = 256,
+        compact_orders: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
         self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
-        self._ttl = ttl
+        # the books are stored encoded, see orderbook_codec
+        self._raw_redis = redis.from_url(redis_dsn)
+        self._soft_ttl = soft_ttl
+        self._hard_ttl = hard_ttl
+        self._l1: LRUCache[Tuple[float, List[Order]]] = LRUCache(
+            l1_size, ttl=soft_ttl
+        )
+        self._compact_orders = compact_orders
+        self._clock = clock
+        self._updates: Optional[PubSub] = None
+        self._updates_loop: Optional[asyncio.AbstractEventLoop] = None
 
     @staticmethod
-    def _get_key(exchange: Exchange, pair: Pair):
-        return f"{exchange.value}:{str(pair)}"
-
-    async def put(self, exchange: Exchange, pair: Pair, orders: List[Order]):
-        key = self._get_key(exchange, pair)
-        prepared = [o.json() for o in orders]
-        value = json.dumps(prepared)
-        await self._redis.set(key, value, self._ttl)
-
-    async def read(self, exchange: Exchange, pair: Pair) -> List[dict]:
-        key = self._get_key(exchange, pair)
-        raw = await self._redis.get(key)
+    def _get_key(exchange: Exchange, key: OrderBookKey):
+        return f"{exchange.value}:{key}"
+
+    async def put(self, exchange: Exchange, key: OrderBookKey, orders: List[Order]):
+        name = self._get_key(exchange, key)
+        fetched_at = self._clock()
+        value = encode_orderbook(fetched_at, orders)
+        update = json.dumps({"key": name, "fetched_at": fetched_at})
+        async with self._raw_redis.pipeline(transaction=False) as pipe:
+            pipe.set(name, value, self._hard_ttl)
+            pipe.publish(self.updates_channel, update)
+            await pipe.execute()
+        self._l1.put(name, (fetched_at, list(orders)))
+
+    async def read(self, exchange: Exchange, key: OrderBookKey) -> OrderBookSnapshot:
+        name = self._get_key(exchange, key)
+        synced = await self._sync_l1()
+        if synced:
+            try:
+                fetched_at, orders = self._l1.get(name)
+            except KeyError:
+                pass
+            else:
+                age = max(self._clock() - fetched_at, 0.0)
+                if age < self._soft_ttl:
+                    # built already, skip the validation
+                    return OrderBookSnapshot.construct(orders=orders, age=age)
+        raw = await self._raw_redis.get(name)
         if raw is None:
-            raise self.NotFound(f"key {key} wasn't found")
-        raw = json.loads(raw)
-        if isinstance(raw, list):
-            raw = [json.loads(r) for r in raw]
-        return raw
+            raise self.NotFound(f"key {name} wasn't found")
+        try:
+            fetched_at, orders = decode_orderbook(raw, key, self._compact_orders)
+        except UnknownFormat as ex:
+            # written by an older release, refetched like a missing one
+            raise self.NotFound(f"key {name}: {ex}")
+        age = max(self._clock() - fetched_at, 0.0)
+        if synced and age < self._soft_ttl:
+            self._l1.put(name, (fetched_at, orders))
+        return OrderBookSnapshot.construct(
+            orders=orders, age=age, stale=age >= self._soft_ttl
+        )
+
+    async def _sync_l1(self) -> bool:
+        """Drop the books rewritten elsewhere, False if the L1 can't be trusted"""
+        loop = asyncio.get_running_loop()
+        try:
+            if self._updates is None or self._updates_loop is not loop:
+                # whatever was announced before subscribing is unknown
+                self._l1.clear()
+                self._updates = self._redis.pubsub(ignore_subscribe_messages=True)
+                await self._updates.subscribe(self.updates_channel)
+                self._updates_loop = loop
+            while True:
+                message = await self._updates.get_message(timeout=0)
+                if message is None:
+                    return True
+                update = json.loads(message["data"])
+                try:
+                    fetched_at, _ = self._l1.get(update["key"])
+                except KeyError:
+                    continue
+                if fetched_at < update["fetched_at"]:
+                    self._l1.pop(update["key"])
+        except RedisError as ex:
+            logger.warning(f"orderbook updates unavailable: {ex}")
+            self._updates = None
+            return False
+
+    async def claim_fetch(self, exchange: Exchange, key: OrderBookKey) -> bool:
+        name = f"{self._get_key(exchange, key)}:fetching"
+        return bool(await self._redis.set(name, 1, nx=True, ex=self.fetch_timeout))
+
+    async def release_fetch(self, exchange: Exchange, key: OrderBookKey):
+        await self._redis.delete(f"{self._get_key(exchange, key)}:fetching")
 
     async def update(self, exchange: Exchange, name: str, value: str) -> bool:
         key = f"{exchange.value}_{name}_incremental"
@@ -0,0 +1,31 @@
+import json
+from typing import Dict
+
+import redis.asyncio as redis
+from p2p.application import Exchange, PayMethodRepo, PaymentMethod
+
+
+class RedisPayMethodRepo(PayMethodRepo):
+    def __init__(self, redis_dsn: str, ttl: int = 3600) -> None:
+        self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
+        self._ttl = ttl
+
+    @staticmethod
+    def _get_key(exchange: Exchange, user_id: str):
+        return f"{exchange.value}_{user_id}_pay_methods"
+
+    async def get(self, exchange: Exchange, user_id: str) -> Dict[PaymentMethod, dict]:
+        key = self._get_key(exchange, user_id)
+        raw = await self._redis.get(key)
+        if raw is None:
+            raise self.NotFound(f"key {key} wasn't found")
+        return json.loads(raw)
+
+    async def put(
+        self, exchange: Exchange, user_id: str, methods: Dict[PaymentMethod, dict]
+    ):
+        key = self._get_key(exchange, user_id)
+        await self._redis.set(key, json.dumps(methods), self._ttl)
+
+    async def invalidate(self, exchange: Exchange, user_id: str):
+        await self._redis.delete(self._get_key(exchange, user_id))
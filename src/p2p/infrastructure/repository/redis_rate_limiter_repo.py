@@ -0,0 +1,54 @@
+import asyncio
+
+import redis.asyncio as redis
+from p2p.application import Exchange, RateLimiterRepo
+
+# token bucket: refill by elapsed time, then either take `cost` tokens
+# or report how long to wait until enough of them are there
+TOKEN_BUCKET = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+local wait = 0
+if tokens >= cost then
+    tokens = tokens - cost
+else
+    wait = (cost - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate) + 1)
+return tostring(wait)
+"""
+
+
+class RedisRateLimiterRepo(RateLimiterRepo):
+    def __init__(
+        self, redis_dsn: str, capacity: int = 20, refill_rate: float = 10.0
+    ) -> None:
+        self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
+        self._capacity = capacity
+        self._refill_rate = refill_rate
+        self._take = self._redis.register_script(TOKEN_BUCKET)
+
+    @staticmethod
+    def _get_key(exchange: Exchange, name: str):
+        return f"{exchange.value}_{name}_bucket"
+
+    async def acquire(self, exchange: Exchange, name: str, weight: int = 1):
+        key = self._get_key(exchange, name)
+        cost = min(weight, self._capacity)
+        while True:
+            wait = float(
+                await self._take(
+                    keys=[key], args=[self._capacity, self._refill_rate, cost]
+                )
+            )
+            if wait <= 0:
+                return
+            await asyncio.sleep(wait)
@@ -0,0 +1,74 @@
+from typing import List, Optional
+
+import redis.asyncio as redis
+from p2p.application import Exchange, SessionRepo
+
+# exponentially weighted average of the observed session lifetimes, a lower
+# bound only moves it up, it never goes below the floor
+EWMA = """
+local current = tonumber(redis.call('GET', KEYS[1]))
+local sample = tonumber(ARGV[1])
+if current then
+    if ARGV[3] == '1' and sample <= current then
+        return tostring(current)
+    end
+    sample = tonumber(ARGV[2]) * sample + (1 - tonumber(ARGV[2])) * current
+end
+sample = math.max(sample, tonumber(ARGV[4]))
+redis.call('SET', KEYS[1], sample)
+return tostring(sample)
+"""
+
+
+class RedisSessionRepo(SessionRepo):
+    def __init__(
+        self, redis_dsn: str, alpha: float = 0.3, min_lifetime: float = 0
+    ) -> None:
+        self._redis = redis.from_url(redis_dsn, encoding="utf-8", decode_responses=True)
+        self._alpha = alpha
+        self._min_lifetime = min_lifetime
+        self._ewma = self._redis.register_script(EWMA)
+
+    @staticmethod
+    def _lifetime_key(exchange: Exchange):
+        return f"{exchange.value}_session_lifetime"
+
+    @staticmethod
+    def _expired_key(exchange: Exchange):
+        return f"{exchange.value}_expired_sessions"
+
+    @staticmethod
+    def _login_key(exchange: Exchange, user_id: str):
+        return f"{exchange.value}_login_requested:{user_id}"
+
+    async def record_lifetime(
+        self, exchange: Exchange, seconds: float, lower_bound: bool = False
+    ):
+        key = self._lifetime_key(exchange)
+        await self._ewma(
+            keys=[key],
+            args=[seconds, self._alpha, int(lower_bound), self._min_lifetime],
+        )
+
+    async def expected_lifetime(self, exchange: Exchange) -> Optional[float]:
+        value = await self._redis.get(self._lifetime_key(exchange))
+        return None if value is None else max(float(value), self._min_lifetime)
+
+    async def mark_expired(self, exchange: Exchange, user_id: str):
+        await self._redis.sadd(self._expired_key(exchange), user_id)
+
+    async def is_expired(self, exchange: Exchange, user_id: str) -> bool:
+        return bool(await self._redis.sismember(self._expired_key(exchange), user_id))
+
+    async def expired(self, exchange: Exchange) -> List[str]:
+        return sorted(await self._redis.smembers(self._expired_key(exchange)))
+
+    async def clear_expired(self, exchange: Exchange, user_id: str):
+        await self._redis.srem(self._expired_key(exchange), user_id)
+
+    async def claim_login(self, exchange: Exchange, user_id: str, ttl: int) -> bool:
+        key = self._login_key(exchange, user_id)
+        return bool(await self._redis.set(key, 1, nx=True, ex=ttl))
+
+    async def release_login(self, exchange: Exchange, user_id: str):
+        await self._redis.delete(self._login_key(exchange, user_id))
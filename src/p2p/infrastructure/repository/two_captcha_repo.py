@@ -0,0 +1,117 @@
+import asyncio
+from typing import Any, Dict, Optional, Tuple
+
+import aiohttp
+from loguru import logger
+from p2p.application import CaptchaSolverRepo, GridSolution
+
+
+class TwoCaptchaSolverRepo(CaptchaSolverRepo):
+    """2captcha's in.php/res.php API over aiohttp.
+
+    A job is submitted and then polled without blocking the loop, at
+    most `max_jobs` jobs run at once. A job that outlives its timeout,
+    or whose caller is cancelled, is abandoned: 2captcha can't cancel.
+    """
+
+    NOT_READY = "CAPCHA_NOT_READY"
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://2captcha.com",
+        timeout: float = 180.0,
+        poll_interval: float = 5.0,
+        max_jobs: int = 10,
+    ) -> None:
+        self._api_key = api_key
+        self._base_url = base_url.rstrip("/")
+        self._timeout = timeout
+        self._poll_interval = poll_interval
+        self._max_jobs = max_jobs
+        self._jobs: Optional[asyncio.Semaphore] = None
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def _get_session(self) -> aiohttp.ClientSession:
+        # the session and the semaphore are bound to the loop
+        loop = asyncio.get_running_loop()
+        if (
+            self._session is None
+            or self._session.closed
+            or self._session_loop is not loop
+        ):
+            self._session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=30)
+            )
+            self._jobs = asyncio.Semaphore(self._max_jobs)
+            self._session_loop = loop
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def _call(self, endpoint: str, params: Dict[str, Any]) -> str:
+        session = await self._get_session()
+        params = {**params, "key": self._api_key, "json": 1}
+        url = f"{self._base_url}/{endpoint}"
+        # images go in the body
+        if endpoint == "in.php":
+            request = session.post(url, data=params)
+        else:
+            request = session.get(url, params=params)
+        try:
+            async with request as resp:
+                res = await resp.json(content_type=None)
+        except (aiohttp.ClientError, ValueError) as ex:
+            raise self.SolveFailed(f"{endpoint}: {ex!r}") from ex
+        if res.get("status") != 1 and res.get("request") != self.NOT_READY:
+            raise self.SolveFailed(f"{endpoint}: {res.get('request')}")
+        return res["request"]
+
+    async def _solve(self, params: Dict[str, Any]) -> Tuple[str, str]:
+        captcha_id = await self._call("in.php", params)
+        while True:
+            await asyncio.sleep(self._poll_interval)
+            answer = await self._call("res.php", {"action": "get", "id": captcha_id})
+            if answer != self.NOT_READY:
+                return captcha_id, answer
+
+    async def solve_grid(
+        self,
+        image: str,
+        rows: int = 3,
+        cols: int = 3,
+        timeout: Optional[float] = None,
+    ) -> GridSolution:
+        await self._get_session()
+        if self._jobs is None:
+            raise ValueError("_jobs is None")
+        async with self._jobs:
+            try:
+                captcha_id, answer = await asyncio.wait_for(
+                    self._solve(
+                        {
+                            "method": "base64",
+                            "body": image,
+                            "recaptcha": 1,
+                            "recaptcharows": rows,
+                            "recaptchacols": cols,
+                            "lang": "en",
+                        }
+                    ),
+                    timeout or self._timeout,
+                )
+            except asyncio.TimeoutError as ex:
+                raise self.SolveFailed("solving timed out") from ex
+        logger.debug(f"captcha {captcha_id} solved: {answer}")
+        if not answer.startswith("click:"):
+            raise self.SolveFailed(f"couldn't resolve {answer}")
+        cells = [int(c) for c in answer[len("click:") :].split("/") if c]
+        return GridSolution(captcha_id=captcha_id, cells=cells)
+
+    async def report(self, captcha_id: str, correct: bool):
+        action = "reportgood" if correct else "reportbad"
+        await self._call("res.php", {"action": action, "id": captcha_id})
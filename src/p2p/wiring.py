@@ -1,17 +1,32 @@
+from datetime import timedelta
 from typing import cast
 
 from dependency_injector import containers, providers
 from loguru import logger
+from p2p.application import (CheckNewOffersUseCase, CollectInfoUseCase,
+                             ConvoyOrderUseCase, Exchange, PlaceOrderUseCase,
+                             RenewSessionsUseCase)
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
 
 from p2p.infrastructure import (AlchemyAuthRepo, AlchemyIntentionRepo,
-                                AlchemyUserRepo, BinanceAuthenticator,
-                                BinanceMerchMediatorRepo, BinanceP2PRepo,
-                                BinP2PAdapter, RedisOrderBookCacheRepo,
-                                RedisQueueRepo, RedisUserDataRepo)
+                                AlchemyUserRepo, BinanceMerchMediatorRepo,
+                                BinanceP2PRepo, BinP2PAdapter,
+                                RedisCaptchaCacheRepo, RedisCircuitBreakerRepo,
+                                RedisConvoyScheduleRepo, RedisMetricsRepo,
+                                RedisOrderBookCacheRepo, RedisPayMethodRepo,
+                                RedisQueueRepo, RedisRateLimiterRepo,
+                                RedisSessionRepo, RedisUserDataRepo,
+                                TwoCaptchaSolverRepo)
 from p2p.settings import AdsSettings, BotSettings, CelerySettings, Settings
 
 
+def create_authenticator(**kwargs):
+    # imported on the first login, see p2p.infrastructure
+    from p2p.infrastructure import BinanceAuthenticator
+
+    return BinanceAuthenticator(**kwargs)
+
+
 def get_async_db_engine(dsn: str) -> AsyncEngine:
     engine = cast(
         AsyncEngine,
@@ -41,7 +56,39 @@ class Container(containers.DeclarativeContainer):
     user_repo = providers.Singleton(AlchemyUserRepo, db_engine)
     intent_repo = providers.Singleton(AlchemyIntentionRepo, db_engine)
     orderbook_cache_repo = providers.Singleton(
-        RedisOrderBookCacheRepo, settings.redis_dsn
+        RedisOrderBookCacheRepo,
+        settings.redis_dsn,
+        soft_ttl=settings.orderbook_soft_ttl,
+        hard_ttl=settings.orderbook_hard_ttl,
+        l1_size=settings.orderbook_l1_size,
+        compact_orders=settings.orderbook_compact_orders,
+    )
+    rate_limiter_repo = providers.Singleton(
+        RedisRateLimiterRepo,
+        settings.redis_dsn,
+        capacity=settings.rate_limit_capacity,
+        refill_rate=settings.rate_limit_refill,
+    )
+    metrics_repo = providers.Singleton(RedisMetricsRepo, settings.redis_dsn)
+    circuit_breaker_repo = providers.Singleton(
+        RedisCircuitBreakerRepo,
+        settings.redis_dsn,
+        metrics_repo=metrics_repo,
+        base_delay=settings.breaker_base_delay,
+        max_delay=settings.breaker_max_delay,
+    )
+    pay_method_repo = providers.Singleton(
+        RedisPayMethodRepo, settings.redis_dsn, ttl=settings.pay_methods_ttl
+    )
+    session_repo = providers.Singleton(
+        RedisSessionRepo,
+        settings.redis_dsn,
+        min_lifetime=settings.session_min_lifetime,
+    )
+    convoy_schedule_repo = providers.Singleton(
+        RedisConvoyScheduleRepo,
+        settings.redis_dsn,
+        lease=celery_settings.poll_interval * 2,
     )
     question_queue_repo = providers.Singleton(
         RedisQueueRepo,
@@ -55,20 +102,86 @@ class Container(containers.DeclarativeContainer):
     )
 
     adapter = BinP2PAdapter()
+    captcha_solver_repo = providers.Singleton(
+        TwoCaptchaSolverRepo,
+        api_key=ads_settings.captcha_solver_key,
+        base_url=ads_settings.captcha_solver_url,
+        timeout=ads_settings.captcha_timeout,
+        poll_interval=ads_settings.captcha_poll_interval,
+    )
+    captcha_cache_repo = providers.Singleton(
+        RedisCaptchaCacheRepo, settings.redis_dsn, ttl=ads_settings.captcha_cache_ttl
+    )
     auth = providers.Singleton(
-        BinanceAuthenticator,
+        create_authenticator,
         driver_url=ads_settings.driver_url,
-        captcha_solver_key=ads_settings.captcha_solver_key,
+        captcha_solver=captcha_solver_repo,
+        captcha_cache=captcha_cache_repo,
         user_queue_repo=question_queue_repo,
+        metrics_repo=metrics_repo,
+        max_browsers=ads_settings.max_browsers,
+        browser_max_uses=ads_settings.browser_max_uses,
+        proxy_port=ads_settings.proxy_port,
     )
     p2p_repo = providers.Singleton(
         BinanceP2PRepo,
         adapter,
-        auth_provider=auth,
+        auth_provider=auth.provider,
         auth_repo=auth_repo,
         user_repo=user_repo,
         locker_repo=orderbook_cache_repo,
         user_question_repo=question_queue_repo,
+        rate_limiter=rate_limiter_repo,
+        circuit_breaker=circuit_breaker_repo,
+        pay_method_repo=pay_method_repo,
+        metrics_repo=metrics_repo,
+        session_repo=session_repo,
+        timeout=settings.http_timeout,
+        limit_per_host=settings.http_limit_per_host,
+        page_size=settings.orderbook_page_size,
+        auth_cache_size=settings.auth_cache_size,
+        auth_cache_ttl=settings.auth_cache_ttl,
+    )
+
+    # use cases keep no per-run state, workers reuse them between tasks
+    collect_info_uc = providers.Singleton(
+        CollectInfoUseCase,
+        p2p_repo=p2p_repo,
+        ob_cache=orderbook_cache_repo,
+        metrics_repo=metrics_repo,
+        exchange=Exchange.BINANCE,
+    )
+    place_order_uc = providers.Singleton(
+        PlaceOrderUseCase,
+        intent_repo=intent_repo,
+        collect_info_uc=collect_info_uc,
+        p2p_repo=p2p_repo,
+    )
+    convoy_order_uc = providers.Singleton(
+        ConvoyOrderUseCase,
+        intent_repo=intent_repo,
+        collect_info_uc=collect_info_uc,
+        p2p_repo=p2p_repo,
+        schedule_repo=convoy_schedule_repo,
+        metrics_repo=metrics_repo,
+        exchange=Exchange.BINANCE,
+        concurrency=celery_settings.convoy_concurrency,
+    )
+    check_new_offers_uc = providers.Singleton(
+        CheckNewOffersUseCase,
+        p2p_repo=p2p_repo,
+        notification_repo=question_queue_repo,
+        inc_repo=orderbook_cache_repo,
+        intent_repo=intent_repo,
+    )
+    renew_sessions_uc = providers.Singleton(
+        RenewSessionsUseCase,
+        p2p_repo=p2p_repo,
+        intent_repo=intent_repo,
+        session_repo=session_repo,
+        exchange=Exchange.BINANCE,
+        default_lifetime=timedelta(seconds=settings.session_lifetime),
+        renew_ratio=settings.session_renew_ratio,
     )
     # market_repo = BinanceMarketDataRepo(adapter=adapter)
 
@@ -1,8 +1,19 @@
+import asyncio
 import json
+from datetime import timedelta
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
-from p2p.infrastructure import (BinP2PAdapter, RedisOrderBookCacheRepo,
-                                RedisQueueRepo)
+import redis.asyncio as redis
+from p2p.application import CircuitBreakerRepo, ConvoyOrderUseCase, Exchange
+from p2p.application.use_case.renew_sessions import RenewSessionsUseCase
+from p2p.infrastructure import (BinanceP2PRepo, BinP2PAdapter,
+                                RedisOrderBookCacheRepo, RedisQueueRepo,
+                                TwoCaptchaSolverRepo)
+from p2p.infrastructure.repository.bin_auth import BinanceAuthenticator
+from p2p.infrastructure.repository.browser_pool import BrowserPool
+from p2p.infrastructure.repository.redis_convoy_schedule_repo import \
+    RedisConvoyScheduleRepo
 
 
 @pytest.fixture
@@ -24,3 +35,132 @@ def redis_docker_dsn():
 def docker_redis_queue_repo(redis_docker_dsn):
     orderbook_cache_repo = RedisOrderBookCacheRepo(redis_dsn=redis_docker_dsn)
     return RedisQueueRepo(locker_repo=orderbook_cache_repo, redis_dsn=redis_docker_dsn)
+
+
+@pytest.fixture
+def breaker():
+    breaker = AsyncMock(CircuitBreakerRepo)
+    breaker.check.return_value = False
+    breaker.record_failure.return_value = 7.0
+    return breaker
+
+
+@pytest.fixture
+def make_p2p_repo(breaker):
+    """Builds binance repos on mocks, sharing the breaker"""
+
+    def make(auth_repo=None, session_repo=None) -> BinanceP2PRepo:
+        repo = BinanceP2PRepo(
+            BinP2PAdapter(),
+            auth_provider=MagicMock(),
+            auth_repo=auth_repo or AsyncMock(),
+            user_repo=AsyncMock(),
+            locker_repo=AsyncMock(**{"get_lock.return_value": AsyncMock()}),
+            user_question_repo=AsyncMock(),
+            rate_limiter=AsyncMock(),
+            pay_method_repo=AsyncMock(),
+            metrics_repo=MagicMock(),
+            session_repo=session_repo
+            or AsyncMock(**{"is_expired.return_value": False}),
+            circuit_breaker=breaker,
+        )
+        repo._send = AsyncMock(return_value=(200, {}, '{"data": []}'))
+        return repo
+
+    return make
+
+
+@pytest.fixture
+def renew_sessions_uc():
+    """On mocks, the sessions live an hour and none is rejected"""
+    return RenewSessionsUseCase(
+        p2p_repo=AsyncMock(),
+        intent_repo=AsyncMock(),
+        session_repo=AsyncMock(
+            **{
+                "expected_lifetime.return_value": 3600.0,
+                "is_expired.return_value": False,
+            }
+        ),
+        exchange=Exchange.BINANCE,
+        default_lifetime=timedelta(hours=1),
+    )
+
+
+@pytest.fixture
+def make_browser_pool():
+    """Builds pools of mock drivers"""
+
+    def make(**kwargs) -> BrowserPool:
+        return BrowserPool(lambda: MagicMock(), **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def authenticator():
+    """On mocks, with a single login thread"""
+    return BinanceAuthenticator(
+        driver_url="http://selenium:4444/wd/hub",
+        captcha_solver=AsyncMock(),
+        captcha_cache=AsyncMock(),
+        user_queue_repo=AsyncMock(),
+        metrics_repo=MagicMock(),
+        max_browsers=1,
+    )
+
+
+@pytest.fixture
+def make_captcha_solver_repo():
+    """Builds 2captcha clients of a fake solver, polling it quickly"""
+
+    def make(url: str, **kwargs) -> TwoCaptchaSolverRepo:
+        kwargs.setdefault("poll_interval", 0.05)
+        return TwoCaptchaSolverRepo("key", base_url=url, **kwargs)
+
+    return make
+
+
+@pytest.fixture
+def convoy_order_uc():
+    """On mocks, three users are convoyed at a time"""
+    return ConvoyOrderUseCase(
+        intent_repo=AsyncMock(),
+        collect_info_uc=AsyncMock(),
+        p2p_repo=AsyncMock(),
+        schedule_repo=AsyncMock(),
+        metrics_repo=MagicMock(),
+        exchange=Exchange.BINANCE,
+        concurrency=3,
+    )
+
+
+async def forget_convoy_schedule(redis_dsn: str, repo: RedisConvoyScheduleRepo):
+    """Drop the users of earlier runs, the states of the gone ones expire"""
+    client = redis.from_url(redis_dsn, decode_responses=True)
+    due_key = repo._due_key(Exchange.BINANCE)
+    users = await client.zrange(due_key, 0, -1)
+    states = [repo._state_key(Exchange.BINANCE, u) for u in users]
+    await client.delete(due_key, *states)
+    await client.aclose()
+
+
+@pytest.fixture
+def clock():
+    """The time the repos built with it read, set `clock[0]` to move it"""
+    return [1_000_000.0]
+
+
+@pytest.fixture
+def convoy_schedule_repo(redis_docker_dsn, clock):
+    repo = RedisConvoyScheduleRepo(
+        redis_docker_dsn,
+        base_interval=10,
+        max_interval=30,
+        track_len=2,
+        lease=5,
+        clock=lambda: clock[0],
+    )
+    # on a loop of its own, the repo's connections aren't opened yet
+    asyncio.run(forget_convoy_schedule(redis_docker_dsn, repo))
+    return repo
@@ -1,8 +1,9 @@
 from typing import cast
 
 import pytest
-from p2p.application import User
-from p2p.infrastructure import AlchemyAuthRepo, AlchemyUserRepo
+from p2p.application import AdsFlow, User
+from p2p.infrastructure import (AlchemyAuthRepo, AlchemyIntentionRepo,
+                                AlchemyUserRepo)
 from p2p.infrastructure.repository.alchemy_models import metadata
 from sqlalchemy import Column, create_engine
 from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
@@ -46,6 +47,11 @@ def user_repo(engine, make_db):
     return AlchemyUserRepo(engine)
 
 
+@pytest.fixture
+def intent_repo(engine, make_db):
+    return AlchemyIntentionRepo(engine)
+
+
 @pytest.mark.asyncio
 async def test_user(user_repo: AlchemyUserRepo):
     user = User(
@@ -90,3 +96,23 @@ async def test_uath_data(auth_repo: AlchemyAuthRepo, user_repo: AlchemyUserRepo)
     await auth_repo.save(user.login, auth_data)
     db_data = await auth_repo.read(user.login)
     assert db_data == auth_data
+
+
+@pytest.mark.asyncio
+async def test_intents_by_user(intent_repo: AlchemyIntentionRepo):
+    ids = {}
+    for name in ["b", "a", "b", "c", "a"]:
+        # saved under the exchange login, keyed by the presentation id
+        settings = {"user_id": f"10{name}"}
+        login = f"{name}@mail.com"
+        intent_id = await intent_repo.save(login, {"n": len(ids)}, settings)
+        ids[intent_id] = settings["user_id"]
+        await intent_repo.set_status(intent_id, AdsFlow.PLACED)
+    await intent_repo.set_status(max(ids), AdsFlow.COMPLETED)
+
+    users = await intent_repo.read_by_user(AdsFlow.PLACED)
+    assert list(users) == ["10a", "10b", "10c"]
+    assert [i[0] for i in users["10b"]] == [i for i, u in ids.items() if u == "10b"]
+    assert len(users["10a"]) == 1
+    assert users["10c"][0][1] == {"n": 3}
+    assert users["10c"][0][2] == {"user_id": "10c"}
@@ -1,6 +1,18 @@
+import asyncio
+import base64
+import time
 from unittest.mock import MagicMock
 
-from p2p.infrastructure.repository.bin_auth import JigSawSolver
+import cv2
+import numpy as np
+import pytest
+from p2p.application import (CachedSolution, CaptchaCacheRepo, GridSolution,
+                             UserInteractionEnum)
+from p2p.infrastructure.repository.bin_auth import (BinanceAuthenticator,
+                                                    JigSawSolver, PuzzleSolver,
+                                                    b64_to_bgr, dhash,
+                                                    grid_key)
+from p2p.infrastructure.repository.browser_pool import BrowserPool
 
 
 def test_get_track():
@@ -21,3 +33,151 @@ def test_get_track():
     assert len(track) > 0
     assert all([i <= 0 for i in track])
     assert abs(sum(track) + 50) < 2
+
+
+@pytest.mark.asyncio
+async def test_login_does_not_block_loop(authenticator: BinanceAuthenticator):
+    auth = authenticator
+    queue_repo = auth._user_question_repo
+    queue_repo.query.return_value = "123456"
+
+    def login(login, password):
+        time.sleep(0.2)
+        code = auth._await(
+            queue_repo.query(login, question=UserInteractionEnum.ASK_AUTH_CODE)
+        )
+        return {"code": code}
+
+    auth._login = login
+
+    async def tick() -> float:
+        ts = time.monotonic()
+        for _ in range(10):
+            await asyncio.sleep(0.01)
+        return time.monotonic() - ts
+
+    headers, elapsed = await asyncio.gather(
+        auth.get_auth_headers("user", "pass"), tick()
+    )
+    assert headers == {"code": "123456"}
+    # the loop kept serving while the browser was busy
+    assert elapsed < 0.2
+
+
+@pytest.mark.asyncio
+async def test_failed_warm_up_is_retried(authenticator: BinanceAuthenticator):
+    auth = authenticator
+    warmed = asyncio.Event()
+
+    def warm():
+        auth._loop.call_soon_threadsafe(warmed.set)
+        time.sleep(0.1)
+        raise ConnectionError("selenium is down")
+
+    auth._pool.warm = warm
+    auth._login = lambda login, password: {"csrftoken": login}
+    # the only login thread isn't taken by the warm up
+    assert await asyncio.wait_for(auth.get_auth_headers("user", "pass"), 0.05)
+    await warmed.wait()
+    await asyncio.sleep(0.2)
+    assert auth._warming is None
+
+
+def make_puzzle(gap_x: int, piece_x: int = 5, size: int = 40):
+    """A plain background with a square gap and the piece cut from it"""
+    background = np.full((100, 300, 3), 90, dtype=np.uint8)
+    cv2.rectangle(background, (gap_x, 30), (gap_x + size, 30 + size), (230,) * 3, 2)
+    piece = np.zeros((100, 60, 3), dtype=np.uint8)
+    cv2.rectangle(piece, (piece_x, 30), (piece_x + size, 30 + size), (230,) * 3, -1)
+    return piece, background
+
+
+def test_puzzle_solver():
+    piece, background = make_puzzle(gap_x=150)
+    assert abs(PuzzleSolver(piece, background).get_position() - 145) <= 1
+
+
+def test_dhash_survives_reencoding():
+    _, background = make_puzzle(gap_x=150)
+    _, jpeg = cv2.imencode(".jpg", background, [cv2.IMWRITE_JPEG_QUALITY, 70])
+    reencoded = b64_to_bgr(base64.b64encode(jpeg.tobytes()).decode())
+    _, other = make_puzzle(gap_x=60)
+    assert dhash(reencoded) == dhash(background) != dhash(other)
+
+
+def test_grid_key_follows_cells_and_prompt():
+    cells = [make_puzzle(gap_x=x)[1] for x in (20, 60, 150)]
+    key = grid_key("Please select all images with\nbus", cells)
+    assert key == grid_key("please select all images with  Bus", cells)
+    assert key != grid_key("Please select all images with\ncar", cells)
+    assert key != grid_key("Please select all images with\nbus", cells[::-1])
+
+
+def test_cached_solution(authenticator: BinanceAuthenticator):
+    auth = authenticator
+    cache, metrics = auth._captcha_cache, auth._metrics
+    cache.get.return_value = CachedSolution(solution="1/5", elapsed=20.0)
+    solve = MagicMock(return_value="2/3")
+
+    async def cached() -> str:
+        auth._loop = asyncio.get_running_loop()
+        return await auth._loop.run_in_executor(
+            None, auth._cached, "grid", "key", solve
+        )
+
+    assert asyncio.run(cached()) == "1/5"
+    solve.assert_not_called()
+    metrics.incr.assert_any_call("captcha_seconds_saved:grid", 20.0)
+
+    cache.get.side_effect = CaptchaCacheRepo.NotFound()
+    assert asyncio.run(cached()) == "2/3"
+    assert cache.put.await_args.args[:3] == ("grid", "key", "2/3")
+    metrics.incr.assert_any_call("captcha_cache_misses:grid")
+
+
+def test_bad_grid_solution_is_not_cached(authenticator: BinanceAuthenticator):
+    auth = authenticator
+    cache, solver = auth._captcha_cache, auth._captcha_solver
+    cache.get.side_effect = CaptchaCacheRepo.NotFound()
+    solver.solve_grid.return_value = GridSolution(
+        captcha_id="42", cells=[1, 2, 3, 4, 5, 6, 7, 8]
+    )
+
+    async def cached() -> str:
+        auth._loop = asyncio.get_running_loop()
+        return await auth._loop.run_in_executor(
+            None, auth._cached, "grid", "key", lambda: auth._solve_grid("screen")
+        )
+
+    with pytest.raises(ValueError):
+        asyncio.run(cached())
+    solver.report.assert_awaited_once_with("42", correct=False)
+    cache.put.assert_not_awaited()
+
+
+def test_login_finishes_on_first_authenticated_call(
+    authenticator: BinanceAuthenticator,
+):
+    auth = authenticator
+    driver = MagicMock()
+
+    def call_api(*tokens: str):
+        for token in tokens:
+            request = MagicMock(
+                url=f"{auth.API_URL}/accounts/v1/user",
+                headers={"clienttype": "web", "csrftoken": token},
+            )
+            driver.request_interceptor(request)
+
+    def submit(driver, login, password, submitted):
+        submitted.set()
+        call_api(auth.ANONYMOUS_TOKEN, "token")
+
+    # the login page calls the API before the credentials are in
+    driver.get.side_effect = lambda url: call_api(auth.ANONYMOUS_TOKEN, "stale")
+    auth._pool = BrowserPool(lambda: driver)
+    auth._try_next_action = MagicMock(side_effect=submit)
+
+    assert auth._login("user", "pass") == {"clienttype": "web", "csrftoken": "token"}
+    auth._try_next_action.assert_called_once()
+    assert not hasattr(driver, "request_interceptor")
@@ -0,0 +1,56 @@
+import threading
+from unittest.mock import PropertyMock
+
+import pytest
+
+
+def test_reuse_and_reset(make_browser_pool):
+    pool = make_browser_pool(size=1)
+    with pool.driver() as driver:
+        driver.requests = ["captured"]
+    with pool.driver() as again:
+        assert again is driver
+        assert not hasattr(again, "requests")
+    driver.execute_cdp_cmd.assert_called_with("Network.clearBrowserCookies", {})
+    driver.quit.assert_not_called()
+
+
+def test_recycle_after_max_uses(make_browser_pool):
+    pool = make_browser_pool(size=1, max_uses=2)
+    drivers = []
+    for _ in range(3):
+        with pool.driver() as driver:
+            drivers.append(driver)
+    assert drivers[0] is drivers[1] is not drivers[2]
+    drivers[0].quit.assert_called_once()
+
+
+def test_failed_login_discards_driver(make_browser_pool):
+    pool = make_browser_pool(size=1)
+    with pytest.raises(ValueError):
+        with pool.driver() as driver:
+            raise ValueError("login failed")
+    driver.quit.assert_called_once()
+    assert len(pool) == 0
+
+
+def test_unhealthy_driver_replaced(make_browser_pool):
+    pool = make_browser_pool(size=1)
+    with pool.driver() as driver:
+        type(driver).current_url = PropertyMock(side_effect=Exception("gone"))
+    with pool.driver() as fresh:
+        assert fresh is not driver
+    driver.quit.assert_called_once()
+
+
+def test_size_bounds_drivers(make_browser_pool):
+    pool = make_browser_pool(size=2)
+    pool.warm()
+    assert len(pool) == pool.idle == 2
+    first, second = pool.acquire(), pool.acquire()
+    with pytest.raises(TimeoutError):
+        pool.acquire(timeout=0.05)
+    threading.Timer(0.05, pool.release, args=(first,)).start()
+    assert pool.acquire(timeout=1) is first
+    pool.release(first)
+    pool.release(second)
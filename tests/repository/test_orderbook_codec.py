@@ -0,0 +1,67 @@
+import json
+import time
+
+import pytest
+from p2p.application import (Advertisement, CompactOrder, Direction,
+                             OrderBookKey, Pair)
+from p2p.application.utils import extract_info_from_orders
+from p2p.infrastructure import BinP2PAdapter
+from p2p.infrastructure.repository.orderbook_codec import (UnknownFormat,
+                                                           decode_orderbook,
+                                                           encode_orderbook)
+
+KEY = OrderBookKey(
+    pair=Pair(asset="USDT", fiat="RUB"),
+    pay_methods=("TinkoffNew",),
+    direction=Direction.SELL,
+)
+
+
+@pytest.fixture
+def orders():
+    adapter = BinP2PAdapter()
+    with open("tests/orderbook.json", "r") as f:
+        data = json.load(f)["data"]
+    return [adapter.decode_order_book_entry(ad) for ad in data]
+
+
+def test_round_trip(orders):
+    fetched_at = time.time()
+    data = encode_orderbook(fetched_at, orders)
+    assert len(data) < len(json.dumps([o.json() for o in orders])) / 5
+    decoded_at, decoded = decode_orderbook(data, KEY)
+    assert decoded_at == fetched_at
+    fields = ["price", "min_amount", "max_amount", "digits", "direction"]
+    assert [o.dict(include=set(fields)) for o in decoded] == [
+        o.dict(include=set(fields)) for o in orders
+    ]
+    assert [o.maker.visible_name for o in decoded] == [
+        o.maker.visible_name for o in orders
+    ]
+
+
+def test_compact_orders(orders):
+    data = encode_orderbook(time.time(), orders)
+    _, trusted = decode_orderbook(data, KEY)
+    _, compact = decode_orderbook(data, KEY, compact=True)
+    assert all(isinstance(o, CompactOrder) for o in compact)
+    assert [o.to_order() for o in compact] == trusted
+    ad = Advertisement(
+        payment_methods=["TinkoffNew"],
+        direction=Direction.SELL,
+        asset="USDT",
+        fiat="RUB",
+        price=64,
+        min_amount=1000,
+        max_amount=100000,
+    )
+    picked = [
+        extract_info_from_orders(book, ad, threshold=30, merchant="nobody")
+        for book in (trusted, compact)
+    ]
+    assert picked[0] == tuple(o.to_order() for o in picked[1])
+
+
+def test_unknown_format(orders):
+    with pytest.raises(UnknownFormat):
+        decode_orderbook(json.dumps([o.json() for o in orders]).encode(), KEY)
@@ -0,0 +1,160 @@
+from typing import List
+from unittest.mock import AsyncMock
+
+import pytest
+from p2p.application import (Currency, Direction, Exchange, Order,
+                             OrderBookKey, Pair)
+from p2p.infrastructure import RedisOrderBookCacheRepo
+from redis.exceptions import ConnectionError
+
+KEY = OrderBookKey(
+    pair=Pair(asset="USDT", fiat="RUB"),
+    pay_methods=["TinkoffNew"],
+    direction=Direction.SELL,
+)
+
+
+class FakeServer:
+    """Just the commands the orderbook cache sends, shared by the repos"""
+
+    def __init__(self) -> None:
+        self.store = {}
+        self.subscribers: List["FakePubSub"] = []
+        self.down = False
+
+
+class FakePubSub:
+    def __init__(self, server: FakeServer) -> None:
+        self._server = server
+        self.messages = []
+
+    async def subscribe(self, channel: str):
+        if self._server.down:
+            raise ConnectionError("redis is down")
+        self._server.subscribers.append(self)
+
+    async def get_message(self, timeout: float):
+        return self.messages.pop(0) if self.messages else None
+
+
+class FakePipeline:
+    def __init__(self, server: FakeServer) -> None:
+        self._server = server
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    def set(self, name: str, value: bytes, ex: int):
+        self._server.store[name] = value
+
+    def publish(self, channel: str, message: str):
+        for subscriber in self._server.subscribers:
+            subscriber.messages.append({"data": message})
+
+    async def execute(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self, server: FakeServer) -> None:
+        self._server = server
+        self.get = AsyncMock(side_effect=lambda name: server.store.get(name))
+
+    def pipeline(self, transaction: bool = True):
+        return FakePipeline(self._server)
+
+    def pubsub(self, ignore_subscribe_messages: bool = False):
+        return FakePubSub(self._server)
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+@pytest.fixture
+def make_repo(server: FakeServer, clock):
+    """Builds repos sharing the fake server and the clock"""
+
+    def make() -> RedisOrderBookCacheRepo:
+        repo = RedisOrderBookCacheRepo(
+            "redis://localhost", soft_ttl=10, hard_ttl=60, clock=lambda: clock[0]
+        )
+        repo._redis = repo._raw_redis = FakeRedis(server)
+        return repo
+
+    return make
+
+
+def book(price: int) -> List[Order]:
+    return [
+        Order(
+            payment_methods=["TinkoffNew"],
+            direction=Direction.SELL,
+            asset=Currency("USDT"),
+            fiat=Currency("RUB"),
+            price=price,
+            min_amount=100,
+            max_amount=1000,
+        )
+    ]
+
+
+async def subscribe(repo: RedisOrderBookCacheRepo):
+    with pytest.raises(repo.NotFound):
+        await repo.read(Exchange.BINANCE, KEY)
+
+
+@pytest.mark.asyncio
+async def test_l1_hit_skips_get(make_repo):
+    repo = make_repo()
+    await subscribe(repo)
+    await repo.put(Exchange.BINANCE, KEY, book(60))
+    # its own announcement doesn't evict the book
+    snapshot = await repo.read(Exchange.BINANCE, KEY)
+    assert snapshot.orders == book(60)
+    assert not snapshot.stale
+    assert repo._redis.get.await_count == 1  # the subscribing miss
+
+
+@pytest.mark.asyncio
+async def test_newer_book_announced_evicts(make_repo, clock):
+    reader, writer = make_repo(), make_repo()
+    await subscribe(reader)
+    await reader.put(Exchange.BINANCE, KEY, book(60))
+    clock[0] += 1
+    await writer.put(Exchange.BINANCE, KEY, book(61))
+    snapshot = await reader.read(Exchange.BINANCE, KEY)
+    assert [o.price for o in snapshot.orders] == [61]
+    assert reader._redis.get.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_l1_bypassed_while_unsubscribed(make_repo, server, clock):
+    reader, writer = make_repo(), make_repo()
+    server.down = True
+    await reader.put(Exchange.BINANCE, KEY, book(60))
+    await reader.read(Exchange.BINANCE, KEY)
+    assert reader._redis.get.await_count == 1
+    # rewritten while the reader couldn't hear of it
+    clock[0] += 1
+    await writer.put(Exchange.BINANCE, KEY, book(61))
+    server.down = False
+    snapshot = await reader.read(Exchange.BINANCE, KEY)
+    assert [o.price for o in snapshot.orders] == [61]
+    assert reader._redis.get.await_count == 2
+
+
+@pytest.mark.asyncio
+async def test_old_book_read_stale(make_repo, clock):
+    repo = make_repo()
+    await subscribe(repo)
+    await repo.put(Exchange.BINANCE, KEY, book(60))
+    clock[0] += 11
+    snapshot = await repo.read(Exchange.BINANCE, KEY)
+    assert snapshot.stale
+    assert snapshot.age == pytest.approx(11)
+    assert repo._redis.get.await_count == 2
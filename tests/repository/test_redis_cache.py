@@ -1,7 +1,8 @@
 
 import pytest
 
-from p2p.application import Currency, Direction, Exchange, Order
+from p2p.application import (Currency, Direction, Exchange, Order,
+                             OrderBookKey, Pair)
 from p2p.infrastructure import RedisOrderBookCacheRepo
 
 
@@ -27,6 +28,13 @@ async def test_cache(repo: RedisOrderBookCacheRepo):
         max_amount=1000,
     )
     orders = [order]
-    await repo.put(Exchange.BINANCE, "some_some", orders=orders)
-    orders_cached = await repo.read(Exchange.BINANCE, "some_some")
-    assert orders == [Order(**o) for o in orders_cached]
+    key = OrderBookKey(
+        pair=Pair(asset="some", fiat="some"),
+        pay_methods=["method"],
+        direction=Direction.BUY,
+    )
+    await repo.put(Exchange.BINANCE, key, orders=orders)
+    snapshot = await repo.read(Exchange.BINANCE, key)
+    # only the fields the pricing reads are cached
+    assert snapshot.orders == [order.copy(update={"maker": snapshot.orders[0].maker})]
+    assert snapshot.orders[0].maker.visible_name == order.maker.visible_name
@@ -0,0 +1,67 @@
+import pytest
+from p2p.application import Exchange
+from p2p.infrastructure.repository.redis_convoy_schedule_repo import \
+    RedisConvoyScheduleRepo
+
+NOW = 1_000_000.0  # where the clock fixture starts
+
+
+async def pop_due(repo: RedisConvoyScheduleRepo, clock, at: float, *users: str):
+    clock[0] = NOW + at
+    return await repo.pop_due(Exchange.BINANCE, users)
+
+
+@pytest.mark.asyncio
+async def test_new_user_due_after_base_interval(
+    convoy_schedule_repo: RedisConvoyScheduleRepo, clock
+):
+    repo = convoy_schedule_repo
+    assert await pop_due(repo, clock, 0, "user") == []
+    assert await pop_due(repo, clock, 9, "user") == []
+    assert await pop_due(repo, clock, 10, "user") == ["user"]
+
+
+@pytest.mark.asyncio
+async def test_due_user_leased(convoy_schedule_repo: RedisConvoyScheduleRepo, clock):
+    repo = convoy_schedule_repo
+    await pop_due(repo, clock, 0, "user")
+    assert await pop_due(repo, clock, 10, "user") == ["user"]
+    # claimed by another worker until the lease is over
+    assert await pop_due(repo, clock, 14, "user") == []
+    assert await pop_due(repo, clock, 15, "user") == ["user"]
+
+
+@pytest.mark.asyncio
+async def test_interval_backs_off_and_resets(
+    convoy_schedule_repo: RedisConvoyScheduleRepo, clock
+):
+    repo = convoy_schedule_repo
+    intervals = [
+        await repo.record(Exchange.BINANCE, "user", changed=False) for _ in range(6)
+    ]
+    # doubles every track_len polls up to max_interval
+    assert intervals == [10, 20, 20, 30, 30, 30]
+    assert await repo.record(Exchange.BINANCE, "user", changed=True) == 10
+    assert await pop_due(repo, clock, 9, "user") == []
+    assert await pop_due(repo, clock, 10, "user") == ["user"]
+
+
+@pytest.mark.asyncio
+async def test_gone_user_forgotten(
+    convoy_schedule_repo: RedisConvoyScheduleRepo, clock
+):
+    repo = convoy_schedule_repo
+    await repo.record(Exchange.BINANCE, "gone", changed=False)
+    state_key = repo._state_key(Exchange.BINANCE, "gone")
+    assert await repo._redis.exists(state_key)
+    assert await pop_due(repo, clock, 10, "other") == []
+    due_key = repo._due_key(Exchange.BINANCE)
+    assert await repo._redis.zscore(due_key, "gone") is None
+    assert not await repo._redis.exists(state_key)
+
+
+@pytest.mark.asyncio
+async def test_user_named_due(convoy_schedule_repo: RedisConvoyScheduleRepo, clock):
+    repo = convoy_schedule_repo
+    await repo.record(Exchange.BINANCE, "due", changed=False)
+    assert await pop_due(repo, clock, 10, "due") == ["due"]
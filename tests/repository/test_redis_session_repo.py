@@ -0,0 +1,40 @@
+import pytest
+from p2p.application import Exchange
+from p2p.infrastructure import RedisSessionRepo
+
+
+@pytest.fixture
+def repo(redis_docker_dsn):
+    return RedisSessionRepo(redis_docker_dsn, alpha=0.5, min_lifetime=600)
+
+
+async def reset(repo: RedisSessionRepo):
+    await repo._redis.delete(repo._lifetime_key(Exchange.BINANCE))
+
+
+@pytest.mark.asyncio
+async def test_lower_bound_only_grows_lifetime(repo: RedisSessionRepo):
+    await reset(repo)
+    await repo.record_lifetime(Exchange.BINANCE, 3000)
+    await repo.record_lifetime(Exchange.BINANCE, 2000, lower_bound=True)
+    assert await repo.expected_lifetime(Exchange.BINANCE) == 3000
+    await repo.record_lifetime(Exchange.BINANCE, 4000, lower_bound=True)
+    assert await repo.expected_lifetime(Exchange.BINANCE) == 3500
+
+
+@pytest.mark.asyncio
+async def test_lifetime_clamped_to_floor(repo: RedisSessionRepo):
+    await reset(repo)
+    await repo.record_lifetime(Exchange.BINANCE, 100)
+    assert await repo.expected_lifetime(Exchange.BINANCE) == 600
+    await repo.record_lifetime(Exchange.BINANCE, 100)
+    assert await repo.expected_lifetime(Exchange.BINANCE) == 600
+
+
+@pytest.mark.asyncio
+async def test_login_claimed_once(repo: RedisSessionRepo):
+    await repo.release_login(Exchange.BINANCE, "user")
+    assert await repo.claim_login(Exchange.BINANCE, "user", ttl=60)
+    assert not await repo.claim_login(Exchange.BINANCE, "user", ttl=60)
+    await repo.release_login(Exchange.BINANCE, "user")
+    assert await repo.claim_login(Exchange.BINANCE, "user", ttl=60)
@@ -0,0 +1,81 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Dict
+
+import pytest
+from aiohttp import web
+from p2p.infrastructure import TwoCaptchaSolverRepo
+
+
+@asynccontextmanager
+async def fake_solver(polls: int = 2) -> AsyncIterator[Dict]:
+    """2captcha answering `click:1/5/9` after `polls` not ready polls"""
+    state: Dict = {"jobs": 0, "polls": {}, "reports": []}
+
+    async def submit(request: web.Request) -> web.Response:
+        form = await request.post()
+        if form["key"] != "key":
+            return web.json_response({"status": 0, "request": "ERROR_WRONG_USER_KEY"})
+        state["jobs"] += 1
+        return web.json_response({"status": 1, "request": str(state["jobs"])})
+
+    async def result(request: web.Request) -> web.Response:
+        action, captcha_id = request.query["action"], request.query["id"]
+        if action != "get":
+            state["reports"].append((action, captcha_id))
+            return web.json_response({"status": 1, "request": "OK_REPORT_RECORDED"})
+        state["polls"][captcha_id] = state["polls"].get(captcha_id, 0) + 1
+        if state["polls"][captcha_id] <= polls:
+            return web.json_response({"status": 0, "request": "CAPCHA_NOT_READY"})
+        return web.json_response({"status": 1, "request": "click:1/5/9"})
+
+    app = web.Application()
+    app.router.add_post("/in.php", submit)
+    app.router.add_get("/res.php", result)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    state["url"] = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    try:
+        yield state
+    finally:
+        await runner.cleanup()
+
+
+@pytest.mark.asyncio
+async def test_solve_grid(make_captcha_solver_repo):
+    async with fake_solver() as solver:
+        repo = make_captcha_solver_repo(solver["url"])
+        solution = await repo.solve_grid("aW1hZ2U=")
+        await repo.report(solution.captcha_id, correct=False)
+        await repo.close()
+    assert solution.cells == [1, 5, 9]
+    assert solver["polls"] == {"1": 3}
+    assert solver["reports"] == [("reportbad", "1")]
+
+
+@pytest.mark.asyncio
+async def test_concurrent_jobs(make_captcha_solver_repo):
+    async with fake_solver() as solver:
+        repo = make_captcha_solver_repo(solver["url"])
+        ts = time.monotonic()
+        solutions = await asyncio.gather(*(repo.solve_grid("img") for _ in range(10)))
+        elapsed = time.monotonic() - ts
+        await repo.close()
+    assert {s.captcha_id for s in solutions} == {str(i) for i in range(1, 11)}
+    # 3 polls each, not 30
+    assert elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_timeout_and_errors(make_captcha_solver_repo):
+    async with fake_solver(polls=100) as solver:
+        repo = make_captcha_solver_repo(solver["url"])
+        with pytest.raises(TwoCaptchaSolverRepo.SolveFailed):
+            await repo.solve_grid("img", timeout=0.2)
+        repo._api_key = "wrong"
+        with pytest.raises(TwoCaptchaSolverRepo.SolveFailed):
+            await repo.solve_grid("img")
+        await repo.close()
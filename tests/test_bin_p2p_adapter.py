@@ -1,5 +1,9 @@
 from decimal import Decimal
 
+import pytest
+from p2p.application import Direction
+from p2p.infrastructure import BinP2PAdapter
+
 
 def test_decode_offer(peer_order):
     assert peer_order.amount == Decimal("57.3")
@@ -7,3 +11,13 @@ def test_decode_offer(peer_order):
     assert peer_order.price == Decimal("17.45")
     assert peer_order.participants == ("binchanger", "vicky")
     assert peer_order.order_nb == 20382268565973348352
+
+
+def test_serialise_payment_method():
+    adapter = BinP2PAdapter()
+    registry = {"TinkoffNew": {"identifier": "TinkoffNew", "payId": 42}}
+    stub = adapter.serialise_payment_method("tinkoffnew", Direction.SELL, registry)
+    assert stub["payId"] == 42
+    assert "TinkoffNew" not in BinP2PAdapter.method_2_props
+    with pytest.raises(KeyError):
+        adapter.serialise_payment_method("TinkoffNew", Direction.SELL, {})
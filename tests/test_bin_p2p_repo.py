@@ -0,0 +1,174 @@
+import json
+from datetime import datetime, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from p2p.application import (Advertisement, AuthRepo, CircuitBreakerRepo,
+                             Direction, Exchange, P2POrderRepo)
+from p2p.infrastructure import BinanceP2PRepo
+
+
+class MemoryAuthRepo(AuthRepo):
+    def __init__(self) -> None:
+        self._data = {}
+
+    async def save(self, uuid: str, auth_data: dict):
+        self._data[uuid] = (auth_data, datetime.utcnow())
+
+    async def read(self, uuid: str) -> dict:
+        return self._data[uuid][0]
+
+    async def updated_at(self, uuid: str) -> datetime:
+        return self._data[uuid][1]
+
+
+@pytest.fixture
+def repo(make_p2p_repo):
+    return make_p2p_repo()
+
+
+async def get_orderbook(repo: BinanceP2PRepo):
+    return await repo.get_orderbook(["Tinkoff"], "USDT", "RUB", Direction.SELL, 10)
+
+
+@pytest.mark.asyncio
+async def test_throttled_opens_breaker(repo: BinanceP2PRepo, breaker):
+    repo._send.return_value = (429, {"Retry-After": "7"}, "")
+    with pytest.raises(P2POrderRepo.Unavailable):
+        await get_orderbook(repo)
+    path = repo.URLS[P2POrderRepo.URL.ORDERBOOK][1]
+    breaker.record_failure.assert_awaited_with(Exchange.BINANCE, path, 7.0)
+
+
+@pytest.mark.asyncio
+async def test_open_breaker_skips_request(repo: BinanceP2PRepo, breaker):
+    breaker.check.side_effect = CircuitBreakerRepo.Open("search", 3.0)
+    with pytest.raises(P2POrderRepo.Unavailable):
+        await get_orderbook(repo)
+    repo._send.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_probe_closes_breaker(repo: BinanceP2PRepo, breaker):
+    breaker.check.return_value = True
+    assert await get_orderbook(repo) == []
+    breaker.record_success.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_update_order_uses_cached_pay_methods(repo: BinanceP2PRepo):
+    repo._pay_method_repo.get.return_value = {
+        "TinkoffNew": {"identifier": "TinkoffNew", "payId": 42}
+    }
+    repo._auth_repo.read.return_value = {"csrftoken": "token"}
+    ads = Advertisement(
+        offer_id="1",
+        payment_methods=["TinkoffNew"],
+        direction=Direction.SELL,
+        asset="USDT",
+        fiat="RUB",
+        price=60,
+        min_amount=1000,
+        max_amount=10000,
+        time_limit=15,
+    )
+    await repo.update_order("user", ads)
+    repo._send.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "message, invalidated",
+    [
+        ("The payment method is unavailable", True),
+        ("Invalid payId", True),
+        ("Ad price is out of range", False),
+    ],
+)
+async def test_pay_methods_invalidated_on_their_rejection(
+    repo: BinanceP2PRepo, message, invalidated
+):
+    repo._pay_method_repo.get.return_value = {
+        "TinkoffNew": {"identifier": "TinkoffNew", "payId": 42}
+    }
+    repo._auth_repo.read.return_value = {"csrftoken": "token"}
+    repo._send.return_value = (
+        200,
+        {},
+        json.dumps({"success": False, "code": "000002", "message": message}),
+    )
+    ads = Advertisement(
+        offer_id="1",
+        payment_methods=["TinkoffNew"],
+        direction=Direction.SELL,
+        asset="USDT",
+        fiat="RUB",
+        price=60,
+        min_amount=1000,
+        max_amount=10000,
+        time_limit=15,
+    )
+    with pytest.raises(BinanceP2PRepo.Rejected):
+        await repo.update_order("user", ads)
+    assert repo._pay_method_repo.invalidate.await_count == int(invalidated)
+
+
+@pytest.mark.asyncio
+async def test_auth_headers_cached(repo: BinanceP2PRepo):
+    repo._auth_repo.read.return_value = {"csrftoken": "token"}
+    first = await repo._add_auth_headers("user")
+    first["extra"] = "mutated"
+    assert await repo._add_auth_headers("user") == {"csrftoken": "token"}
+    repo._user_repo.get_by_presentation_id.assert_awaited_once()
+    repo._auth_repo.read.assert_awaited_once()
+
+
+@pytest.mark.asyncio
+async def test_unauthorized_marks_session_expired(repo: BinanceP2PRepo):
+    repo._locker_repo.get_lock.return_value = AsyncMock()
+    repo._auth_repo.read.return_value = {"csrftoken": "token"}
+    repo._auth_repo.updated_at.return_value = datetime.utcnow() - timedelta(hours=1)
+    repo._send.return_value = (401, {}, "")
+    with pytest.raises(P2POrderRepo.AuthFailed):
+        await repo.get_my_orders("user")
+    lifetime = repo._session_repo.record_lifetime.await_args.args[1]
+    assert lifetime == pytest.approx(3600, abs=5)
+    repo._session_repo.mark_expired.assert_awaited_with(Exchange.BINANCE, "user")
+    repo._auth_provider.assert_not_called()
+
+
+@pytest.mark.asyncio
+async def test_expired_session_skips_request(repo: BinanceP2PRepo):
+    repo._session_repo.is_expired.return_value = True
+    with pytest.raises(P2POrderRepo.AuthFailed):
+        await repo.get_my_orders("user")
+    repo._send.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+async def test_unauthorized_with_replaced_headers(make_p2p_repo):
+    auth_repo = MemoryAuthRepo()
+    session_repo = AsyncMock(**{"is_expired.return_value": False})
+    worker = make_p2p_repo(auth_repo, session_repo)
+    auth_worker = make_p2p_repo(auth_repo, session_repo)
+    for repo in (worker, auth_worker):
+        repo._user_repo.get_by_presentation_id.return_value = MagicMock(
+            login="login", presentation_id="user"
+        )
+    await auth_repo.save("login", {"csrftoken": "old"})
+    await worker._add_auth_headers("user")  # cached by the worker
+    # the auth worker renews the session the worker still has cached
+    authenticator = auth_worker._auth_provider.return_value
+    authenticator.get_auth_headers = AsyncMock(return_value={"csrftoken": "new"})
+    await auth_worker.renew_session("user")
+
+    async def send(method, url, headers, **kwargs):
+        if headers["csrftoken"] == "old":
+            return 401, {}, ""
+        return 200, {}, '{"data": []}'
+
+    worker._send.side_effect = send
+    assert await worker.get_my_orders("user") == []
+    assert worker._send.await_count == 2
+    session_repo.record_lifetime.assert_not_awaited()
+    session_repo.mark_expired.assert_not_awaited()
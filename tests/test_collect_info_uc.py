@@ -1,9 +1,11 @@
+import asyncio
 import json
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, MagicMock
 
 import pytest
-from p2p.application import (CollectInfoUseCase, Exchange, OrderBookCacheRepo,
-                             Pair)
+from p2p.application import (Advertisement, CollectInfoUseCase, Direction,
+                             Exchange, OrderBookCacheRepo, OrderBookKey,
+                             OrderBookSnapshot, Pair)
 from p2p.infrastructure import BinP2PAdapter
 from p2p.settings import AdsSettings
 
@@ -31,8 +33,151 @@ async def test_collect_info():
     ob_cache.NotFound = OrderBookCacheRepo.NotFound
     ob_cache.read.side_effect = OrderBookCacheRepo.NotFound
     uc = CollectInfoUseCase(
-        p2p_repo=p2p_repo, ob_cache=ob_cache, exchange=Exchange.BINANCE
+        p2p_repo=p2p_repo,
+        ob_cache=ob_cache,
+        metrics_repo=MagicMock(),
+        exchange=Exchange.BINANCE,
     )
     await uc.execute(
         user_id=user_id, pair=pair, method=["TinkoffNew"], settings=AdsSettings()
     )
+
+
+@pytest.mark.asyncio
+async def test_concurrent_misses_share_fetch():
+    async def get_side(*args, direction, **kwargs):
+        await asyncio.sleep(0.01)
+        return [o for o in await get_orderbook() if o.direction == direction]
+
+    ads = Advertisement(
+        payment_methods=["TinkoffNew"],
+        direction=Direction.SELL,
+        asset="USDT",
+        fiat="RUB",
+        price=60,
+        min_amount=1000,
+        max_amount=10000,
+        initial_amount=100,
+        time_limit=15,
+    )
+    p2p_repo = AsyncMock()
+    p2p_repo.get_orderbook.side_effect = get_side
+    ob_cache = AsyncMock()
+    ob_cache.NotFound = OrderBookCacheRepo.NotFound
+    ob_cache.read.side_effect = OrderBookCacheRepo.NotFound
+    ob_cache.claim_fetch.return_value = True
+    uc = CollectInfoUseCase(
+        p2p_repo=p2p_repo,
+        ob_cache=ob_cache,
+        metrics_repo=MagicMock(),
+        exchange=Exchange.BINANCE,
+    )
+    settings = AdsSettings(captcha_solver_key="")
+    await asyncio.gather(
+        *(uc.execute(ad=ads, method="TinkoffNew", settings=settings) for _ in range(5))
+    )
+    # one fetch per side
+    assert p2p_repo.get_orderbook.await_count == 2
+    assert ob_cache.put.await_count == 2
+    assert ob_cache.release_fetch.await_count == 2
+    assert {c.args[1].direction for c in ob_cache.put.await_args_list} == {
+        Direction.SELL,
+        Direction.BUY,
+    }
+    assert uc._metrics_repo.incr.call_count == 10  # all the reads missed
+
+
+@pytest.mark.asyncio
+async def test_sides_cached_per_key():
+    book = await get_orderbook()
+    cached = {
+        Direction.SELL: [o.dict() for o in book if o.direction == Direction.SELL]
+    }
+
+    async def read(exchange, key: OrderBookKey):
+        assert key.pay_methods == ("TinkoffNew",)
+        if key.direction not in cached:
+            raise OrderBookCacheRepo.NotFound(str(key))
+        return OrderBookSnapshot(orders=cached[key.direction], age=3)
+
+    p2p_repo = AsyncMock()
+    p2p_repo.get_orderbook.side_effect = get_orderbook
+    ob_cache = AsyncMock(**{"read.side_effect": read, "claim_fetch.return_value": True})
+    ob_cache.NotFound = OrderBookCacheRepo.NotFound
+    metrics_repo = MagicMock()
+    uc = CollectInfoUseCase(
+        p2p_repo=p2p_repo,
+        ob_cache=ob_cache,
+        metrics_repo=metrics_repo,
+        exchange=Exchange.BINANCE,
+    )
+    ads = Advertisement(
+        payment_methods=["TinkoffNew"],
+        direction=Direction.SELL,
+        asset="USDT",
+        fiat="RUB",
+        price=60,
+        min_amount=1000,
+        max_amount=10000,
+        initial_amount=100,
+        time_limit=15,
+    )
+    settings = AdsSettings(captcha_solver_key="")
+    resp = await uc.execute(ad=ads, method="TinkoffNew", settings=settings)
+    assert resp.orderbook_age == 3
+    # only the missing side is fetched
+    p2p_repo.get_orderbook.assert_awaited_once()
+    assert p2p_repo.get_orderbook.await_args.kwargs["direction"] == Direction.BUY
+    counted = sorted(c.args[0] for c in metrics_repo.incr.call_args_list)
+    assert counted == [
+        "orderbook_cache_hits:USDT_RUB:SELL",
+        "orderbook_cache_misses:USDT_RUB:BUY",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_stale_book_served_while_refreshed():
+    book = [o.dict() for o in await get_orderbook()]
+    fetched = asyncio.Event()
+
+    async def get_side(*args, **kwargs):
+        await fetched.wait()
+        return await get_orderbook()
+
+    p2p_repo = AsyncMock(**{"get_orderbook.side_effect": get_side})
+    ob_cache = AsyncMock(**{"claim_fetch.return_value": True})
+    ob_cache.read.return_value = OrderBookSnapshot(orders=book, age=12, stale=True)
+    uc = CollectInfoUseCase(
+        p2p_repo=p2p_repo,
+        ob_cache=ob_cache,
+        metrics_repo=MagicMock(),
+        exchange=Exchange.BINANCE,
+    )
+    ads = Advertisement(
+        payment_methods=["TinkoffNew"],
+        direction=Direction.SELL,
+        asset="USDT",
+        fiat="RUB",
+        price=60,
+        min_amount=1000,
+        max_amount=10000,
+        initial_amount=100,
+        time_limit=15,
+    )
+    settings = AdsSettings(captcha_solver_key="")
+    responses = await asyncio.gather(
+        *(uc.execute(ad=ads, method="TinkoffNew", settings=settings) for _ in range(3))
+    )
+    # answered from the stale snapshot before the exchange replied
+    assert [r.orderbook_age for r in responses] == [12, 12, 12]
+    ob_cache.put.assert_not_awaited()
+    fetched.set()
+    await uc.wait_refreshes()
+    assert p2p_repo.get_orderbook.await_count == 2  # one refresh per side
+    assert ob_cache.put.await_count == 2
+
+    # a strategy asking for fresher data waits for it
+    settings.max_orderbook_age = 5
+    resp = await uc.execute(ad=ads, method="TinkoffNew", settings=settings)
+    assert resp.orderbook_age == 0
+    assert p2p_repo.get_orderbook.await_count == 4
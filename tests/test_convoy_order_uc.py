@@ -0,0 +1,92 @@
+import asyncio
+from typing import Optional
+from unittest.mock import MagicMock, patch
+
+import pytest
+from p2p.application import (AdsFlow, ConvoyOrderUseCase, Direction, Exchange,
+                             P2POrderRepo)
+
+AD = {
+    "direction": "sell",
+    "asset": "usdt",
+    "fiat": "rub",
+    "payment_methods": "tinkoffnew",
+    "initial_amount": "1000",
+}
+
+
+# presentation ids, the intents are saved under the exchange logins
+BROKEN, LOGGED_OUT = "1900", "1901"
+
+
+def intent(intent_id: int, user_id: str, ad: Optional[dict] = None):
+    return (intent_id, ad or {"direction": "sell"}, {"user_id": user_id})
+
+
+@pytest.mark.asyncio
+async def test_users_convoyed_concurrently(convoy_order_uc: ConvoyOrderUseCase):
+    uc = convoy_order_uc
+    in_flight, peak = 0, 0
+
+    async def get_my_orders(user_id: str):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01)
+        in_flight -= 1
+        if user_id == BROKEN:
+            raise ValueError("unexpected response")
+        if user_id == LOGGED_OUT:
+            raise P2POrderRepo.AuthFailed()
+        return []
+
+    users = [str(1000 + i) for i in range(6)] + [BROKEN, LOGGED_OUT]
+    intent_repo, p2p_repo = uc._intent_repo, uc._p2p_repo
+    schedule_repo, metrics_repo = uc._schedule_repo, uc._metrics_repo
+    intent_repo.read_by_user.return_value = {
+        user_id: [intent(i, user_id), intent(i + len(users), user_id)]
+        for i, user_id in enumerate(users)
+    }
+    intent_repo.read_by_user.return_value["2000"] = [intent(20, "2000")]
+    p2p_repo.get_my_orders.side_effect = get_my_orders
+    schedule_repo.pop_due.return_value = users
+
+    assert await uc.execute() == [LOGGED_OUT]
+    assert peak == 3
+    assert p2p_repo.get_my_orders.await_count == len(users)
+    # the users with no matching orders left had their intents completed
+    completed = {c.args for c in intent_repo.set_status.await_args_list}
+    assert completed == {(i, AdsFlow.COMPLETED) for i in [*range(6), *range(8, 14)]}
+    metrics_repo.incr.assert_called_once_with("convoy_errors")
+    metrics_repo.set.assert_any_call("convoy_users", len(users) + 1)
+    # nothing was compared, the users are retried once their lease is over
+    schedule_repo.record.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("new_price, changed", [(61, True), (60, False)])
+async def test_schedule_recorded(
+    convoy_order_uc: ConvoyOrderUseCase, monkeypatch, new_price, changed
+):
+    monkeypatch.setenv("CAPTCHA_SOLVER_KEY", "test")
+    uc = convoy_order_uc
+    intent_repo, p2p_repo = uc._intent_repo, uc._p2p_repo
+    schedule_repo = uc._schedule_repo
+    intent_repo.read_by_user.return_value = {"1000": [intent(1, "1000", AD)]}
+    existing = MagicMock(
+        asset="USDT",
+        fiat="RUB",
+        direction=Direction.SELL,
+        payment_methods=["TinkoffNew"],
+        initial_amount=1000,
+        price=60,
+    )
+    p2p_repo.get_my_orders.return_value = [existing]
+    schedule_repo.pop_due.return_value = ["1000"]
+    with patch(
+        "p2p.application.use_case.convoy_order.calculate_price",
+        return_value=new_price,
+    ):
+        assert await uc.execute() == []
+    schedule_repo.record.assert_awaited_once_with(Exchange.BINANCE, "1000", changed)
+    assert p2p_repo.update_order.await_count == int(changed)
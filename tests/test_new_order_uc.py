@@ -8,7 +8,8 @@ from p2p.application import (CheckNewOffersUseCase, IncrementRepo,
 
 @pytest.fixture
 def user_id():
-    return "some"
+    # the presentation id, not the exchange login the intent is saved under
+    return "100200300"
 
 
 @pytest.fixture
@@ -17,9 +18,9 @@ def intents(user_id):
 
 
 @pytest.fixture
-def intent_repo(intents):
+def intent_repo(intents, user_id):
     repo = MagicMock(IntentionRepo)
-    repo.read_with_status = AsyncMock(return_value=intents)
+    repo.read_by_user = AsyncMock(return_value={user_id: intents})
     return repo
 
 
@@ -0,0 +1,37 @@
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from p2p.application import AdsFlow, P2POrderRepo, PlaceOrderUseCase
+
+AD = {
+    "direction": "sell",
+    "asset": "usdt",
+    "fiat": "rub",
+    "payment_methods": "TinkoffNew",
+    "time_limit": "15",
+    "initial_amount": "1000",
+    "min_amount": "100",
+    "max_amount": "1000",
+}
+
+
+@pytest.mark.asyncio
+async def test_waits_for_login(monkeypatch):
+    monkeypatch.setenv("CAPTCHA_SOLVER_KEY", "test")
+    intent_repo = AsyncMock()
+    intent_repo.read_with_status.return_value = [(1, AD, {"user_id": "user"})]
+    p2p_repo = AsyncMock()
+    p2p_repo.place_order.side_effect = P2POrderRepo.AuthFailed("expired")
+    uc = PlaceOrderUseCase(
+        intent_repo=intent_repo, collect_info_uc=AsyncMock(), p2p_repo=p2p_repo
+    )
+    with patch(
+        "p2p.application.use_case.place_order.calculate_price", return_value=60
+    ):
+        assert await uc.execute("user") is False
+    # the intent stays new for the retry, nobody logs in here
+    intent_repo.set_status.assert_not_awaited()
+    p2p_repo.renew_session.assert_not_awaited()
+
+    await uc.fail("user")
+    intent_repo.set_status.assert_awaited_once_with(1, AdsFlow.FAILED)
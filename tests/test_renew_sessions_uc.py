@@ -0,0 +1,58 @@
+from datetime import timedelta
+
+import pytest
+from p2p.application import Exchange
+from p2p.application.use_case.renew_sessions import RenewSessionsUseCase
+
+
+# presentation ids, the intents are saved under the exchange logins
+FRESH, OLD, NEW, REJECTED = "1001", "1002", "1003", "1004"
+
+
+def intent(user_id: str):
+    return (1, {}, {"user_id": user_id})
+
+
+@pytest.mark.asyncio
+async def test_renew_sessions(renew_sessions_uc: RenewSessionsUseCase):
+    uc = renew_sessions_uc
+    ages = {FRESH: timedelta(minutes=10), OLD: timedelta(minutes=50)}
+    uc._p2p_repo.session_age.side_effect = lambda user_id: ages.get(user_id)
+    uc._intent_repo.read_by_user.return_value = {
+        user_id: [intent(user_id)] for user_id in (FRESH, OLD, NEW, REJECTED)
+    }
+    uc._session_repo.expired.return_value = [REJECTED]
+    assert await uc.execute() == [REJECTED, OLD, NEW]
+    # the logins are left to the auth workers
+    uc._p2p_repo.renew_session.assert_not_awaited()
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "expired, age, renewed",
+    [
+        (True, timedelta(minutes=1), True),
+        (False, timedelta(minutes=50), True),
+        (False, timedelta(minutes=1), False),
+    ],
+)
+async def test_renew_skips_fresh_session(
+    renew_sessions_uc: RenewSessionsUseCase, expired, age, renewed
+):
+    uc = renew_sessions_uc
+    uc._p2p_repo.session_age.return_value = age
+    uc._session_repo.is_expired.return_value = expired
+    await uc.renew(OLD)
+    assert uc._p2p_repo.renew_session.await_count == int(renewed)
+
+
+@pytest.mark.asyncio
+async def test_renewed_valid_session_bounds_lifetime(
+    renew_sessions_uc: RenewSessionsUseCase,
+):
+    uc = renew_sessions_uc
+    uc._p2p_repo.session_age.return_value = timedelta(minutes=50)
+    await uc.renew(OLD)
+    uc._session_repo.record_lifetime.assert_awaited_once_with(
+        Exchange.BINANCE, 3000.0, lower_bound=True
+    )